@@ -0,0 +1,261 @@
+"""
+执行引擎基准
+
+直接驱动 WorkflowExecutor（内存 SQLite，不经过 HTTP），对生成的典型工作流计时：
+长链、宽扇出、大循环、嵌套条件和大上下文。输出每个场景的吞吐、延迟分位数和峰值内存，
+可写出 JSON 并与保存的基线比较，p50 变慢超过阈值时以非零状态退出。
+仓库中的 benchmarks/baseline.json 是当前主分支的结果（记录了 Python 版本与平台）；
+绝对耗时与机器相关，在其他机器上比较前先在基准分支上重新生成基线。
+
+用法（在 backend 目录下）:
+    python -m benchmarks.executor
+    python -m benchmarks.executor --output results.json
+    python -m benchmarks.executor --save-baseline benchmarks/baseline.json
+    python -m benchmarks.executor --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.executor --only chain --only for_loop --scale 0.1
+"""
+
+import os
+
+# 数据库引擎在导入时创建，需在导入 database 之前指定内存数据库
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from database import init_db, async_session_maker, Tool, Workflow
+from engine.executor import WorkflowExecutor
+
+# 工具代码：在事件循环中直接运行，基准测量的是引擎自身的开销
+ADD_TOOL = "def execute(inputs, context):\n    return {'value': inputs.get('value', 0) + 1}"
+PAYLOAD_TOOL = "def execute(inputs, context):\n    return {'rows': [{'id': i, 'text': 'x' * 100} for i in range(inputs['rows'])]}"
+INLINE = {"executor": "inline"}
+
+
+def _node(node_id: str, node_type: str, **data) -> Dict[str, Any]:
+    return {"id": node_id, "type": "custom", "position": {"x": 0, "y": 0},
+            "data": {"type": node_type, "label": node_id, **data}}
+
+
+def _edge(source: str, target: str, handle: str = None) -> Dict[str, Any]:
+    edge = {"id": f"{source}-{target}", "source": source, "target": target}
+    if handle:
+        edge["sourceHandle"] = handle
+    return edge
+
+
+def chain(tools: Dict[str, int], length: int) -> Tuple[list, list, dict, int]:
+    """start -> N 个串行工具节点 -> end"""
+    nodes = [_node("start", "start")]
+    edges = []
+    previous = "start"
+    for i in range(length):
+        nodes.append(_node(f"t{i}", "tool", tool_id=tools["add"],
+                           config={"inputs": {"value": "{{v.value}}"}, "output_key": "v"}))
+        edges.append(_edge(previous, f"t{i}"))
+        previous = f"t{i}"
+    nodes.append(_node("end", "end", config={"output_key": "v"}))
+    edges.append(_edge(previous, "end"))
+    return nodes, edges, {"v": {"value": 0}}, length + 2
+
+
+def fanout(tools: Dict[str, int], width: int) -> Tuple[list, list, dict, int]:
+    """start -> N 个并行工具节点 -> 汇合代码节点 -> end"""
+    nodes = [_node("start", "start")]
+    edges = []
+    for i in range(width):
+        nodes.append(_node(f"t{i}", "tool", tool_id=tools["add"],
+                           config={"inputs": {"value": i}, "output_key": f"o{i}"}))
+        edges.append(_edge("start", f"t{i}"))
+        edges.append(_edge(f"t{i}", "join"))
+    nodes.append(_node("join", "code", config={
+        "code": f"result = sum(context['o' + str(i)]['value'] for i in range({width}))",
+        "output_key": "total", **INLINE}))
+    nodes.append(_node("end", "end", config={"output_key": "total"}))
+    edges.append(_edge("join", "end"))
+    return nodes, edges, {}, width + 3
+
+
+def for_loop(tools: Dict[str, int], items: int) -> Tuple[list, list, dict, int]:
+    """for 循环遍历 N 个元素，循环体为一个工具节点"""
+    nodes = [
+        _node("start", "start"),
+        _node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item"}),
+        _node("body", "tool", tool_id=tools["add"], config={"inputs": {"value": "{{item}}"}, "output_key": "o"}),
+    ]
+    edges = [_edge("start", "loop"), _edge("loop", "body")]
+    return nodes, edges, {"items": list(range(items))}, items + 2
+
+
+def nested_conditions(tools: Dict[str, int], depth: int) -> Tuple[list, list, dict, int]:
+    """N 层条件节点，每层未选中的分支作为死路径传播到汇合节点"""
+    nodes = [_node("start", "start")]
+    edges = []
+    previous = "start"
+    for i in range(depth):
+        nodes.append(_node(f"c{i}", "condition", config={"condition": f"{{{{level}}}} >= {i % 3}"}))
+        nodes.append(_node(f"yes{i}", "tool", tool_id=tools["add"],
+                           config={"inputs": {"value": i}, "output_key": "last"}))
+        nodes.append(_node(f"no{i}", "tool", tool_id=tools["add"],
+                           config={"inputs": {"value": -i}, "output_key": "last"}))
+        nodes.append(_node(f"j{i}", "code", config={"code": "result = context.get('last')",
+                                                     "output_key": "joined", **INLINE}))
+        edges += [_edge(previous, f"c{i}"), _edge(f"c{i}", f"yes{i}", "true"), _edge(f"c{i}", f"no{i}", "false"),
+                  _edge(f"yes{i}", f"j{i}"), _edge(f"no{i}", f"j{i}")]
+        previous = f"j{i}"
+    nodes.append(_node("end", "end", config={"output_key": "joined"}))
+    edges.append(_edge(previous, "end"))
+    return nodes, edges, {"level": 1}, depth * 3 + 2
+
+
+def large_context(tools: Dict[str, int], rows: int) -> Tuple[list, list, dict, int]:
+    """多个节点各产生 N 行的大结果，全部保留在上下文中"""
+    nodes = [_node("start", "start")]
+    edges = []
+    previous = "start"
+    for i in range(8):
+        nodes.append(_node(f"p{i}", "tool", tool_id=tools["payload"],
+                           config={"inputs": {"rows": rows}, "output_key": f"payload{i}"}))
+        edges.append(_edge(previous, f"p{i}"))
+        previous = f"p{i}"
+    nodes.append(_node("count", "code", config={
+        "code": "result = sum(len(context['payload' + str(i)]['rows']) for i in range(8))",
+        "output_key": "total", **INLINE}))
+    nodes.append(_node("end", "end", config={"output_key": "total"}))
+    edges += [_edge(previous, "count"), _edge("count", "end")]
+    return nodes, edges, {}, 11
+
+
+# 场景名称 -> (生成函数, 默认规模, 计时次数)
+SCENARIOS: Dict[str, Tuple[Callable, int, int]] = {
+    "chain": (chain, 1000, 5),
+    "fanout": (fanout, 500, 5),
+    "for_loop": (for_loop, 10000, 3),
+    "nested_conditions": (nested_conditions, 200, 5),
+    "large_context": (large_context, 20000, 3),
+}
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def _create_tools(db) -> Dict[str, int]:
+    tools = {
+        "add": Tool(name="bench_add", description="", category="bench", config=INLINE, code=ADD_TOOL),
+        "payload": Tool(name="bench_payload", description="", category="bench", config=INLINE, code=PAYLOAD_TOOL),
+    }
+    db.add_all(tools.values())
+    await db.commit()
+    return {name: tool.id for name, tool in tools.items()}
+
+
+async def run_scenario(db, tools: Dict[str, int], name: str, scale: float) -> Dict[str, Any]:
+    """运行一个场景：一次预热，repeat 次计时，再单独运行一次测量峰值内存"""
+    generator, size, repeat = SCENARIOS[name]
+    size = max(1, int(size * scale))
+    nodes, edges, input_data, node_count = generator(tools, size)
+    workflow = Workflow(name=f"bench_{name}", description="", nodes=nodes, edges=edges, variables={})
+    db.add(workflow)
+    await db.commit()
+
+    await WorkflowExecutor(workflow, db).execute(dict(input_data))
+
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await WorkflowExecutor(workflow, db).execute(dict(input_data))
+        latencies.append(time.perf_counter() - started)
+
+    # tracemalloc 会显著拖慢执行，峰值内存单独测量
+    tracemalloc.start()
+    await WorkflowExecutor(workflow, db).execute(dict(input_data))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return {
+        "size": size,
+        "nodes_per_run": node_count,
+        "runs": repeat,
+        "runs_per_sec": round(repeat / total, 3),
+        "nodes_per_sec": round(node_count * repeat / total, 1),
+        "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "peak_memory_mb": round(peak / (1024 * 1024), 2),
+    }
+
+
+async def run_all(names: List[str], scale: float) -> Dict[str, Any]:
+    await init_db()
+    results = {}
+    async with async_session_maker() as db:
+        tools = await _create_tools(db)
+        for name in names:
+            results[name] = await run_scenario(db, tools, name, scale)
+            print(f"{name:<20}{results[name]['p50_ms']:>10}{results[name]['p95_ms']:>10}"
+                  f"{results[name]['nodes_per_sec']:>14}{results[name]['peak_memory_mb']:>12}", file=sys.stderr)
+    return results
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """与基线比较 p50 延迟，返回超过阈值的回归描述"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base or base.get("size") != result["size"]:
+            continue
+        change = result["p50_ms"] / base["p50_ms"] - 1 if base["p50_ms"] else 0
+        marker = "回归" if change > threshold else ""
+        print(f"{name:<20}{base['p50_ms']:>10}{result['p50_ms']:>10}{change:>+10.1%}  {marker}", file=sys.stderr)
+        if change > threshold:
+            regressions.append(f"{name}: p50 {base['p50_ms']}ms -> {result['p50_ms']}ms ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="执行引擎基准")
+    parser.add_argument("--only", action="append", choices=list(SCENARIOS), help="只运行指定场景，可重复")
+    parser.add_argument("--scale", type=float, default=1.0, help="按比例缩放场景规模")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    parser.add_argument("--save-baseline", help="把结果保存为基线")
+    parser.add_argument("--baseline", help="与基线比较，p50 变慢超过阈值时退出码为 1")
+    parser.add_argument("--threshold", type=float, default=0.25, help="允许的 p50 变慢比例")
+    args = parser.parse_args()
+
+    print(f"{'场景':<18}{'p50(ms)':>10}{'p95(ms)':>10}{'节点/秒':>12}{'峰值(MB)':>10}", file=sys.stderr)
+    scenarios = asyncio.run(run_all(args.only or list(SCENARIOS), args.scale))
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "scenarios": scenarios,
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+    if not args.output:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n{'场景':<18}{'基线p50':>10}{'当前p50':>10}{'变化':>10}", file=sys.stderr)
+        regressions = compare(scenarios, baseline, args.threshold)
+        if regressions:
+            print("\n性能回归:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
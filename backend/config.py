@@ -0,0 +1,102 @@
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """应用配置，可通过环境变量或 .env 文件覆盖"""
+
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore")
+
+    # 数据库连接：sqlite+aiosqlite 或 postgresql+asyncpg（需安装 asyncpg），未指定驱动时自动补全
+    database_url: str = "sqlite+aiosqlite:///./workflow.db"
+    # 是否输出全部 SQL 语句（调试用）
+    database_echo: bool = False
+    # 连接池（内存 SQLite 使用单连接，不受这些参数影响）
+    database_pool_size: int = 10
+    database_max_overflow: int = 20
+    database_pool_timeout: float = 30.0
+    database_pool_recycle: int = 1800
+    # 每个 SQLite 连接建立时设置的 PRAGMA
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+
+    # 单次执行的默认时限（秒），0 表示不限制；起始节点配置的 timeout 与请求中的 timeout 优先
+    execution_timeout: float = 0
+    # 单次执行内同时运行的节点上限
+    max_concurrent_nodes: int = 32
+    # 并行 for 循环默认的最大并发迭代数
+    loop_max_concurrency: int = 10
+
+    # 工具/代码节点执行器：thread（默认）、process 或 inline
+    default_node_executor: str = "thread"
+    # 线程池大小（阻塞型工具，如同步 HTTP 请求）
+    thread_pool_workers: int = 16
+    # 进程池大小（CPU 密集型工具）
+    process_pool_workers: int = 2
+
+    # 异步执行队列：worker 数量与最大排队长度
+    job_workers: int = 4
+    job_queue_max_size: int = 100
+    # 启动时处理上次运行遗留的记录：queued 重新入队，running 标记为失败；
+    # 多个进程共用数据库时只应在一个进程中开启，否则会把其他进程正在执行的记录标记为失败
+    job_recover_on_startup: bool = True
+
+    # 批量执行：默认并发数、单次最多的输入数、批量写回执行结果的条数
+    batch_concurrency: int = 8
+    batch_max_inputs: int = 10000
+    batch_flush_size: int = 100
+
+    # 最小日志级别：debug / info / success / warning / error，低于该级别的日志不会被格式化和记录
+    log_level: str = "info"
+    # 执行日志在内存中保留的最大条数（完整日志写入 node_logs 表并通过事件流实时推送）
+    log_buffer_size: int = 1000
+    # 日志批量写入：每批条数与定时写入间隔（秒）
+    log_batch_size: int = 200
+    log_flush_interval: float = 1.0
+    # 每个事件订阅者的队列长度
+    event_queue_size: int = 1000
+    # 执行记录中保留的节点计时条数上限（大循环超出的部分只计入 /metrics 指标）
+    node_timing_limit: int = 10000
+    # 检查点：顶层每完成 N 个节点保存一次上下文与调度状态（起始节点配置 checkpoint_interval 优先），0 表示关闭；
+    # 开启后执行失败、超时或取消时也会保存一次，可通过 /api/execution/{id}/resume 从中断处继续
+    checkpoint_interval: int = 0
+    # 检查点引用的上下文文件目录（已写出到临时文件的值以硬链接保存，不重新加载），为空时使用系统临时目录下的
+    # arrange-checkpoints；与临时目录不在同一文件系统时改为复制
+    checkpoint_dir: str = ""
+    # 剖析结果中保留的函数与内存分配位置条数
+    profile_top_n: int = 30
+
+    # 执行记录保留策略，默认关闭（天数为 0 表示不清理）：超过 compact 天清空输入输出数据，超过 retention 天删除
+    execution_compact_after_days: int = 0
+    execution_retention_days: int = 0
+    # 每批处理的记录数与两轮清理之间的间隔（秒）
+    retention_batch_size: int = 500
+    retention_interval: float = 3600.0
+
+    # 单次执行上下文的内存预算（字节），0 表示不限制（默认，上下文为普通 dict）；
+    # 开启后超过阈值的单个值直接写入临时文件
+    context_memory_budget: int = 0
+    context_spill_threshold: int = 16 * 1024 * 1024
+    # 执行结果中的上下文是否省略已写出到临时文件的值（不再加载回内存）
+    context_trim_result: bool = True
+
+    # 工作流定义缓存大小；多进程部署时开启 verify，命中前校验 updated_at 版本
+    workflow_cache_size: int = 256
+    workflow_cache_verify: bool = False
+
+    # 纯函数工具（配置 "pure": true）的结果缓存：内存层的条目数与总字节数上限
+    tool_result_cache_size: int = 1024
+    tool_result_cache_max_bytes: int = 64 * 1024 * 1024
+    # 第二层 SQLite 缓存文件路径，为空时只使用内存层
+    tool_result_cache_db: str = ""
+    tool_result_cache_db_max_rows: int = 100000
+
+    # 注入工具的共享 HTTP 客户端
+    http_timeout: float = 30.0
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_http2: bool = False
+
+
+settings = Settings()
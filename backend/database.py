@@ -1,11 +1,58 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy.orm import declarative_base, deferred
+from sqlalchemy.engine import make_url
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, LargeBinary, Index, event, inspect
+from typing import Any, Dict
+from config import settings
 from datetime import datetime
 
-DATABASE_URL = "sqlite+aiosqlite:///./workflow.db"
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+def normalize_url(url: str) -> str:
+    """未指定驱动时使用异步驱动：sqlite -> aiosqlite，postgresql -> asyncpg"""
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    if url.startswith("postgres://"):
+        return "postgresql+asyncpg://" + url[len("postgres://"):]
+    if url.startswith("postgresql://"):
+        return "postgresql+asyncpg://" + url[len("postgresql://"):]
+    return url
+
+
+DATABASE_URL = normalize_url(settings.database_url)
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """按数据库类型生成连接池参数"""
+    parsed = make_url(url)
+    options: Dict[str, Any] = {"echo": settings.database_echo}
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # 内存数据库使用单连接的 StaticPool，不支持连接池大小参数
+        return options
+    options.update(
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_timeout=settings.database_pool_timeout,
+        pool_recycle=settings.database_pool_recycle,
+    )
+    if parsed.get_backend_name() != "sqlite":
+        options["pool_pre_ping"] = True
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **_engine_options(DATABASE_URL))
+
+
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """每个新连接设置 WAL、同步级别与忙等待超时，读写不再互相阻塞"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.close()
+
+
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 Base = declarative_base()
 
@@ -15,7 +62,7 @@ class Tool(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), unique=True, index=True)
     description = Column(Text)
-    category = Column(String(50))
+    category = Column(String(50), index=True)
     config = Column(JSON)  # 工具配置（输入/输出参数等）
     code = Column(Text)  # 工具执行代码
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -37,16 +84,72 @@ class ExecutionLog(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     workflow_id = Column(Integer, index=True)
-    status = Column(String(20))  # running, completed, failed
+    status = Column(String(20))  # queued, running, completed, failed, cancelled, timeout
     input_data = Column(JSON)
     output_data = Column(JSON)
-    logs = Column(JSON)  # 执行日志
-    started_at = Column(DateTime, default=datetime.utcnow)
+    logs = Column(JSON)  # 执行日志（旧版本整体存储，新日志写入 node_logs 表）
+    # 单列索引供保留策略按时间范围选取批次、以及不带过滤的执行历史排序使用
+    started_at = Column(DateTime, default=datetime.utcnow, index=True)
     completed_at = Column(DateTime)
+    compacted_at = Column(DateTime)  # 保留策略清理输入输出数据的时间
+    node_timings = Column(JSON)  # 每次节点执行的开始/结束时间、耗时、状态和输出大小
+    timeout = Column(Float)  # 请求指定的执行时限（秒）
+    profile = Column(JSON)  # 剖析模式及结果摘要（函数耗时表、内存分配位置）
+    profile_stats = deferred(Column(LargeBinary))  # pstats 格式的原始剖析数据，按需加载
+    
+    __table_args__ = (
+        Index("ix_execution_logs_workflow_id_started_at", "workflow_id", "started_at"),
+        Index("ix_execution_logs_status_started_at", "status", "started_at"),
+    )
+
+class NodeLog(Base):
+    __tablename__ = "node_logs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, nullable=False)
+    node_id = Column(String(100))
+    level = Column(String(20))
+    message = Column(Text)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_node_logs_execution_id_id", "execution_id", "id"),
+        Index("ix_node_logs_execution_id_level", "execution_id", "level"),
+        Index("ix_node_logs_execution_id_node_id", "execution_id", "node_id"),
+    )
+
+class ExecutionCheckpoint(Base):
+    __tablename__ = "execution_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, nullable=False, unique=True)  # 每个执行只保留最新的检查点
+    workflow_updated_at = Column(DateTime)  # 保存时的工作流版本，修改过的工作流不能恢复
+    completed_nodes = Column(Integer)  # 顶层已完成的节点数
+    data = Column(LargeBinary)  # zlib 压缩的 pickle：上下文与调度状态
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+def _upgrade_schema(connection):
+    """create_all 不会修改已存在的表，这里逐表补上模型中新增的（可为空的）列和索引"""
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                )
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(connection)
 
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_schema)
 
 async def get_db():
     async with async_session_maker() as session:
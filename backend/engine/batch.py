@@ -0,0 +1,128 @@
+from typing import Any, AsyncIterator, Dict, List
+from sqlalchemy import insert, update
+from database import engine, async_session_maker, ExecutionLog, Tool
+from engine.executor import WorkflowExecutor
+from engine.scheduler import ExecutionAborted
+from engine.jobs import active_executions, log_execution_error, publish_finished
+from engine.log_writer import log_writer
+from datetime import datetime
+import asyncio
+
+
+class BatchRun:
+    """同一工作流对多组输入的批量执行
+
+    所有输入共享一份执行计划和预加载的工具；执行记录按块批量插入（queued），
+    开始执行时标记为 running，结束状态累积到 flush_size 条后以一条批量 UPDATE 写回。
+    结果按完成顺序产出，最多同时执行 concurrency 个。
+    """
+
+    def __init__(self, workflow, tools: Dict[int, Tool], concurrency: int, flush_size: int):
+        self.workflow = workflow
+        self.tools = tools
+        self.flush_size = flush_size
+        self.submitted = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._results: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._ids: List[int] = []
+        self._timings: Dict[int, List[Dict[str, Any]]] = {}
+
+    async def submit(self, inputs: List[Dict[str, Any]]):
+        """插入一块输入的执行记录并开始执行"""
+        if not inputs:
+            return
+        rows = [
+            {"workflow_id": self.workflow.id, "status": "queued", "input_data": input_data,
+             "logs": [], "started_at": datetime.utcnow()}
+            for input_data in inputs
+        ]
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                insert(ExecutionLog).returning(ExecutionLog.id, sort_by_parameter_order=True),
+                rows
+            )
+            ids = [row[0] for row in result]
+        self._ids.extend(ids)
+        for execution_id, input_data in zip(ids, inputs):
+            # 排队等待并发名额期间也可以通过取消接口取消
+            executor = WorkflowExecutor(self.workflow, None, execution_id=execution_id, tools=self.tools)
+            active_executions[execution_id] = executor
+            task = asyncio.create_task(self._run_one(self.submitted, executor, input_data))
+            self._tasks.append(task)
+            self.submitted += 1
+
+    async def results(self) -> AsyncIterator[Dict[str, Any]]:
+        """按完成顺序产出每个输入的结果，所有结果产出后写回剩余的状态"""
+        pending: List[Dict[str, Any]] = []
+        try:
+            for _ in range(self.submitted):
+                item = await self._results.get()
+                pending.append(item)
+                if len(pending) >= self.flush_size:
+                    await self._flush(pending)
+                    pending = []
+                yield item
+        finally:
+            if pending:
+                await self._flush(pending)
+
+    async def cancel(self):
+        """取消尚未完成的执行（请求出错或客户端断开时）
+
+        已完成但尚未产出的结果照常写回，其余仍处于 queued 的记录标记为已取消。
+        """
+        unfinished = [execution_id for task, execution_id in zip(self._tasks, self._ids) if not task.done()]
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for execution_id in unfinished:
+            active_executions.pop(execution_id, None)
+        finished = []
+        while not self._results.empty():
+            finished.append(self._results.get_nowait())
+        if finished:
+            await self._flush(finished)
+        async with engine.begin() as conn:
+            for start in range(0, len(unfinished), self.flush_size):
+                await conn.execute(
+                    update(ExecutionLog)
+                    .where(ExecutionLog.id.in_(unfinished[start:start + self.flush_size]))
+                    .values(status="cancelled", completed_at=datetime.utcnow())
+                )
+
+    async def _run_one(self, index: int, executor: WorkflowExecutor, input_data: Dict[str, Any]):
+        execution_id = executor.execution_id
+        async with self._semaphore:
+            item = {"index": index, "id": execution_id}
+            try:
+                # 取得并发名额后才开始执行，此时再把记录从 queued 改为 running
+                async with engine.begin() as conn:
+                    await conn.execute(
+                        update(ExecutionLog).where(ExecutionLog.id == execution_id).values(status="running")
+                    )
+                result = await executor.execute(input_data)
+                item.update(status="completed", output_data=result["output"])
+            except Exception as e:
+                item.update(status=e.status if isinstance(e, ExecutionAborted) else "failed", error=str(e))
+                log_execution_error(execution_id, str(e))
+            finally:
+                active_executions.pop(execution_id, None)
+            item["completed_at"] = datetime.utcnow()
+            # 节点计时只写入执行记录，不随结果流输出
+            self._timings[execution_id] = executor.node_timings
+            await self._results.put(item)
+
+    async def _flush(self, items: List[Dict[str, Any]]):
+        """批量写回执行结果"""
+        await log_writer.flush()
+        async with async_session_maker() as db:
+            await db.execute(update(ExecutionLog), [
+                {"id": item["id"], "status": item["status"],
+                 "output_data": item.get("output_data"), "completed_at": item["completed_at"],
+                 "node_timings": self._timings.pop(item["id"], None)}
+                for item in items
+            ])
+            await db.commit()
+        for item in items:
+            publish_finished(item["id"], item["status"], item["completed_at"])
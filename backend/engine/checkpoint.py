@@ -0,0 +1,130 @@
+from typing import Any, Dict, Iterable, Optional, Set
+from datetime import datetime
+from sqlalchemy import select, delete, insert
+from database import engine, ExecutionCheckpoint
+from config import settings
+import asyncio
+import os
+import pickle
+import shutil
+import tempfile
+import zlib
+
+# 检查点在执行过程中同步序列化，压缩优先考虑速度
+COMPRESS_LEVEL = 1
+
+
+def dump_checkpoint(state: Dict[str, Any]) -> bytes:
+    """序列化检查点（pickle + zlib）；上下文中有无法序列化的值时抛出异常"""
+    return zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+
+
+def load_checkpoint(data: bytes) -> Dict[str, Any]:
+    return pickle.loads(zlib.decompress(data))
+
+
+def checkpoint_files_dir(execution_id: int) -> str:
+    """执行的检查点引用的上下文文件（已写出到临时文件的值）所在目录"""
+    root = settings.checkpoint_dir or os.path.join(tempfile.gettempdir(), "arrange-checkpoints")
+    return os.path.join(root, str(execution_id))
+
+
+def remove_checkpoint_files(execution_ids: Iterable[int]):
+    """删除一组执行的检查点文件，在检查点行删除并提交之后调用"""
+    for execution_id in execution_ids:
+        shutil.rmtree(checkpoint_files_dir(execution_id), ignore_errors=True)
+
+
+async def get_checkpoint(execution_id: int) -> Optional[ExecutionCheckpoint]:
+    """读取执行的最新检查点，不存在时返回 None"""
+    async with engine.connect() as conn:
+        result = await conn.execute(
+            select(ExecutionCheckpoint).where(ExecutionCheckpoint.execution_id == execution_id)
+        )
+        return result.first()
+
+
+async def load_resume_state(execution_id: int, workflow) -> Dict[str, Any]:
+    """读取用于恢复执行的检查点，检查点不存在或工作流在此之后被修改时抛出 ValueError"""
+    checkpoint = await get_checkpoint(execution_id)
+    if checkpoint is None:
+        raise ValueError("该执行没有可恢复的检查点")
+    if checkpoint.workflow_updated_at != workflow.updated_at:
+        raise ValueError("工作流在保存检查点后已被修改，无法恢复")
+    state = load_checkpoint(checkpoint.data)
+    if any(not os.path.exists(path) for path, _ in state.get("spilled", {}).values()):
+        raise ValueError("检查点引用的上下文文件已丢失，无法恢复")
+    return state
+
+
+async def delete_checkpoints(conn, execution_ids):
+    """删除一组执行的检查点（在调用方的事务中），引用的文件由调用方提交后通过 remove_checkpoint_files 删除"""
+    await conn.execute(delete(ExecutionCheckpoint).where(ExecutionCheckpoint.execution_id.in_(execution_ids)))
+
+
+class CheckpointWriter:
+    """单次执行的检查点写入
+
+    检查点在节点完成时同步序列化，保证与调度状态一致；写入数据库在后台进行，
+    写入期间产生的新检查点只保留最新的一个，每个执行在表中只保留一行。
+    已写出到临时文件的上下文值以文件引用保存在 directory 中，新检查点写入后删除不再引用的文件。
+    """
+
+    def __init__(self, execution_id: int, workflow_updated_at: Optional[datetime]):
+        self.execution_id = execution_id
+        self.workflow_updated_at = workflow_updated_at
+        self.directory = checkpoint_files_dir(execution_id)
+        self.written = False  # 表中是否有本执行的检查点
+        self.error: Optional[Exception] = None
+        self._latest: Optional[tuple] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def submit(self, data: bytes, completed_nodes: int, files: Iterable[str] = ()):
+        """提交一个检查点，在后台写入；files 为检查点引用的文件"""
+        self._latest = (data, completed_nodes, set(files))
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._write())
+
+    async def close(self, keep: bool):
+        """等待最后一个检查点写入；keep 为 False 时（执行成功）删除已保存的检查点"""
+        if self._task is not None:
+            await self._task
+        if not keep:
+            if self.written:
+                async with engine.begin() as conn:
+                    await delete_checkpoints(conn, [self.execution_id])
+            remove_checkpoint_files([self.execution_id])
+
+    def _prune(self, files: Set[str]):
+        """删除目录中不再被已写入或待写入的检查点引用的文件"""
+        if self._latest is not None:
+            files = files | self._latest[2]
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if path not in files:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    async def _write(self):
+        while self._latest is not None:
+            (data, completed_nodes, files), self._latest = self._latest, None
+            try:
+                async with engine.begin() as conn:
+                    await delete_checkpoints(conn, [self.execution_id])
+                    await conn.execute(insert(ExecutionCheckpoint).values(
+                        execution_id=self.execution_id,
+                        workflow_updated_at=self.workflow_updated_at,
+                        completed_nodes=completed_nodes,
+                        data=data
+                    ))
+                self.written = True
+                self._prune(files)
+            except Exception as e:
+                # 检查点写入失败不影响执行本身，由执行器记录警告
+                self.error = e
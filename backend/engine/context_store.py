@@ -0,0 +1,262 @@
+from typing import Any, Dict, Iterator, Optional, Tuple
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import itertools
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import uuid
+
+# 小于该大小的值即使超出预算也不写出，写出它们节省的内存抵不上文件开销
+MIN_SPILL_SIZE = 64 * 1024
+# 估算大小时每个容器最多检查的元素数，以及单次估算最多访问的对象数
+SAMPLE_SIZE = 32
+MAX_VISITS = 1024
+
+
+def estimate_size(value: Any) -> int:
+    """估算对象占用的内存字节数
+
+    大容器只检查均匀抽取的 SAMPLE_SIZE 个元素并按比例外推，访问 MAX_VISITS 个对象后
+    剩余的容器只计入自身大小；估算开销与对象规模无关，可以在每次写入时调用。
+    """
+    total = 0
+    visits = 0
+    seen = set()
+    # (对象, 权重)：权重是被抽中的元素所代表的元素个数
+    stack = [(value, 1.0)]
+    while stack:
+        obj, weight = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj) * weight
+        visits += 1
+        if visits > MAX_VISITS:
+            continue
+        if isinstance(obj, dict):
+            items = obj.items()
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            items = obj
+        else:
+            continue
+        count = len(items)
+        if count > SAMPLE_SIZE:
+            if isinstance(obj, (list, tuple)):
+                items = obj[::count // SAMPLE_SIZE][:SAMPLE_SIZE]
+            else:
+                items = itertools.islice(items, SAMPLE_SIZE)
+            weight = weight * count / SAMPLE_SIZE
+        for item in items:
+            if isinstance(obj, dict):
+                stack.append((item[0], weight))
+                stack.append((item[1], weight))
+            else:
+                stack.append((item, weight))
+    return int(total)
+
+
+def link_file(source: str, target: str):
+    """把文件硬链接到新路径，跨文件系统时复制"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def load_file(path: str) -> Any:
+    """读取写出到文件的值"""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class SpilledValue:
+    """已写入临时文件的上下文变量"""
+
+    __slots__ = ("path", "size")
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+
+    def __repr__(self):
+        return f"<spilled {self.size} bytes>"
+
+
+class ContextStore(MutableMapping):
+    """带内存预算的执行上下文
+
+    写入时超过 spill_threshold 的值直接序列化到临时文件，仅保留占位；
+    常驻内存的值按最近访问顺序记录大小，总量超过 memory_budget 时把最久未访问的值写出。
+    读取已写出的值时从文件加载并重新常驻，因此写出前对值的原地修改都会保留；
+    但值被写出后，之前取得的引用上的修改不会再写回。
+    无法序列化的值始终常驻内存。
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, memory_budget: int = 0,
+                 spill_threshold: int = 0):
+        self.memory_budget = memory_budget
+        self.spill_threshold = spill_threshold
+        self.spill_count = 0
+        self._values: Dict[str, Any] = {}
+        # 常驻值的估算大小，按访问顺序排列（最久未访问的在前）
+        self._resident: "OrderedDict[str, int]" = OrderedDict()
+        self._resident_bytes = 0
+        self._spill_dir: Optional[str] = None
+        self._lock = threading.RLock()
+        if data:
+            self.update(data)
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            value = self._values[key]
+            if isinstance(value, SpilledValue):
+                return self._load(key, value)
+            if key in self._resident:
+                self._resident.move_to_end(key)
+            return value
+
+    def __setitem__(self, key: str, value: Any):
+        with self._lock:
+            self._discard(key)
+            size = estimate_size(value)
+            if size > self.spill_threshold and self._spill(key, value, size):
+                return
+            self._values[key] = value
+            self._admit(key, size)
+
+    def __delitem__(self, key: str):
+        with self._lock:
+            if key not in self._values:
+                raise KeyError(key)
+            self._discard(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._values
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._values))
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __reduce__(self):
+        # 传给进程池时以普通字典的形式发送完整内容
+        return dict, (self.snapshot(),)
+
+    @property
+    def resident_bytes(self) -> int:
+        """常驻内存的值的估算总大小"""
+        return self._resident_bytes
+
+    def is_spilled(self, key: str) -> bool:
+        """变量当前是否只保存在临时文件中"""
+        return isinstance(self._values.get(key), SpilledValue)
+
+    def snapshot(self, trim: bool = False) -> Dict[str, Any]:
+        """导出为普通字典；trim 为 True 时已写出的值以占位描述代替，不再加载"""
+        with self._lock:
+            if not trim:
+                return {key: self[key] for key in list(self._values)}
+            return {
+                key: {"spilled": True, "size": value.size} if isinstance(value, SpilledValue) else value
+                for key, value in self._values.items()
+            }
+
+    def checkpoint_state(self, directory: str) -> Tuple[Dict[str, Any], Dict[str, Tuple[str, int]]]:
+        """导出检查点：返回 (常驻的值, 已写出的值 -> (文件路径, 大小))
+
+        已写出的值不再加载，只把临时文件链接到 directory 中，之后重新加载或覆盖都不影响检查点引用的文件。
+        """
+        with self._lock:
+            values = {}
+            spilled = {}
+            for key, value in self._values.items():
+                if isinstance(value, SpilledValue):
+                    path = os.path.join(directory, os.path.basename(value.path))
+                    if not os.path.exists(path):
+                        os.makedirs(directory, exist_ok=True)
+                        link_file(value.path, path)
+                    spilled[key] = (path, value.size)
+                else:
+                    values[key] = value
+            return values, spilled
+
+    def adopt(self, key: str, path: str, size: int):
+        """把检查点中的文件作为已写出的值放入上下文，访问时才加载"""
+        with self._lock:
+            self._discard(key)
+            target = os.path.join(self._ensure_spill_dir(), uuid.uuid4().hex)
+            link_file(path, target)
+            self._values[key] = SpilledValue(target, size)
+
+    def copy(self) -> Dict[str, Any]:
+        """与 dict.copy 一致，返回加载了全部值的普通字典"""
+        return self.snapshot()
+
+    def close(self):
+        """删除所有临时文件"""
+        with self._lock:
+            if self._spill_dir is not None:
+                shutil.rmtree(self._spill_dir, ignore_errors=True)
+                self._spill_dir = None
+            self._values = {key: value for key, value in self._values.items()
+                            if not isinstance(value, SpilledValue)}
+
+    def _admit(self, key: str, size: int):
+        """记录常驻值，超出预算时写出最久未访问的值"""
+        self._resident[key] = size
+        self._resident_bytes += size
+        for victim in list(self._resident):
+            if self._resident_bytes <= self.memory_budget:
+                break
+            if victim == key or self._resident[victim] < MIN_SPILL_SIZE:
+                continue
+            victim_size = self._resident.pop(victim)
+            self._resident_bytes -= victim_size
+            if not self._spill(victim, self._values[victim], victim_size):
+                # 不可序列化，保持常驻
+                self._resident[victim] = victim_size
+                self._resident_bytes += victim_size
+
+    def _discard(self, key: str):
+        """移除变量及其临时文件或常驻记录"""
+        value = self._values.pop(key, None)
+        if isinstance(value, SpilledValue):
+            try:
+                os.remove(value.path)
+            except OSError:
+                pass
+        size = self._resident.pop(key, None)
+        if size is not None:
+            self._resident_bytes -= size
+
+    def _spill(self, key: str, value: Any, size: int) -> bool:
+        """把值写入临时文件，无法序列化时返回 False"""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return False
+        path = os.path.join(self._ensure_spill_dir(), uuid.uuid4().hex)
+        with open(path, "wb") as f:
+            f.write(data)
+        # 序列化后的长度比遍历估算更接近真实大小，重新加载时按它计入预算
+        self._values[key] = SpilledValue(path, max(size, len(data)))
+        self.spill_count += 1
+        return True
+
+    def _ensure_spill_dir(self) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="arrange-context-")
+        return self._spill_dir
+
+    def _load(self, key: str, spilled: SpilledValue) -> Any:
+        """从临时文件加载值并重新常驻"""
+        value = load_file(spilled.path)
+        os.remove(spilled.path)
+        self._values[key] = value
+        self._admit(key, spilled.size)
+        return value
@@ -0,0 +1,42 @@
+from typing import Any, Dict, Set
+from config import settings
+import asyncio
+
+
+class EventBus:
+    """进程内的执行事件总线，按执行ID把事件分发给订阅者
+
+    每个订阅者拥有一个有界队列；消费过慢时丢弃最旧的事件，发布方永不阻塞。
+    """
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+    
+    def subscribe(self, execution_id: int) -> asyncio.Queue:
+        """订阅某次执行的事件"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(execution_id, set()).add(queue)
+        return queue
+    
+    def unsubscribe(self, execution_id: int, queue: asyncio.Queue):
+        """取消订阅"""
+        subscribers = self._subscribers.get(execution_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[execution_id]
+    
+    def has_subscribers(self, execution_id: int) -> bool:
+        return execution_id in self._subscribers
+    
+    def publish(self, execution_id: int, event: Dict[str, Any]):
+        """发布事件"""
+        for queue in self._subscribers.get(execution_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+
+event_bus = EventBus(settings.event_queue_size)
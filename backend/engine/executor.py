@@ -1,97 +1,311 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, MutableMapping, Callable, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database import Tool
+from engine.plan import get_plan, tool_key
+from engine.tool_cache import tool_code_cache, run_tool
+from engine.result_cache import tool_result_cache, cache_policy, MISS
+from engine.pools import resolve_kind, run_blocking
+from engine.http import get_http_client
+from engine.scheduler import Scheduler, Frame, LoopRun, ExecutionAborted, DONE
+from engine.events import event_bus
+from engine.log_writer import log_writer, level_value
+from engine.context_store import ContextStore, estimate_size, load_file
+from engine.metrics import workflow_duration, node_duration, executions_in_flight
+from engine.profiling import ExecutionProfiler
+from engine.checkpoint import CheckpointWriter, dump_checkpoint
+from config import settings
+from collections import deque
+import asyncio
+import copy
 import json
+import time
 import traceback
 
+def _as_dict(context: MutableMapping) -> Dict[str, Any]:
+    """循环迭代中的作用域上下文（ChainMap）作为结果返回时转换为普通字典"""
+    return context if isinstance(context, dict) else dict(context)
+
+
+async def load_tools(db: AsyncSession, tool_ids) -> Dict[int, Tool]:
+    """用一次 IN 查询加载一组工具"""
+    if not tool_ids:
+        return {}
+    result = await db.execute(select(Tool).where(Tool.id.in_(tool_ids)))
+    return {tool.id: tool for tool in result.scalars()}
+
+
+def run_code(code: str, context: Dict[str, Any]):
+    """执行代码节点的源码，返回 (result, 执行后的 context)
+
+    模块级函数，可在线程池或进程池中运行；进程池中 context 为副本，需由调用方合并。
+    """
+    exec_globals = {
+        "__builtins__": __builtins__,
+        "context": context,
+        "json": json
+    }
+    exec(code, exec_globals)
+    return exec_globals.get("result", None), exec_globals.get("context")
+
+
 class WorkflowExecutor:
     """工作流执行引擎"""
     
-    def __init__(self, workflow, db: AsyncSession):
+    def __init__(self, workflow, db: Optional[AsyncSession], max_concurrency: Optional[int] = None,
+                 execution_id: Optional[int] = None, tools: Optional[Dict[int, Tool]] = None,
+                 profile: Optional[str] = None, timeout: Optional[float] = None,
+                 checkpoint: Optional[Dict[str, Any]] = None):
         self.workflow = workflow
         self.db = db
-        self.context = {}  # 执行上下文，存储变量
-        self.logs = []
+        self.execution_id = execution_id
+        self.plan = get_plan(workflow)
+        # 单次执行内同时运行的节点上限
+        self.max_concurrency = max_concurrency or settings.max_concurrent_nodes
+        # 工具ID -> 工具，执行开始时一次性加载（批量执行时由调用方传入），执行过程中不再访问数据库
+        self.tools: Dict[int, Tool] = tools or {}
+        self._tools_loaded = tools is not None
+        self.context: MutableMapping = {}  # 执行上下文，存储变量
+        # 只在内存中保留最近的日志，完整日志批量写入 node_logs 表并通过事件总线实时推送
+        self.logs = deque(maxlen=settings.log_buffer_size)
+        self.min_log_level = level_value(settings.log_level)
+        # 每次节点执行的计时记录，写入执行记录的 node_timings 列
+        self.node_timings: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+        # 开启剖析时的 cProfile / tracemalloc 剖析器，结果由调用方写入执行记录
+        self.profiler = ExecutionProfiler(profile, settings.profile_top_n) if profile else None
+        # 执行时限（秒），未指定时使用起始节点配置的 timeout 或 execution_timeout
+        self.timeout = timeout
+        self.cancel_reason: Optional[str] = None  # cancelled / timeout
+        self._task: Optional[asyncio.Task] = None
+        # 恢复执行时的检查点（上下文与顶层调度状态）；执行过程中按间隔保存新的检查点
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = 0
+        self._checkpoints: Optional[CheckpointWriter] = None
+        self._scheduler: Optional[Scheduler] = None
         
     async def execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """执行工作流"""
-        self.context = {**self.workflow.variables, **input_data}
-        self.log("info", f"开始执行工作流: {self.workflow.name}")
-        
-        # 查找起始节点
-        start_node = self._find_start_node()
-        if not start_node:
-            raise ValueError("未找到起始节点")
-        
-        # 从起始节点开始执行
-        result = await self._execute_node(start_node["id"])
+        """执行工作流；开启剖析时整个执行在剖析器下运行"""
+        if self.profiler is None:
+            return await self._execute(input_data)
+        async with self.profiler:
+            return await self._execute(input_data)
+    
+    async def _execute(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self._started = time.perf_counter()
+        status = "failed"
+        executions_in_flight.inc()
+        if self.checkpoint is not None:
+            self.context = self._create_context(self.checkpoint["context"])
+            self.log("info", f"从检查点恢复执行工作流: {self.workflow.name}")
+        else:
+            # 工作流定义在多次执行间共享，变量默认值深拷贝后再放入本次执行的上下文
+            self.context = self._create_context({**copy.deepcopy(self.workflow.variables), **input_data})
+            self.log("info", f"开始执行工作流: {self.workflow.name}")
         
-        self.log("info", "工作流执行完成")
-        return {
-            "output": result,
-            "logs": self.logs,
-            "context": self.context
+        try:
+            if self.checkpoint is not None:
+                await self._restore_spilled(self.checkpoint.get("spilled"))
+            await self._load_tools()
+            # 查找起始节点
+            start_node = self._find_start_node()
+            if not start_node:
+                raise ValueError("未找到起始节点")
+            self._setup_checkpoints(start_node)
+            
+            # 从起始节点开始调度执行，调度在单独的任务中运行，取消和超时只中止调度本身
+            result = await self._run_scheduler(start_node)
+            
+            self.log("info", "工作流执行完成")
+            status = "completed"
+            return {
+                "output": result,
+                "logs": list(self.logs),
+                "context": self._final_context(),
+                "node_timings": self.node_timings
+            }
+        except Exception as e:
+            if isinstance(e, ExecutionAborted):
+                status = e.status
+            # 保存中断时的进度，恢复时从失败的节点继续
+            if self._scheduler is not None:
+                self.save_checkpoint(self._scheduler)
+            raise
+        finally:
+            if self._checkpoints is not None:
+                await self._checkpoints.close(keep=status != "completed")
+                if self._checkpoints.error is not None:
+                    self.log("warning", f"检查点写入失败: {self._checkpoints.error}")
+            if isinstance(self.context, ContextStore):
+                self.context.close()
+            executions_in_flight.dec()
+            workflow_duration.observe(time.perf_counter() - self._started, status)
+    
+    async def _run_scheduler(self, start_node: Dict) -> Any:
+        """运行调度器，到达执行时限或被取消时抛出 ExecutionAborted"""
+        if self.cancel_reason is not None:
+            raise ExecutionAborted(self.cancel_reason, "执行已取消")
+        timeout = self.timeout
+        if timeout is None:
+            timeout = start_node["data"].get("config", {}).get("timeout") or settings.execution_timeout
+        self._scheduler = Scheduler(self, self.max_concurrency)
+        state = self.checkpoint["frame"] if self.checkpoint is not None else None
+        self._task = asyncio.ensure_future(self._scheduler.run(start_node["id"], self.context, state))
+        deadline = asyncio.get_running_loop().call_later(float(timeout), self.cancel, "timeout") if timeout else None
+        try:
+            return await self._task
+        except asyncio.CancelledError:
+            if self.cancel_reason is None:
+                raise
+            if self.cancel_reason == "timeout":
+                raise ExecutionAborted("timeout", f"工作流执行超时 ({float(timeout):g} 秒)") from None
+            raise ExecutionAborted("cancelled", "执行已取消") from None
+        finally:
+            if deadline is not None:
+                deadline.cancel()
+    
+    def _setup_checkpoints(self, start_node: Dict):
+        """按起始节点配置的 checkpoint_interval 或 checkpoint_interval 配置开启检查点"""
+        interval = start_node["data"].get("config", {}).get("checkpoint_interval")
+        if interval is None:
+            interval = settings.checkpoint_interval
+        if self.execution_id is None or not interval:
+            return
+        self.checkpoint_interval = int(interval)
+        self._checkpoints = CheckpointWriter(self.execution_id, self.workflow.updated_at)
+        # 恢复的执行已有检查点，成功完成后同样需要删除
+        self._checkpoints.written = self.checkpoint is not None
+    
+    def save_checkpoint(self, scheduler: Scheduler):
+        """序列化当前上下文与顶层调度状态，在后台写入检查点表"""
+        if self._checkpoints is None or not self.checkpoint_interval or scheduler.root is None:
+            return
+        frame = scheduler.root.checkpoint_state()
+        context, spilled = self.context, {}
+        try:
+            if isinstance(self.context, ContextStore):
+                # 已写出到临时文件的值只保存文件引用，不在事件循环中重新加载
+                context, spilled = self.context.checkpoint_state(self._checkpoints.directory)
+            data = dump_checkpoint({"context": context, "spilled": spilled, "frame": frame})
+        except Exception as e:
+            self.log("warning", f"上下文无法序列化，不再保存检查点: {e}")
+            self.checkpoint_interval = 0
+            return
+        completed = sum(1 for state in frame["states"].values() if state == DONE)
+        self._checkpoints.submit(data, completed, (path for path, _ in spilled.values()))
+    
+    async def _restore_spilled(self, spilled: Optional[Dict[str, Any]]):
+        """恢复检查点中以文件保存的上下文变量：开启写出时直接引用文件，否则在线程中加载"""
+        for key, (path, size) in (spilled or {}).items():
+            if isinstance(self.context, ContextStore):
+                self.context.adopt(key, path, size)
+            else:
+                self.context[key] = await asyncio.to_thread(load_file, path)
+    
+    def cancel(self, reason: str = "cancelled"):
+        """中止执行：取消调度任务及其中运行的节点；尚未开始时在开始调度前中止"""
+        if self.cancel_reason is not None:
+            return
+        self.cancel_reason = reason
+        self.log("warning", "工作流执行超时，正在中止" if reason == "timeout" else "收到取消请求，正在中止")
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+    
+    def record_node(self, node_id: str, status: str, started: float, result: Any = None):
+        """记录一次节点执行的耗时（单调时钟）、状态和输出大小，并计入节点耗时指标
+
+        时间以相对执行开始的毫秒数记录，输出大小为抽样估算值；
+        超过 node_timing_limit 条后只计入指标。
+        """
+        finished = time.perf_counter()
+        node = self._get_node_by_id(node_id)
+        node_type = node["data"]["type"]
+        tool_id = node["data"].get("tool_id") if node_type == "tool" else None
+        node_duration.observe(finished - started, node_type, str(tool_id or ""), status)
+        if len(self.node_timings) >= settings.node_timing_limit:
+            return
+        timing = {
+            "node_id": node_id,
+            "node_type": node_type,
+            "status": status,
+            "start_ms": round((started - self._started) * 1000, 3),
+            "end_ms": round((finished - self._started) * 1000, 3),
+            "duration_ms": round((finished - started) * 1000, 3),
+            "output_size": estimate_size(result) if status == "completed" else 0
         }
+        if tool_id is not None:
+            timing["tool_id"] = tool_id
+        self.node_timings.append(timing)
+    
+    async def _load_tools(self):
+        """用一次 IN 查询加载工作流引用的全部工具"""
+        if self._tools_loaded:
+            return
+        self.tools = await load_tools(self.db, self.plan.tool_ids)
+        # 结束会话上的只读事务，执行期间不占用连接（结束时写日志需要另一个连接）
+        await self.db.commit()
+    
+    def _create_context(self, data: Dict[str, Any]) -> MutableMapping:
+        """创建执行上下文：配置了内存预算时，大的值写入临时文件并在访问时加载"""
+        if settings.context_memory_budget <= 0:
+            return data
+        return ContextStore(
+            data,
+            memory_budget=settings.context_memory_budget,
+            spill_threshold=settings.context_spill_threshold
+        )
+    
+    def _final_context(self) -> Dict[str, Any]:
+        """执行结束时返回的上下文"""
+        if not isinstance(self.context, ContextStore):
+            return self.context
+        if self.context.spill_count:
+            self.log("debug", lambda: f"上下文写出到临时文件 {self.context.spill_count} 次")
+        return self.context.snapshot(trim=settings.context_trim_result)
+    
+    def _executor_kind(self, config: Optional[Dict[str, Any]]) -> str:
+        """节点的执行器类型；CPU 剖析只能统计事件循环线程，线程池节点改为直接运行"""
+        kind = resolve_kind(config)
+        if kind == "thread" and self.profiler is not None and self.profiler.cpu:
+            return "inline"
+        return kind
     
     def _find_start_node(self):
         """查找起始节点"""
-        for node in self.workflow.nodes:
-            if node.get("data", {}).get("type") == "start":
-                return node
-        return None
+        if self.plan.start_node_id is None:
+            return None
+        return self.plan.get_node(self.plan.start_node_id)
     
-    async def _execute_node(self, node_id: str) -> Any:
-        """执行单个节点"""
-        node = self._get_node_by_id(node_id)
-        if not node:
-            raise ValueError(f"节点不存在: {node_id}")
-        
+    async def _execute_node(self, node: Dict, context: MutableMapping) -> Any:
+        """在给定上下文中执行单个节点自身的逻辑（循环节点由调度器展开）"""
         node_type = node["data"]["type"]
-        self.log("info", f"执行节点: {node['data']['label']} (类型: {node_type})")
-        
-        result = None
         
         if node_type == "start":
-            result = await self._execute_start_node(node)
+            return await self._execute_start_node(node, context)
         elif node_type == "end":
-            result = await self._execute_end_node(node)
+            return await self._execute_end_node(node, context)
         elif node_type == "tool":
-            result = await self._execute_tool_node(node)
+            return await self._execute_tool_node(node, context)
         elif node_type == "condition":
-            result = await self._execute_condition_node(node)
-        elif node_type == "loop":
-            result = await self._execute_loop_node(node)
+            return await self._execute_condition_node(node, context)
         elif node_type == "code":
-            result = await self._execute_code_node(node)
+            return await self._execute_code_node(node, context)
         else:
             raise ValueError(f"未知节点类型: {node_type}")
-        
-        # 查找下一个节点
-        next_nodes = self._get_next_nodes(node_id)
-        if next_nodes:
-            # 如果是条件节点，result包含要执行的分支
-            if node_type == "condition" and isinstance(result, dict) and "next_node" in result:
-                next_node_id = result["next_node"]
-                if next_node_id:
-                    return await self._execute_node(next_node_id)
-            else:
-                # 执行第一个下游节点
-                return await self._execute_node(next_nodes[0])
-        
-        return result
     
-    async def _execute_start_node(self, node: Dict) -> Any:
+    async def _execute_start_node(self, node: Dict, context: MutableMapping) -> Any:
         """执行起始节点"""
-        return self.context
+        return _as_dict(context)
     
-    async def _execute_end_node(self, node: Dict) -> Any:
+    async def _execute_end_node(self, node: Dict, context: MutableMapping) -> Any:
         """执行结束节点"""
         config = node["data"].get("config", {})
         output_key = config.get("output_key", "result")
-        return self.context.get(output_key, self.context)
+        if output_key in context:
+            return context[output_key]
+        return _as_dict(context)
     
-    async def _execute_tool_node(self, node: Dict) -> Any:
+    async def _execute_tool_node(self, node: Dict, context: MutableMapping) -> Any:
         """执行工具节点"""
         tool_id = node["data"].get("tool_id")
         config = node["data"].get("config", {})
@@ -99,193 +313,200 @@ class WorkflowExecutor:
         if not tool_id:
             raise ValueError("工具节点未配置工具ID")
         
-        # 获取工具
-        result = await self.db.execute(select(Tool).where(Tool.id == tool_id))
-        tool = result.scalar_one_or_none()
+        # 获取工具（已在执行开始时预加载）
+        tool = self.tools.get(tool_key(tool_id))
         if not tool:
             raise ValueError(f"工具不存在: {tool_id}")
         
-        # 准备输入参数
-        inputs = {}
-        for key, value in config.get("inputs", {}).items():
-            # 支持变量引用 {{variable}}
-            if isinstance(value, str) and value.startswith("{{") and value.endswith("}}"):
-                var_name = value[2:-2].strip()
-                inputs[key] = self.context.get(var_name, value)
-            else:
-                inputs[key] = value
+        # 准备输入参数：支持 {{variable}}、{{resp.items[0].id}} 及字符串插值，模板已在执行计划中预编译
+        inputs = self.plan.get_tool_inputs(node["id"])(context)
+        
+        output_key = config.get("output_key", f"tool_{node['id']}_output")
+        
+        # 纯函数工具：相同代码和输入的结果直接从缓存返回
+        pure, ttl = cache_policy(tool.config)
+        cache_key = tool_result_cache.key(tool, inputs) if pure else None
+        if cache_key is not None:
+            result = await tool_result_cache.get(cache_key)
+            if result is not MISS:
+                context[output_key] = result
+                self.log("success", lambda: f"工具结果命中缓存: {tool.name}", node["id"])
+                return result
         
         # 执行工具代码
         try:
-            # 创建安全的执行环境
-            exec_globals = {
-                "__builtins__": __builtins__,
-                "context": self.context,
-                "inputs": inputs,
-                "json": json
-            }
-            exec(tool.code, exec_globals)
-            
-            # 获取执行结果
-            if "execute" in exec_globals:
-                result = exec_globals["execute"](inputs, self.context)
+            # async 工具直接在事件循环中 await，并注入共享 HTTP 客户端；
+            # 同步工具在工具配置指定的执行器中运行，避免阻塞事件循环
+            compiled = tool_code_cache.get(tool.id, tool.code)
+            kind = self._executor_kind(tool.config)
+            if compiled.is_async:
+                result = await compiled(inputs, context, get_http_client())
+            elif kind == "process":
+                result = await run_blocking(kind, run_tool, tool.id, tool.code, inputs, context)
             else:
-                result = exec_globals.get("result", None)
+                result = await run_blocking(kind, compiled, inputs, context)
+            if cache_key is not None:
+                await tool_result_cache.set(cache_key, tool.id, result, ttl)
             
             # 保存结果到上下文
-            output_key = config.get("output_key", f"tool_{node['id']}_output")
-            self.context[output_key] = result
+            context[output_key] = result
             
-            self.log("success", f"工具执行成功: {tool.name}")
+            self.log("success", lambda: f"工具执行成功: {tool.name}", node["id"])
             return result
             
         except Exception as e:
-            self.log("error", f"工具执行失败: {tool.name}, 错误: {str(e)}")
-            self.log("error", traceback.format_exc())
+            self.log("error", f"工具执行失败: {tool.name}, 错误: {str(e)}", node["id"])
+            self.log("error", traceback.format_exc, node["id"])
             raise
     
-    async def _execute_condition_node(self, node: Dict) -> Dict:
+    async def _execute_condition_node(self, node: Dict, context: MutableMapping) -> Dict:
         """执行条件节点"""
         config = node["data"].get("config", {})
         condition = config.get("condition", "")
         
-        # 评估条件
+        # 评估条件（表达式在执行计划中已预编译，{{变量}} 直接从上下文读取）
         try:
-            # 替换变量
-            eval_condition = condition
-            for key, value in self.context.items():
-                eval_condition = eval_condition.replace(f"{{{{{key}}}}}", str(value))
-            
-            # 执行条件判断
-            result = eval(eval_condition, {"__builtins__": {}}, self.context)
+            result = self.plan.get_condition(node["id"]).evaluate(context)
             
-            # 根据结果选择分支
-            edges = self._get_edges_from_node(node["id"])
-            for edge in edges:
-                handle = edge.get("sourceHandle", "")
-                if (result and handle == "true") or (not result and handle == "false"):
-                    self.log("info", f"条件判断: {condition} = {result}, 选择分支: {handle}")
-                    return {"next_node": edge["target"]}
-            
-            return {"next_node": None}
+            # 根据结果选择分支（分支目标在执行计划中已预先拆分）
+            handle = "true" if result else "false"
+            target = self.plan.condition_targets.get(node["id"], {}).get(handle)
+            if target:
+                self.log("info", lambda: f"条件判断: {condition} = {result}, 选择分支: {handle}", node["id"])
+            return {"next_node": target, "branch": handle}
             
         except Exception as e:
-            self.log("error", f"条件判断失败: {str(e)}")
+            self.log("error", f"条件判断失败: {str(e)}", node["id"])
             raise
     
-    async def _execute_loop_node(self, node: Dict) -> Any:
-        """执行循环节点"""
+    def _begin_loop(self, frame: Frame, node: Dict) -> LoopRun:
+        """开始执行循环节点，返回由调度器逐次推进的循环状态"""
         config = node["data"].get("config", {})
-        loop_type = config.get("loop_type", "for")  # for, while
-        
-        results = []
+        loop = LoopRun(frame, node, config)  # loop_type: for, while
+        if loop.loop_type == "for":
+            items_key = config.get("items_key", "items")
+            # 与逐个遍历的行为一致：字典按键、集合与生成器等任意可迭代对象都先展开为列表，
+            # 迭代序号在检查点恢复后保持稳定
+            loop.items = list(frame.context.get(items_key, []))
+            # 并行模式：迭代并发执行，每次迭代使用独立的写时复制上下文
+            loop.parallel = bool(config.get("parallel", False))
+            loop.max_concurrency = max(1, int(config.get("max_concurrency", settings.loop_max_concurrency)))
+        return loop
+    
+    def _next_iteration(self, loop: LoopRun) -> Optional[Dict[str, Any]]:
+        """返回下一次迭代需要设置的上下文变量，没有更多迭代时返回 None"""
+        config = loop.config
+        context = loop.frame.context
         
-        if loop_type == "for":
+        if loop.loop_type == "for":
             # for循环
-            items_key = config.get("items_key", "items")
-            items = self.context.get(items_key, [])
-            item_var = config.get("item_var", "item")
-            
-            for idx, item in enumerate(items):
-                self.context[item_var] = item
-                self.context["loop_index"] = idx
-                
-                # 执行循环体（下游节点）
-                next_nodes = self._get_next_nodes(node["id"])
-                if next_nodes:
-                    result = await self._execute_node(next_nodes[0])
-                    results.append(result)
+            if loop.iteration >= len(loop.items):
+                return None
             
-            self.log("info", f"for循环执行完成，迭代次数: {len(items)}")
-            
-        elif loop_type == "while":
+        elif loop.loop_type == "while":
             # while循环
-            condition = config.get("condition", "")
             max_iterations = config.get("max_iterations", 100)
-            iteration = 0
+            if loop.iteration >= max_iterations:
+                return None
             
-            while iteration < max_iterations:
-                # 评估条件
-                if not eval(condition, {"__builtins__": {}}, self.context):
-                    break
-                
-                self.context["loop_index"] = iteration
-                
-                # 执行循环体
-                next_nodes = self._get_next_nodes(node["id"])
-                if next_nodes:
-                    result = await self._execute_node(next_nodes[0])
-                    results.append(result)
-                
-                iteration += 1
+            # 评估预编译的循环条件
+            if not self.plan.get_condition(loop.node["id"]).evaluate(context):
+                return None
             
-            self.log("info", f"while循环执行完成，迭代次数: {iteration}")
+        else:
+            return None
         
-        return results
+        variables = self._iteration_variables(loop, loop.iteration)
+        loop.iteration += 1
+        return variables
+    
+    def _iteration_variables(self, loop: LoopRun, index: int) -> Dict[str, Any]:
+        """第 index 次迭代的循环变量（从检查点恢复时按序号重新执行迭代）"""
+        if loop.loop_type == "for":
+            item_var = loop.config.get("item_var", "item")
+            return {item_var: loop.items[index], "loop_index": index}
+        return {"loop_index": index}
+    
+    def _end_loop(self, loop: LoopRun) -> List[Any]:
+        """循环结束，返回每次迭代的结果"""
+        if loop.loop_type == "for":
+            self.log("info", lambda: f"for循环执行完成，迭代次数: {loop.iteration}", loop.node["id"])
+        elif loop.loop_type == "while":
+            self.log("info", lambda: f"while循环执行完成，迭代次数: {loop.iteration}", loop.node["id"])
+        return loop.results
     
-    async def _execute_code_node(self, node: Dict) -> Any:
+    async def _execute_code_node(self, node: Dict, context: MutableMapping) -> Any:
         """执行代码节点"""
         config = node["data"].get("config", {})
         code = config.get("code", "")
         
         try:
-            # 创建执行环境
-            exec_globals = {
-                "__builtins__": __builtins__,
-                "context": self.context,
-                "json": json
-            }
-            
-            # 执行代码
-            exec(code, exec_globals)
-            
-            # 获取结果
-            result = exec_globals.get("result", None)
+            # 在节点配置指定的执行器中执行代码
+            result, new_context = await run_blocking(self._executor_kind(config), run_code, code, context)
             
             # 更新上下文
-            if "context" in exec_globals:
-                self.context.update(exec_globals["context"])
+            if new_context is not None and new_context is not context:
+                context.update(new_context)
             
             output_key = config.get("output_key", f"code_{node['id']}_output")
-            self.context[output_key] = result
+            context[output_key] = result
             
-            self.log("success", "代码节点执行成功")
+            self.log("success", "代码节点执行成功", node["id"])
             return result
             
         except Exception as e:
-            self.log("error", f"代码节点执行失败: {str(e)}")
-            self.log("error", traceback.format_exc())
+            self.log("error", f"代码节点执行失败: {str(e)}", node["id"])
+            self.log("error", traceback.format_exc, node["id"])
             raise
     
     def _get_node_by_id(self, node_id: str) -> Dict:
         """根据ID获取节点"""
-        for node in self.workflow.nodes:
-            if node["id"] == node_id:
-                return node
-        return None
+        return self.plan.get_node(node_id)
     
     def _get_next_nodes(self, node_id: str) -> List[str]:
         """获取下游节点ID列表"""
-        next_nodes = []
-        for edge in self.workflow.edges:
-            if edge["source"] == node_id:
-                next_nodes.append(edge["target"])
-        return next_nodes
+        return self.plan.get_next_nodes(node_id)
     
     def _get_edges_from_node(self, node_id: str) -> List[Dict]:
         """获取从节点出发的所有边"""
-        edges = []
-        for edge in self.workflow.edges:
-            if edge["source"] == node_id:
-                edges.append(edge)
-        return edges
+        return self.plan.get_edges_from(node_id)
+    
+    def emit(self, event_type: str, **data):
+        """向订阅本次执行的客户端推送事件"""
+        if self.execution_id is None or not event_bus.has_subscribers(self.execution_id):
+            return
+        event_bus.publish(self.execution_id, {
+            "type": event_type,
+            "timestamp": str(datetime.now()),
+            **data
+        })
     
-    def log(self, level: str, message: str):
-        """记录日志"""
-        self.logs.append({
+    def log(self, level: str, message: Union[str, Callable[[], str]], node_id: Optional[str] = None):
+        """记录日志
+
+        message 可以是返回字符串的函数：低于最小日志级别时直接返回，不会被调用（不做格式化）。
+        """
+        if level_value(level) < self.min_log_level:
+            return
+        if callable(message):
+            message = message()
+        timestamp = datetime.now()
+        entry = {
             "level": level,
             "message": message,
-            "timestamp": str(datetime.now())
-        })
+            "timestamp": timestamp
+        }
+        if node_id is not None:
+            entry["node_id"] = node_id
+        self.logs.append(entry)
+        self.emit("log", **entry)
+        if self.execution_id is not None:
+            log_writer.add({
+                "execution_id": self.execution_id,
+                "node_id": node_id,
+                "level": level,
+                "message": message,
+                "timestamp": timestamp
+            })
 
 from datetime import datetime
@@ -0,0 +1,51 @@
+from typing import Any, MutableMapping, Optional
+from engine.templates import parse_path, resolve_path
+import re
+
+# {{变量}} 引用；被引号包裹的引用（如 '{{name}}'）按字符串插值处理
+_VAR_PATTERN = re.compile(r"""(['"])\{\{\s*([^{}]+?)\s*\}\}\1|\{\{\s*([^{}]+?)\s*\}\}""")
+
+
+class CompiledExpression:
+    """预编译的条件表达式
+
+    源码在构建执行计划时只解析一次：{{var}} 被改写为对上下文的直接查找
+    （{{resp.items[0].id}} 这类路径改写为预解析路径的取值），
+    之后每次求值只是一次 eval 代码对象的调用，与上下文大小无关。
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.code = None
+        self.error: Optional[SyntaxError] = None
+
+        def lookup(expression: str) -> str:
+            if re.fullmatch(r"\w+", expression):
+                return f"__ctx__[{expression!r}]"
+            return f"__path__(__ctx__, {expression!r}, {parse_path(expression)!r})"
+
+        def replace(match):
+            if match.group(2) is not None:
+                return f"__str__({lookup(match.group(2))})"
+            return lookup(match.group(3))
+
+        try:
+            self.code = compile(_VAR_PATTERN.sub(replace, source or ""), "<condition>", "eval")
+        except SyntaxError as e:
+            # 延迟到求值时再报错，未执行到的分支不影响整个工作流
+            self.error = e
+
+    def evaluate(self, context: MutableMapping) -> Any:
+        """在给定上下文中求值，表达式中的裸变量名同样从上下文读取"""
+        if self.error is not None:
+            raise self.error
+        return eval(
+            self.code,
+            {"__builtins__": {}, "__ctx__": context, "__str__": str, "__path__": resolve_path},
+            context
+        )
+
+
+def compile_expression(source: str) -> CompiledExpression:
+    """编译条件表达式"""
+    return CompiledExpression(source)
@@ -0,0 +1,34 @@
+from typing import Optional
+from config import settings
+import httpx
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取进程内共享的 HTTP 客户端（连接池 + keep-alive）"""
+    global _client
+    if _client is None or _client.is_closed:
+        if settings.http_http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError("启用 HTTP/2 需要安装 httpx[http2]")
+        _client = httpx.AsyncClient(
+            http2=settings.http_http2,
+            timeout=settings.http_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry
+            )
+        )
+    return _client
+
+
+async def close_http_client():
+    """关闭共享的 HTTP 客户端"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
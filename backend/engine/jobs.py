@@ -0,0 +1,210 @@
+from typing import Any, Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update
+from database import async_session_maker, ExecutionLog, ExecutionCheckpoint
+from engine.executor import WorkflowExecutor
+from engine.scheduler import ExecutionAborted
+from engine.events import event_bus
+from engine.log_writer import log_writer
+from engine.workflow_cache import workflow_cache
+from engine.checkpoint import load_resume_state
+from config import settings
+from datetime import datetime
+import asyncio
+
+
+# 本进程中正在执行的工作流：执行ID -> 执行器，用于取消
+active_executions: Dict[int, WorkflowExecutor] = {}
+
+
+def log_execution_error(execution_id: int, message: str):
+    """记录不属于任何节点的执行级错误日志（写入 node_logs，node_id 为空）"""
+    log_writer.add({
+        "execution_id": execution_id,
+        "node_id": None,
+        "level": "error",
+        "message": message,
+        "timestamp": datetime.now()
+    })
+
+
+def finished_event(status: str, completed_at) -> Dict[str, Any]:
+    """执行结束事件"""
+    return {"type": "execution_finished", "status": status, "timestamp": str(completed_at)}
+
+
+def publish_finished(execution_id: int, status: str, completed_at):
+    """通知订阅者执行已结束"""
+    event_bus.publish(execution_id, finished_event(status, completed_at))
+
+
+async def run_workflow(db: AsyncSession, workflow, execution_log: ExecutionLog, resume: bool = False) -> List[dict]:
+    """执行工作流并把结果写入执行日志，执行失败时记录失败状态后重新抛出异常
+
+    被取消或超时的执行记录为 cancelled / timeout 状态；resume 为 True 时从该执行的检查点继续。
+    日志写入 node_logs 表；返回内存中保留的最近日志。
+    """
+    profile = (execution_log.profile or {}).get("mode")
+    executor = WorkflowExecutor(workflow, db, execution_id=execution_log.id, profile=profile,
+                                timeout=execution_log.timeout)
+    if execution_log.status != "running":
+        execution_log.status = "running"
+        await db.commit()
+    
+    active_executions[execution_log.id] = executor
+    try:
+        if resume:
+            executor.checkpoint = await load_resume_state(execution_log.id, workflow)
+        result = await executor.execute(execution_log.input_data or {})
+        
+        # 更新执行日志
+        execution_log.status = "completed"
+        execution_log.output_data = result["output"]
+        execution_log.completed_at = datetime.utcnow()
+        return result["logs"]
+        
+    except Exception as e:
+        execution_log.status = e.status if isinstance(e, ExecutionAborted) else "failed"
+        execution_log.completed_at = datetime.utcnow()
+        log_execution_error(execution_log.id, str(e))
+        raise
+    
+    finally:
+        active_executions.pop(execution_log.id, None)
+        execution_log.node_timings = executor.node_timings
+        if executor.profiler is not None:
+            execution_log.profile = executor.profiler.summary()
+            execution_log.profile_stats = executor.profiler.pstats_bytes()
+        # 状态更新前确保本次执行的日志已写入
+        await log_writer.flush()
+        await db.commit()
+        await db.refresh(execution_log)
+        publish_finished(execution_log.id, execution_log.status, execution_log.completed_at)
+
+
+class JobQueueFull(Exception):
+    """任务队列已满"""
+
+
+class JobQueue:
+    """进程内的异步执行队列
+
+    /api/execution/run 以 async 模式提交时只写入执行日志并入队，
+    由固定数量的 worker 协程依次取出执行；队列长度有上限，满时拒绝提交。
+    """
+    
+    def __init__(self, workers: int, max_size: int):
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+        self._tasks: List[asyncio.Task] = []
+    
+    @property
+    def depth(self) -> int:
+        """排队中的任务数"""
+        return self.queue.qsize()
+    
+    def full(self) -> bool:
+        return self.queue.full()
+    
+    def submit(self, execution_id: int, resume: bool = False):
+        """提交执行任务（resume 为 True 时从检查点恢复），队列已满时抛出 JobQueueFull"""
+        try:
+            self.queue.put_nowait((execution_id, resume))
+        except asyncio.QueueFull:
+            raise JobQueueFull()
+    
+    async def recover(self) -> Dict[str, int]:
+        """处理上次运行遗留的执行记录，在启动 worker 之前调用
+
+        队列只存在于内存中，重启后 queued / running 的记录不会再被执行：
+        仍在排队的记录（包括批量执行中尚未开始的）按提交顺序重新入队，已有检查点的按恢复执行入队，
+        超出队列容量的标记为失败；运行中的记录标记为失败，保存过检查点的可以通过 resume 接口继续。
+        """
+        async with async_session_maker() as db:
+            result = await db.execute(select(ExecutionLog.id).where(ExecutionLog.status == "running"))
+            interrupted = [row[0] for row in result]
+            result = await db.execute(
+                select(ExecutionLog.id).where(ExecutionLog.status == "queued").order_by(ExecutionLog.id)
+            )
+            queued = [row[0] for row in result]
+            capacity = self.queue.maxsize - self.queue.qsize() if self.queue.maxsize > 0 else len(queued)
+            queued, rejected = queued[:capacity], queued[capacity:]
+            result = await db.execute(
+                select(ExecutionCheckpoint.execution_id).where(ExecutionCheckpoint.execution_id.in_(queued))
+            )
+            resumable = {row[0] for row in result}
+
+            failures = ((interrupted, "服务重启，执行中断"), (rejected, "服务重启后执行队列已满"))
+            completed_at = datetime.utcnow()
+            for ids, _ in failures:
+                if ids:
+                    await db.execute(
+                        update(ExecutionLog)
+                        .where(ExecutionLog.id.in_(ids))
+                        .values(status="failed", completed_at=completed_at)
+                    )
+            await db.commit()
+
+        # 状态提交后再入队和写日志，避免与 worker 抢占写锁
+        for execution_id in queued:
+            self.submit(execution_id, execution_id in resumable)
+        for ids, message in failures:
+            for execution_id in ids:
+                log_execution_error(execution_id, message)
+        await log_writer.flush()
+        return {"requeued": len(queued), "failed": len(interrupted) + len(rejected)}
+    
+    async def start(self):
+        """启动 worker"""
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self):
+        """停止 worker，未执行的任务保持 queued 状态，下次启动时由 recover 重新入队"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+    
+    async def _worker(self):
+        while True:
+            execution_id, resume = await self.queue.get()
+            try:
+                await self._run(execution_id, resume)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # 失败状态已由 run_workflow 写入执行日志
+                pass
+            finally:
+                self.queue.task_done()
+    
+    async def _run(self, execution_id: int, resume: bool = False):
+        async with async_session_maker() as db:
+            # 只执行仍在排队的记录，排队期间被取消的直接跳过
+            result = await db.execute(
+                update(ExecutionLog)
+                .where(ExecutionLog.id == execution_id, ExecutionLog.status == "queued")
+                .values(status="running")
+            )
+            await db.commit()
+            if result.rowcount == 0:
+                return
+            result = await db.execute(select(ExecutionLog).where(ExecutionLog.id == execution_id))
+            execution_log = result.scalar_one_or_none()
+            if not execution_log:
+                return
+            workflow = await workflow_cache.get(db, execution_log.workflow_id)
+            if not workflow:
+                execution_log.status = "failed"
+                execution_log.completed_at = datetime.utcnow()
+                log_execution_error(execution_id, "工作流不存在")
+                await log_writer.flush()
+                await db.commit()
+                publish_finished(execution_id, execution_log.status, execution_log.completed_at)
+                return
+            await run_workflow(db, workflow, execution_log, resume)
+
+
+job_queue = JobQueue(settings.job_workers, settings.job_queue_max_size)
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from database import engine, NodeLog
+from config import settings
+import asyncio
+
+# 日志级别，低于配置的最小级别的日志直接丢弃
+LOG_LEVELS = {
+    "debug": 10,
+    "info": 20,
+    "success": 25,
+    "warning": 30,
+    "error": 40,
+}
+
+
+def level_value(level: str) -> int:
+    """日志级别对应的数值，未知级别按 info 处理"""
+    return LOG_LEVELS.get(level, LOG_LEVELS["info"])
+
+
+class LogWriter:
+    """批量写入节点日志
+
+    日志先进入内存缓冲区，累计到 batch_size 条或每隔 flush_interval 秒
+    以一条多行 INSERT 写入 node_logs 表，使用独立连接，不占用执行所用的会话。
+    """
+    
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.Task] = None
+    
+    def add(self, entry: Dict[str, Any]):
+        """加入一条日志，缓冲区满时在后台触发写入"""
+        self._buffer.append(entry)
+        if len(self._buffer) >= self.batch_size and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+    
+    async def flush(self):
+        """把缓冲区中的日志写入数据库"""
+        async with self._lock:
+            while self._buffer:
+                batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+                try:
+                    async with engine.begin() as conn:
+                        await conn.execute(insert(NodeLog), batch)
+                except Exception:
+                    # 日志写入失败不影响执行本身，丢弃该批次
+                    pass
+    
+    async def start(self):
+        """启动定时写入"""
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._run_timer())
+    
+    async def stop(self):
+        """停止定时写入并写出剩余日志"""
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, return_exceptions=True)
+            self._timer = None
+        await self.flush()
+    
+    async def _run_timer(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+log_writer = LogWriter(settings.log_batch_size, settings.log_flush_interval)
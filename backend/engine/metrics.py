@@ -0,0 +1,139 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import bisect
+import math
+
+# 节点耗时的默认分桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 工作流整体耗时的分桶（秒）
+WORKFLOW_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """按标签分组的累计分桶直方图"""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # 标签值 -> (各分桶计数, 总和, 总数)
+        self._series: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labelvalues, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, le)} {count}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labelvalues)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labelvalues)} {count}"
+
+
+class Gauge:
+    """当前值指标，可以直接增减，也可以在采集时通过回调读取"""
+
+    def __init__(self, name: str, documentation: str, callback: Optional[Callable[[], float]] = None):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def render(self) -> Iterable[str]:
+        value = self.callback() if self.callback is not None else self.value
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {_format_value(value)}"
+
+
+class CacheCollector:
+    """采集时读取缓存的 stats()，输出命中数、未命中数、命中率和条目数"""
+
+    def __init__(self, name: str, documentation: str, stats: Callable[[], Dict[str, int]]):
+        self.name = name
+        self.documentation = documentation
+        self.stats = stats
+
+    def render(self) -> Iterable[str]:
+        stats = self.stats()
+        hits, misses = stats.get("hits", 0), stats.get("misses", 0)
+        lookups = hits + misses
+        for suffix, kind, value in (
+            ("hits_total", "counter", hits),
+            ("misses_total", "counter", misses),
+            ("hit_ratio", "gauge", hits / lookups if lookups else 0),
+            ("size", "gauge", stats.get("size", 0)),
+        ):
+            yield f"# HELP {self.name}_{suffix} {self.documentation}"
+            yield f"# TYPE {self.name}_{suffix} {kind}"
+            yield f"{self.name}_{suffix} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    """进程内指标注册表，以 Prometheus 文本格式输出"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+workflow_duration = registry.register(Histogram(
+    "workflow_execution_duration_seconds", "工作流执行耗时", ("status",), WORKFLOW_BUCKETS
+))
+node_duration = registry.register(Histogram(
+    "node_execution_duration_seconds", "节点执行耗时", ("node_type", "tool_id", "status")
+))
+executions_in_flight = registry.register(Gauge(
+    "workflow_executions_in_flight", "正在执行的工作流数量"
+))
@@ -0,0 +1,186 @@
+from typing import Dict, Any, List, Optional, Set, Tuple, Callable, MutableMapping
+from collections import OrderedDict
+from engine.expressions import CompiledExpression, compile_expression
+from engine.templates import compile_inputs
+
+# 最多缓存的执行计划数量
+MAX_CACHED_PLANS = 256
+
+
+def tool_key(tool_id: Any) -> Optional[int]:
+    """节点配置中的工具ID（可能是数字字符串）转换为整数，无效时返回 None"""
+    try:
+        return int(tool_id)
+    except (TypeError, ValueError):
+        return None
+
+
+class ExecutionScope:
+    """以某个节点为根的可达子图
+
+    记录子图内每个节点需要等待的入边数量（汇合节点等待所有前驱），
+    以及 DFS 中发现的回边（回边不计入等待数量，被激活时重新进入目标节点）。
+    """
+
+    def __init__(self, plan: "ExecutionPlan", root_id: str):
+        self.root_id = root_id
+        self.reachable: Set[str] = set()
+        self.back_edges: Set[Tuple[str, str]] = set()
+        self.in_degree: Dict[str, int] = {}
+
+        # 迭代式 DFS，避免长链导致递归过深
+        on_stack = {root_id}
+        visited = {root_id}
+        stack = [(root_id, iter(plan.get_next_nodes(root_id)))]
+        while stack:
+            source, targets = stack[-1]
+            target = next(targets, None)
+            if target is None:
+                stack.pop()
+                on_stack.discard(source)
+                continue
+            if target in on_stack:
+                self.back_edges.add((source, target))
+                continue
+            self.in_degree[target] = self.in_degree.get(target, 0) + 1
+            if target not in visited:
+                visited.add(target)
+                self.reachable.add(target)
+                on_stack.add(target)
+                stack.append((target, iter(plan.get_next_nodes(target))))
+
+
+class ExecutionPlan:
+    """编译后的工作流执行计划
+
+    在工作流的每个版本上只构建一次，保存节点索引、邻接表以及条件节点的分支目标，
+    执行时无需再线性扫描 nodes / edges。
+    """
+
+    def __init__(self, workflow):
+        self.workflow_id = workflow.id
+        self.version = workflow.updated_at
+
+        nodes = workflow.nodes or []
+        edges = workflow.edges or []
+
+        # 节点ID -> 节点
+        self.nodes: Dict[str, Dict] = {node["id"]: node for node in nodes}
+        # 节点ID -> 下游节点ID列表（保持边的原始顺序）
+        self.next_nodes: Dict[str, List[str]] = {}
+        # 节点ID -> 出边列表
+        self.edges_from: Dict[str, List[Dict]] = {}
+        for edge in edges:
+            self.next_nodes.setdefault(edge["source"], []).append(edge["target"])
+            self.edges_from.setdefault(edge["source"], []).append(edge)
+
+        # 条件节点ID -> {"true": 目标节点, "false": 目标节点}
+        self.condition_targets: Dict[str, Dict[str, Optional[str]]] = {}
+        for node in nodes:
+            if node.get("data", {}).get("type") != "condition":
+                continue
+            targets = {"true": None, "false": None}
+            for edge in self.edges_from.get(node["id"], []):
+                handle = edge.get("sourceHandle", "")
+                if handle in targets and targets[handle] is None:
+                    targets[handle] = edge["target"]
+            self.condition_targets[node["id"]] = targets
+
+        # 节点ID -> 预编译的工具输入取值函数；以及工作流引用的全部工具ID，执行开始时一次性加载
+        self.tool_inputs: Dict[str, Callable[[MutableMapping], Dict[str, Any]]] = {}
+        self.tool_ids: Set[int] = set()
+        for node in nodes:
+            data = node.get("data", {})
+            if data.get("type") == "tool":
+                self.tool_inputs[node["id"]] = compile_inputs((data.get("config") or {}).get("inputs", {}))
+                tool_id = tool_key(data.get("tool_id"))
+                if tool_id is not None:
+                    self.tool_ids.add(tool_id)
+
+        # 节点ID -> 预编译的条件表达式（条件节点与 while 循环）
+        self.conditions: Dict[str, CompiledExpression] = {}
+        for node in nodes:
+            data = node.get("data", {})
+            config = data.get("config") or {}
+            if data.get("type") == "condition" or (
+                data.get("type") == "loop" and config.get("loop_type") == "while"
+            ):
+                self.conditions[node["id"]] = compile_expression(config.get("condition", ""))
+
+        # 起始节点
+        self.start_node_id: Optional[str] = None
+        for node in nodes:
+            if node.get("data", {}).get("type") == "start":
+                self.start_node_id = node["id"]
+                break
+
+        # 根节点ID -> 子图信息，按需构建
+        self._scopes: Dict[str, ExecutionScope] = {}
+
+    def get_node(self, node_id: str) -> Optional[Dict]:
+        """根据ID获取节点"""
+        return self.nodes.get(node_id)
+
+    def get_next_nodes(self, node_id: str) -> List[str]:
+        """获取下游节点ID列表"""
+        return self.next_nodes.get(node_id, [])
+
+    def get_edges_from(self, node_id: str) -> List[Dict]:
+        """获取从节点出发的所有边"""
+        return self.edges_from.get(node_id, [])
+
+    def get_condition(self, node_id: str) -> CompiledExpression:
+        """获取节点预编译的条件表达式"""
+        condition = self.conditions.get(node_id)
+        if condition is None:
+            node = self.nodes.get(node_id) or {}
+            config = node.get("data", {}).get("config") or {}
+            condition = compile_expression(config.get("condition", ""))
+            self.conditions[node_id] = condition
+        return condition
+
+    def get_tool_inputs(self, node_id: str) -> Callable[[MutableMapping], Dict[str, Any]]:
+        """获取工具节点预编译的输入取值函数"""
+        resolver = self.tool_inputs.get(node_id)
+        if resolver is None:
+            node = self.nodes.get(node_id) or {}
+            config = node.get("data", {}).get("config") or {}
+            resolver = compile_inputs(config.get("inputs", {}))
+            self.tool_inputs[node_id] = resolver
+        return resolver
+
+    def get_scope(self, root_id: str) -> ExecutionScope:
+        """获取以指定节点为根的子图信息"""
+        scope = self._scopes.get(root_id)
+        if scope is None:
+            scope = ExecutionScope(self, root_id)
+            self._scopes[root_id] = scope
+        return scope
+
+
+_plan_cache: "OrderedDict[tuple, ExecutionPlan]" = OrderedDict()
+
+
+def get_plan(workflow) -> ExecutionPlan:
+    """获取工作流的执行计划，按 (工作流ID, updated_at) 缓存"""
+    if workflow.id is None:
+        # 未持久化的工作流没有稳定的版本号，不缓存
+        return ExecutionPlan(workflow)
+
+    key = (workflow.id, workflow.updated_at)
+    plan = _plan_cache.get(key)
+    if plan is not None:
+        _plan_cache.move_to_end(key)
+        return plan
+
+    plan = ExecutionPlan(workflow)
+    _plan_cache[key] = plan
+    if len(_plan_cache) > MAX_CACHED_PLANS:
+        _plan_cache.popitem(last=False)
+    return plan
+
+
+def invalidate_plan(workflow_id: int):
+    """移除某个工作流所有版本的执行计划"""
+    for key in [key for key in _plan_cache if key[0] == workflow_id]:
+        del _plan_cache[key]
@@ -0,0 +1,61 @@
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from config import settings
+import asyncio
+import functools
+import multiprocessing
+
+# 支持的执行器类型
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool(kind: str) -> Executor:
+    """按需创建线程池或进程池"""
+    global _thread_pool, _process_pool
+    if kind == "process":
+        if _process_pool is None:
+            # 使用 spawn 避免在已有事件循环和线程的进程中 fork
+            _process_pool = ProcessPoolExecutor(
+                max_workers=settings.process_pool_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=settings.thread_pool_workers,
+            thread_name_prefix="node-executor"
+        )
+    return _thread_pool
+
+
+def resolve_kind(config: Optional[Dict[str, Any]]) -> str:
+    """从工具或节点配置中读取执行器类型"""
+    kind = (config or {}).get("executor") or settings.default_node_executor
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(f"未知执行器类型: {kind}")
+    return kind
+
+
+async def run_blocking(kind: str, func: Callable, *args) -> Any:
+    """在指定执行器中运行同步函数，保持事件循环不被阻塞
+
+    process 执行器要求 func 为模块级函数，参数和返回值均可被 pickle。
+    """
+    if kind == "inline":
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_pool(kind), functools.partial(func, *args))
+
+
+def shutdown_pools():
+    """关闭执行器池"""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import tracemalloc
+
+# 支持的剖析模式
+PROFILE_MODES = ("cpu", "memory", "all")
+
+# cProfile 同一时间只能有一个实例生效，剖析执行逐个进行
+_profile_lock = asyncio.Lock()
+
+
+class ExecutionProfiler:
+    """单次执行的 CPU / 内存剖析
+
+    cpu 模式使用 cProfile，统计的是事件循环线程在执行期间的全部调用，
+    同一时间运行的其他执行也会计入；memory 模式使用 tracemalloc 记录分配位置和峰值。
+    """
+
+    def __init__(self, mode: str, top_n: int):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"未知剖析模式: {mode}")
+        self.mode = mode
+        self.top_n = top_n
+        self.cpu = mode in ("cpu", "all")
+        self.memory = mode in ("memory", "all")
+        self._profiler: Optional[cProfile.Profile] = None
+        self._stats: Optional[pstats.Stats] = None
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak = 0
+        self._started_tracing = False
+
+    async def __aenter__(self):
+        await _profile_lock.acquire()
+        if self.memory:
+            # 已由其他工具开启时沿用，结束时不关闭
+            self._started_tracing = not tracemalloc.is_tracing()
+            if self._started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.cpu:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        try:
+            if self._profiler is not None:
+                self._profiler.disable()
+            # 先取内存快照，整理剖析数据本身的分配不计入
+            if self.memory:
+                self._snapshot = tracemalloc.take_snapshot().filter_traces((
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, cProfile.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                ))
+                self._peak = tracemalloc.get_traced_memory()[1]
+                if self._started_tracing:
+                    tracemalloc.stop()
+            if self._profiler is not None:
+                self._stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        finally:
+            _profile_lock.release()
+
+    def summary(self) -> Dict[str, Any]:
+        """剖析结果摘要：按累计耗时排序的函数表和分配最多的代码位置"""
+        summary: Dict[str, Any] = {"mode": self.mode}
+        if self._stats is not None:
+            summary["total_time"] = round(self._stats.total_tt, 6)
+            summary["functions"] = self._functions()
+        if self._snapshot is not None:
+            summary["peak_memory"] = self._peak
+            summary["allocations"] = self._allocations()
+        return summary
+
+    def pstats_bytes(self) -> Optional[bytes]:
+        """pstats 格式的原始数据，与 Stats.dump_stats 写出的文件内容相同"""
+        if self._stats is None:
+            return None
+        return marshal.dumps(self._stats.stats)
+
+    def _functions(self) -> List[Dict[str, Any]]:
+        rows = []
+        for (filename, line, name), (primitive, calls, tottime, cumtime, _) in self._stats.stats.items():
+            rows.append({
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "primitive_calls": primitive,
+                "tottime": round(tottime, 6),
+                "cumtime": round(cumtime, 6),
+            })
+        rows.sort(key=lambda row: row["cumtime"], reverse=True)
+        return rows[:self.top_n]
+
+    def _allocations(self) -> List[Dict[str, Any]]:
+        return [
+            {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+             "size": stat.size, "count": stat.count}
+            for stat in self._snapshot.statistics("lineno")[:self.top_n]
+        ]
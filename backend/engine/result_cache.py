@@ -0,0 +1,204 @@
+from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from config import settings
+from engine.tool_cache import code_hash
+import asyncio
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import time
+
+# 缓存未命中
+MISS = object()
+
+
+def inputs_hash(inputs: Dict[str, Any]) -> Optional[str]:
+    """输入参数的规范化哈希（键排序后的 JSON），无法序列化为 JSON 时返回 None"""
+    try:
+        data = json.dumps(inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def cache_policy(config: Optional[Dict[str, Any]]) -> Tuple[bool, Optional[float]]:
+    """从工具配置中读取 (是否为纯函数工具, 缓存有效期秒数)
+
+    工具配置 {"pure": true, "cache_ttl": 300} 声明结果只取决于输入参数，
+    cache_ttl 省略时缓存直到被淘汰。
+    """
+    config = config or {}
+    if not config.get("pure"):
+        return False, None
+    ttl = config.get("cache_ttl")
+    return True, float(ttl) if ttl is not None else None
+
+
+class ToolResultCache:
+    """纯函数工具的结果缓存
+
+    第一层为进程内 LRU，按条目数和总字节数淘汰；配置了 tool_result_cache_db 时，
+    第二层为 SQLite 文件，可在重启和多个进程之间共享。
+    结果以 pickle 字节保存，每次命中都返回新的副本，下游修改不会影响缓存。
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int, db_path: str = "", db_max_rows: int = 0):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self.db_max_rows = db_max_rows
+        self.hits = 0
+        self.misses = 0
+        # key -> (工具ID, 过期时间, 结果字节)
+        self._entries: "OrderedDict[str, Tuple[int, Optional[float], bytes]]" = OrderedDict()
+        self._bytes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._db_writes = 0
+
+    def key(self, tool, inputs: Dict[str, Any]) -> Optional[str]:
+        """缓存键：工具ID + 代码哈希 + 输入哈希；输入无法规范化时不缓存"""
+        digest = inputs_hash(inputs)
+        if digest is None:
+            return None
+        return f"{tool.id}:{code_hash(tool.code)}:{digest}"
+
+    async def get(self, key: str) -> Any:
+        """查询缓存，未命中时返回 MISS"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            _, expires_at, data = entry
+            if expires_at is None or expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return pickle.loads(data)
+            self._remove(key)
+
+        if self.db_path:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None:
+                tool_id, expires_at, data = row
+                self._put(key, tool_id, expires_at, data)
+                self.hits += 1
+                return pickle.loads(data)
+
+        self.misses += 1
+        return MISS
+
+    async def set(self, key: str, tool_id: int, value: Any, ttl: Optional[float] = None):
+        """写入缓存，结果无法 pickle 时忽略"""
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        self._put(key, tool_id, expires_at, data)
+        if self.db_path:
+            await asyncio.to_thread(self._db_set, key, tool_id, expires_at, data)
+
+    async def invalidate(self, tool_id: int):
+        """移除某个工具的全部缓存结果"""
+        for key in [key for key, entry in self._entries.items() if entry[0] == tool_id]:
+            self._remove(key)
+        if self.db_path:
+            await asyncio.to_thread(self._db_execute, "DELETE FROM tool_results WHERE tool_id = ?", (tool_id,))
+
+    def close(self):
+        """关闭 SQLite 连接"""
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        return {
+            "size": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def _put(self, key: str, tool_id: int, expires_at: Optional[float], data: bytes):
+        """写入内存层并按条目数/字节数淘汰最久未使用的结果"""
+        if len(data) > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = (tool_id, expires_at, data)
+        self._bytes += len(data)
+        while len(self._entries) > self.maxsize or self._bytes > self.max_bytes:
+            _, (_, _, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tool_results ("
+                "key TEXT PRIMARY KEY, tool_id INTEGER NOT NULL, expires_at REAL, "
+                "accessed_at REAL NOT NULL, value BLOB NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_tool_results_tool_id ON tool_results (tool_id)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_tool_results_accessed_at ON tool_results (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def _db_execute(self, sql: str, params: tuple = ()):
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute(sql, params)
+            conn.commit()
+
+    def _db_get(self, key: str) -> Optional[Tuple[int, Optional[float], bytes]]:
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT tool_id, expires_at, value FROM tool_results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] is not None and row[1] <= now:
+                conn.execute("DELETE FROM tool_results WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE tool_results SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            return row
+
+    def _db_set(self, key: str, tool_id: int, expires_at: Optional[float], data: bytes):
+        now = time.time()
+        with self._db_lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool_id, expires_at, accessed_at, value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, tool_id, expires_at, now, data)
+            )
+            self._db_writes += 1
+            # 每写入一定次数清理一次过期和超出上限的记录
+            if self._db_writes % 100 == 0:
+                conn.execute("DELETE FROM tool_results WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+                if self.db_max_rows > 0:
+                    conn.execute(
+                        "DELETE FROM tool_results WHERE key IN ("
+                        "SELECT key FROM tool_results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                        (self.db_max_rows,)
+                    )
+            conn.commit()
+
+
+tool_result_cache = ToolResultCache(
+    settings.tool_result_cache_size,
+    settings.tool_result_cache_max_bytes,
+    settings.tool_result_cache_db,
+    settings.tool_result_cache_db_max_rows
+)
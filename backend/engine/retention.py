@@ -0,0 +1,127 @@
+from typing import List, Optional
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, null
+from database import engine, ExecutionLog, NodeLog
+from engine.checkpoint import delete_checkpoints, remove_checkpoint_files
+from config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 尚未结束的执行不参与清理
+ACTIVE_STATUSES = ("queued", "running")
+
+# 压缩时保留的日志级别
+KEPT_LOG_LEVELS = ("warning", "error")
+
+
+class RetentionJob:
+    """执行记录保留策略
+
+    定时按批处理过期的执行记录，每批一个短事务，避免长时间锁表：
+    - 超过 compact_after_days 的记录清空输入输出数据，只保留警告和错误日志
+    - 超过 retention_days 的记录连同节点日志一起删除
+    天数为 0 表示不执行对应的清理。
+    """
+
+    def __init__(self, retention_days: int, compact_after_days: int, batch_size: int, interval: float):
+        self.retention_days = retention_days
+        self.compact_after_days = compact_after_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """启动定时清理"""
+        if self._task is None and (self.retention_days > 0 or self.compact_after_days > 0):
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """停止定时清理"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run_once(self) -> dict:
+        """执行一轮清理，返回压缩和删除的记录数"""
+        now = datetime.utcnow()
+        compacted = deleted = 0
+        # 先删除，避免压缩即将被删除的记录
+        if self.retention_days > 0:
+            cutoff = now - timedelta(days=self.retention_days)
+            while True:
+                count = await self._delete_batch(cutoff)
+                deleted += count
+                if count < self.batch_size:
+                    break
+                await asyncio.sleep(0)
+        if self.compact_after_days > 0:
+            cutoff = now - timedelta(days=self.compact_after_days)
+            while True:
+                count = await self._compact_batch(cutoff, now)
+                compacted += count
+                if count < self.batch_size:
+                    break
+                await asyncio.sleep(0)
+        return {"compacted": compacted, "deleted": deleted}
+
+    async def _select_batch(self, conn, cutoff: datetime, uncompacted: bool) -> List[int]:
+        query = (
+            select(ExecutionLog.id)
+            .where(ExecutionLog.started_at < cutoff, ExecutionLog.status.notin_(ACTIVE_STATUSES))
+            .order_by(ExecutionLog.started_at)
+            .limit(self.batch_size)
+        )
+        if uncompacted:
+            query = query.where(ExecutionLog.compacted_at.is_(None))
+        result = await conn.execute(query)
+        return [row[0] for row in result]
+
+    async def _compact_batch(self, cutoff: datetime, now: datetime) -> int:
+        async with engine.begin() as conn:
+            ids = await self._select_batch(conn, cutoff, uncompacted=True)
+            if not ids:
+                return 0
+            await conn.execute(
+                update(ExecutionLog)
+                .where(ExecutionLog.id.in_(ids))
+                .values(input_data=null(), output_data=null(), logs=[], profile_stats=null(), compacted_at=now)
+            )
+            await conn.execute(
+                delete(NodeLog).where(NodeLog.execution_id.in_(ids), NodeLog.level.notin_(KEPT_LOG_LEVELS))
+            )
+            # 检查点含有完整的上下文，压缩后不再支持恢复
+            await delete_checkpoints(conn, ids)
+        remove_checkpoint_files(ids)
+        return len(ids)
+
+    async def _delete_batch(self, cutoff: datetime) -> int:
+        async with engine.begin() as conn:
+            ids = await self._select_batch(conn, cutoff, uncompacted=False)
+            if not ids:
+                return 0
+            await conn.execute(delete(NodeLog).where(NodeLog.execution_id.in_(ids)))
+            await delete_checkpoints(conn, ids)
+            await conn.execute(delete(ExecutionLog).where(ExecutionLog.id.in_(ids)))
+        remove_checkpoint_files(ids)
+        return len(ids)
+
+    async def _run(self):
+        while True:
+            try:
+                result = await self.run_once()
+                if result["compacted"] or result["deleted"]:
+                    logger.info("执行记录清理: 压缩 %(compacted)d 条，删除 %(deleted)d 条", result)
+            except Exception:
+                logger.exception("执行记录清理失败")
+            await asyncio.sleep(self.interval)
+
+
+retention_job = RetentionJob(
+    settings.execution_retention_days,
+    settings.execution_compact_after_days,
+    settings.retention_batch_size,
+    settings.retention_interval
+)
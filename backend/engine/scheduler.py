@@ -0,0 +1,359 @@
+from typing import Dict, Any, List, Optional, Tuple, MutableMapping
+from collections import deque, ChainMap
+import asyncio
+import time
+
+# 节点状态
+PENDING = "pending"
+READY = "ready"
+RUNNING = "running"
+DONE = "done"
+SKIPPED = "skipped"
+
+
+class ExecutionAborted(Exception):
+    """执行被中止：status 为 cancelled（主动取消）或 timeout（节点或整个执行超时）"""
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Frame:
+    """一次子图执行的调度状态：顶层流程，或循环体的一次迭代
+
+    记录每个节点剩余等待的入边数、是否有入边被激活、节点状态，
+    以及尚未完成（就绪或运行中）的节点数量。帧内节点读写 context。
+    """
+
+    def __init__(self, info, context: MutableMapping, loop: Optional["LoopRun"] = None, index: int = 0):
+        self.info = info
+        self.context = context
+        self.loop = loop  # 所属的循环，顶层帧为 None
+        self.index = index  # 在循环结果中的位置
+        self.pending = dict(info.in_degree)
+        self.activated = set()
+        self.states: Dict[str, str] = {}
+        self.outstanding = 0
+        self.result = None  # 最后一个到达终点的节点结果
+        self.loops: Dict[str, "LoopRun"] = {}  # 帧内运行中的循环
+        self.saved_loops: Dict[str, Dict[str, Any]] = {}  # 检查点中尚未恢复的循环进度
+
+    def arrive(self, node_id: str, active: bool) -> str:
+        """一条入边到达节点，返回 waiting / ready / skipped"""
+        if active:
+            self.activated.add(node_id)
+        remaining = self.pending.get(node_id, 1) - 1
+        self.pending[node_id] = remaining
+        if remaining > 0:
+            return "waiting"
+        return "ready" if node_id in self.activated else "skipped"
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """帧的调度状态：已完成或跳过的节点、剩余入边计数、运行中循环的进度，以及需要（重新）执行的节点
+
+        就绪和运行中的节点都作为待执行节点保存，恢复时重新执行；
+        运行中的循环恢复时跳过已完成的迭代，只重新执行未完成的迭代。
+        """
+        return {
+            "pending": dict(self.pending),
+            "activated": set(self.activated),
+            "states": {node_id: state for node_id, state in self.states.items() if state in (DONE, SKIPPED)},
+            "ready": [node_id for node_id, state in self.states.items() if state in (READY, RUNNING)],
+            "result": self.result,
+            "loops": {node_id: loop.checkpoint_state() for node_id, loop in self.loops.items()},
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """从检查点恢复调度状态（待执行节点由调度器重新入队）"""
+        self.pending = dict(state["pending"])
+        self.activated = set(state["activated"])
+        self.states = dict(state["states"])
+        self.result = state["result"]
+        self.saved_loops = dict(state.get("loops", {}))
+
+    def reset(self, node_ids):
+        """重置节点的等待状态（回边重新进入时使用）"""
+        for node_id in node_ids:
+            if node_id in self.info.in_degree:
+                self.pending[node_id] = self.info.in_degree[node_id]
+            self.activated.discard(node_id)
+            self.states.pop(node_id, None)
+
+
+class LoopRun:
+    """运行中的循环节点：逐次创建迭代帧并收集每次迭代的结果"""
+
+    def __init__(self, frame: Frame, node: Dict, config: Dict[str, Any]):
+        self.frame = frame  # 循环节点所在的帧
+        self.node = node
+        self.config = config
+        self.loop_type = config.get("loop_type", "for")
+        self.items: List[Any] = []
+        self.parallel = False
+        self.max_concurrency = 1
+        self.iteration = 0
+        self.active = 0  # 运行中的迭代帧数量
+        self.exhausted = False
+        self.results: List[Any] = []
+        self.completed = set()  # 已完成的迭代序号
+        self.retry: deque = deque()  # 从检查点恢复后需要重新执行的迭代序号
+        self.started = 0.0  # 循环节点的开始时间（单调时钟）
+
+    def checkpoint_state(self) -> Dict[str, Any]:
+        """循环进度：已开始的迭代数、已完成的迭代及其结果"""
+        return {"iteration": self.iteration, "results": list(self.results), "completed": set(self.completed)}
+
+    def restore(self, state: Dict[str, Any]):
+        """从检查点恢复进度，保存时未完成的迭代按序号重新执行"""
+        self.iteration = state["iteration"]
+        self.results = list(state["results"])
+        self.completed = set(state["completed"])
+        self.retry = deque(index for index in range(len(self.results)) if index not in self.completed)
+
+
+class Scheduler:
+    """迭代式工作流调度器
+
+    使用就绪队列驱动节点状态机，代替逐节点递归：长链和大量循环迭代都在固定的栈深度内完成。
+    就绪节点以 asyncio 任务并发运行（受 max_concurrency 限制），
+    节点开始与结束统一经过 _start / _finish，是计时、超时等钩子的唯一入口；
+    调度被取消或节点超时时，仍在运行的节点任务一并取消。
+    """
+
+    def __init__(self, executor, max_concurrency: int):
+        self.executor = executor
+        self.plan = executor.plan
+        self.max_concurrency = max_concurrency
+        self.ready: deque = deque()
+        # 任务 -> (帧, 节点ID, 开始时间)；开始时间随任务保存，回边重入同一节点时各次分别计时
+        self.running: Dict[asyncio.Task, Tuple[Frame, str, float]] = {}
+        self.root: Optional[Frame] = None
+        self.completed = 0  # 顶层帧中已完成的节点数与顶层循环的迭代数，用于按间隔保存检查点
+
+    async def run(self, start_id: str, context: MutableMapping, state: Optional[Dict[str, Any]] = None) -> Any:
+        """从起始节点开始调度，返回最后一个到达终点的节点结果
+
+        给出检查点中的调度状态时，从中断处继续：跳过已完成的节点，重新执行保存时待执行的节点。
+        """
+        root = self.root = Frame(self.plan.get_scope(start_id), context)
+        if state is None:
+            self._enqueue(root, start_id)
+        else:
+            root.restore(state)
+            for node_id in state["ready"]:
+                self._enqueue(root, node_id)
+        try:
+            while self.ready or self.running:
+                while self.ready and len(self.running) < self.max_concurrency:
+                    frame, node_id = self.ready.popleft()
+                    self._start(frame, node_id)
+                if not self.running:
+                    continue
+                done, _ = await asyncio.wait(self.running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    frame, node_id, started = self.running.pop(task)
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        status = e.status if isinstance(e, ExecutionAborted) else "failed"
+                        self.executor.record_node(node_id, status, started)
+                        self.executor.emit("node_failed", node_id=node_id, error=str(e))
+                        raise
+                    self._finish(frame, node_id, result, started)
+        except (asyncio.CancelledError, ExecutionAborted):
+            # 取消或超时时中止仍在运行的节点
+            for task, (_, node_id, started) in self.running.items():
+                task.cancel()
+                self.executor.record_node(node_id, "cancelled", started)
+            raise
+        finally:
+            # 任一节点失败后不再启动新节点，等待已在运行的分支结束
+            if self.running:
+                await asyncio.wait(self.running)
+                # 取出这些分支的异常，避免 "exception was never retrieved" 警告
+                for task in self.running:
+                    if not task.cancelled():
+                        task.exception()
+            self.running.clear()
+        return root.result
+
+    def _enqueue(self, frame: Frame, node_id: str):
+        """节点进入就绪队列"""
+        frame.states[node_id] = READY
+        frame.outstanding += 1
+        self.ready.append((frame, node_id))
+
+    def _start(self, frame: Frame, node_id: str):
+        """开始执行节点：循环节点由调度器展开，其余节点作为任务运行"""
+        node = self.executor._get_node_by_id(node_id)
+        if not node:
+            raise ValueError(f"节点不存在: {node_id}")
+        frame.states[node_id] = RUNNING
+        started = time.perf_counter()
+        self.executor.log("info", lambda: f"执行节点: {node['data']['label']} (类型: {node['data']['type']})", node_id)
+        self.executor.emit("node_started", node_id=node_id, node_type=node["data"]["type"])
+
+        if node["data"]["type"] == "loop":
+            loop = frame.loops[node_id] = self.executor._begin_loop(frame, node)
+            loop.started = started
+            saved = frame.saved_loops.pop(node_id, None)
+            if saved is not None:
+                loop.restore(saved)
+            self._advance_loop(loop)
+            return
+        coro = self.executor._execute_node(node, frame.context)
+        timeout = node["data"].get("config", {}).get("timeout")
+        if timeout:
+            coro = self._with_timeout(coro, float(timeout), node)
+        task = asyncio.ensure_future(coro)
+        self.running[task] = (frame, node_id, started)
+
+    async def _with_timeout(self, coro, timeout: float, node: Dict) -> Any:
+        """节点配置了 timeout（秒）时限制其运行时间
+
+        超时通过取消实现：async 工具和 HTTP 请求会立即中止，线程池或进程池中的同步代码
+        无法被打断，只是不再等待其结果；直接在事件循环中运行的代码无法超时。
+        """
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            raise ExecutionAborted("timeout", f"节点执行超时: {node['data']['label']} ({timeout:g} 秒)")
+
+    def _finish(self, frame: Frame, node_id: str, result: Any, started: float):
+        """节点完成：向下游传播，并在帧内所有节点完成时结束该帧"""
+        frame.states[node_id] = DONE
+        node = self.executor._get_node_by_id(node_id)
+        self.executor.record_node(node_id, "completed", started, result)
+        self.executor.emit("node_finished", node_id=node_id, node_type=node["data"]["type"])
+        edges = self.plan.get_edges_from(node_id)
+        ready, waiting = self._propagate(frame, node_id, edges, self._active_edges(node, edges, result))
+        if not ready and not waiting:
+            frame.result = result
+        for next_id in ready:
+            self._enqueue(frame, next_id)
+
+        if frame is self.root:
+            self._progress()
+
+        frame.outstanding -= 1
+        if frame.outstanding == 0 and frame.loop is not None:
+            loop = frame.loop
+            loop.results[frame.index] = frame.result
+            loop.completed.add(frame.index)
+            loop.active -= 1
+            # 顶层循环的每次迭代也计入检查点间隔，长循环中断后从未完成的迭代继续
+            if loop.frame is self.root:
+                self._progress()
+            self._advance_loop(loop)
+
+    def _progress(self):
+        """顶层节点或顶层循环的一次迭代完成，按间隔保存检查点"""
+        self.completed += 1
+        interval = self.executor.checkpoint_interval
+        if interval and self.completed % interval == 0:
+            self.executor.save_checkpoint(self)
+
+    def _active_edges(self, node: Dict, edges: List[Dict], result: Any) -> List[Dict]:
+        """确定被激活的出边
+
+        条件节点只激活选中的分支；循环节点的下游是循环体，已在循环内执行，不再向后传播。
+        """
+        node_type = node["data"]["type"]
+        if node_type == "condition" and isinstance(result, dict) and "next_node" in result:
+            handle = result.get("branch")
+            chosen = next(
+                (edge for edge in edges
+                 if edge["target"] == result["next_node"] and edge.get("sourceHandle", "") == handle),
+                None
+            )
+            return [chosen] if chosen else []
+        if node_type == "loop":
+            return []
+        return edges
+
+    def _propagate(self, frame: Frame, node_id: str, edges: List[Dict], active_edges: List[Dict]):
+        """沿出边传播激活/跳过状态
+
+        返回 (所有前驱都已完成、可以执行的下游节点, 是否有被激活的下游节点仍在等待其他前驱)
+        """
+        ready = []
+        skipped = []
+        waiting = False
+        active_ids = {id(edge) for edge in active_edges}
+        for edge in edges:
+            target = edge["target"]
+            active = id(edge) in active_ids
+            if (node_id, target) in frame.info.back_edges:
+                # 回边：重新进入目标节点，重置其下游的等待状态
+                if active:
+                    frame.reset(self.plan.get_scope(target).reachable | {target})
+                    ready.append(target)
+                continue
+            state = frame.arrive(target, active)
+            if state == "ready":
+                ready.append(target)
+            elif state == "skipped":
+                skipped.append(target)
+            elif active:
+                waiting = True
+
+        # 所有入边都未被激活的节点被跳过，并继续向下游传播跳过状态
+        while skipped:
+            skipped_id = skipped.pop()
+            frame.states[skipped_id] = SKIPPED
+            for edge in self.plan.get_edges_from(skipped_id):
+                if (skipped_id, edge["target"]) in frame.info.back_edges:
+                    continue
+                state = frame.arrive(edge["target"], False)
+                if state == "ready":
+                    ready.append(edge["target"])
+                elif state == "skipped":
+                    skipped.append(edge["target"])
+        return ready, waiting
+
+    def _advance_loop(self, loop: LoopRun):
+        """启动循环的后续迭代；所有迭代完成后完成循环节点
+
+        顺序循环同一时间只运行一个迭代帧，并直接在外层上下文中设置循环变量；
+        并行循环最多同时运行 max_concurrency 个迭代帧，每个迭代使用 ChainMap
+        作为写时复制的作用域上下文，结果按输入顺序收集。
+        从检查点恢复的循环先重新执行保存时未完成的迭代。
+        """
+        loop_id = loop.node["id"]
+        edges = self.plan.get_edges_from(loop_id)
+        limit = loop.max_concurrency if loop.parallel else 1
+        while (loop.retry or not loop.exhausted) and loop.active < limit:
+            if loop.retry:
+                index = loop.retry.popleft()
+                variables = self.executor._iteration_variables(loop, index)
+            else:
+                index = len(loop.results)
+                variables = self.executor._next_iteration(loop)
+                if variables is None:
+                    loop.exhausted = True
+                    break
+            if loop.parallel:
+                context = ChainMap(variables, loop.frame.context)
+            else:
+                context = loop.frame.context
+                context.update(variables)
+            if not edges:
+                continue
+
+            frame = Frame(self.plan.get_scope(loop_id), context, loop, index)
+            if index == len(loop.results):
+                loop.results.append(None)
+            ready, _ = self._propagate(frame, loop_id, edges, edges)
+            for next_id in ready:
+                self._enqueue(frame, next_id)
+            if frame.outstanding:
+                # 迭代帧内的节点完成后再继续推进
+                loop.active += 1
+            else:
+                loop.results[frame.index] = frame.result
+                loop.completed.add(frame.index)
+
+        if loop.exhausted and not loop.retry and loop.active == 0:
+            loop.frame.loops.pop(loop_id, None)
+            self._finish(loop.frame, loop_id, self.executor._end_loop(loop), loop.started)
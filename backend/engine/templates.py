@@ -0,0 +1,104 @@
+from typing import Any, Callable, Dict, MutableMapping, Tuple, Union
+from collections.abc import Mapping
+import re
+
+# {{ path }} 引用，path 支持点号与下标，如 resp.items[0].id
+_TEMPLATE_PATTERN = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+_PATH_TOKEN = re.compile(r"([^.\[\]]+)|\[\s*(-?\d+)\s*\]|\[\s*['\"]([^'\"]*)['\"]\s*\]")
+
+Path = Tuple[Union[str, int], ...]
+
+_MISSING = object()
+_MISSING_TEXT = object()
+
+
+def parse_path(expression: str) -> Path:
+    """把 resp.items[0].id 解析为 ("resp", "items", 0, "id")"""
+    steps = []
+    for name, index, quoted in _PATH_TOKEN.findall(expression):
+        if name:
+            name = name.strip()
+            steps.append(int(name) if name.isdigit() else name)
+        elif index:
+            steps.append(int(index))
+        else:
+            steps.append(quoted)
+    return tuple(steps)
+
+
+def resolve_path(context: MutableMapping, expression: str, path: Path, default: Any = _MISSING) -> Any:
+    """按路径从上下文中取值，路径不存在时返回 default（未提供时抛出 KeyError）"""
+    # 上下文中恰好存在同名键（如 "a.b"）时优先使用
+    if expression in context:
+        return context[expression]
+    value: Any = context
+    try:
+        for step in path:
+            if isinstance(step, int) or isinstance(value, Mapping):
+                value = value[step]
+            else:
+                value = getattr(value, step)
+    except (KeyError, IndexError, TypeError, AttributeError):
+        if default is _MISSING:
+            raise KeyError(expression)
+        return default
+    return value
+
+
+def compile_template(value: Any) -> Callable[[MutableMapping], Any]:
+    """把输入配置编译为取值函数
+
+    - 整个字符串是 "{{path}}" 时返回原始值（保留类型），变量不存在时返回模板字符串本身
+    - 字符串中嵌入 {{path}} 时按字符串插值，变量不存在的占位符保持原样
+    - dict / list 递归编译，其他值原样返回
+    """
+    if isinstance(value, dict):
+        compiled = {key: compile_template(item) for key, item in value.items()}
+        return lambda context: {key: fn(context) for key, fn in compiled.items()}
+    if isinstance(value, list):
+        compiled_items = [compile_template(item) for item in value]
+        return lambda context: [fn(context) for fn in compiled_items]
+    if not isinstance(value, str) or "{{" not in value:
+        return lambda context: value
+
+    matches = list(_TEMPLATE_PATTERN.finditer(value))
+    if not matches:
+        return lambda context: value
+
+    # 整个字符串就是一个变量引用
+    if len(matches) == 1 and matches[0].span() == (0, len(value)):
+        expression = matches[0].group(1)
+        if re.fullmatch(r"[\w]+", expression):
+            return lambda context: context.get(expression, value)
+        path = parse_path(expression)
+        return lambda context: resolve_path(context, expression, path, value)
+
+    # 字符串插值：预先切分为常量片段与变量引用
+    parts = []
+    position = 0
+    for match in matches:
+        if match.start() > position:
+            parts.append((value[position:match.start()], None, None))
+        expression = match.group(1)
+        parts.append((match.group(0), expression, parse_path(expression)))
+        position = match.end()
+    if position < len(value):
+        parts.append((value[position:], None, None))
+
+    def interpolate(context: MutableMapping) -> str:
+        pieces = []
+        for text, expression, path in parts:
+            if expression is None:
+                pieces.append(text)
+            else:
+                resolved = resolve_path(context, expression, path, _MISSING_TEXT)
+                pieces.append(text if resolved is _MISSING_TEXT else str(resolved))
+        return "".join(pieces)
+
+    return interpolate
+
+
+def compile_inputs(inputs: Dict[str, Any]) -> Callable[[MutableMapping], Dict[str, Any]]:
+    """编译工具节点的输入配置，返回 context -> inputs 的函数"""
+    compiled = {key: compile_template(value) for key, value in (inputs or {}).items()}
+    return lambda context: {key: fn(context) for key, fn in compiled.items()}
@@ -0,0 +1,113 @@
+from typing import Dict, Any
+from collections import OrderedDict
+import hashlib
+import inspect
+import json
+import threading
+import types
+
+# 最多缓存的已编译工具数量
+MAX_CACHED_TOOLS = 512
+
+
+def code_hash(code: str) -> str:
+    """计算工具代码的内容哈希"""
+    return hashlib.sha256((code or "").encode("utf-8")).hexdigest()
+
+
+class CompiledTool:
+    """已编译的工具代码
+
+    源码只编译一次；每次调用都在新的全局命名空间中执行编译好的代码对象，
+    模块级代码和辅助函数看到的都是本次调用的 context / inputs，调用之间不共享状态。
+    execute 可以是 async 函数，此时调用返回协程，由调用方 await。
+    """
+
+    def __init__(self, tool_id: int, code: str):
+        self.tool_id = tool_id
+        self.code = compile(code or "", f"<tool:{tool_id}>", "exec")
+        # 源码中定义的 execute 是否为 async 函数（无需执行即可从常量中判断）
+        self.is_async = any(
+            isinstance(const, types.CodeType)
+            and const.co_name == "execute"
+            and const.co_flags & inspect.CO_COROUTINE
+            for const in self.code.co_consts
+        )
+
+    def __call__(self, inputs: Dict[str, Any], context: Dict[str, Any], http=None) -> Any:
+        """执行工具并返回结果，http 为注入工具全局变量的共享 HTTP 客户端"""
+        exec_globals = {
+            "__builtins__": __builtins__,
+            "context": context,
+            "inputs": inputs,
+            "json": json,
+            "http": http
+        }
+        exec(self.code, exec_globals)
+
+        execute = exec_globals.get("execute")
+        if callable(execute):
+            return execute(inputs, context)
+        return exec_globals.get("result", None)
+
+
+class ToolCodeCache:
+    """进程级的已编译工具代码 LRU 缓存，按 (工具ID, 代码哈希) 索引"""
+
+    def __init__(self, maxsize: int = MAX_CACHED_TOOLS):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, CompiledTool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, tool_id: int, code: str) -> CompiledTool:
+        """获取已编译的工具，未命中时编译并放入缓存"""
+        key = (tool_id, code_hash(code))
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        compiled = CompiledTool(tool_id, code)
+        with self._lock:
+            # 同一工具只保留最新版本的代码
+            for stale in [k for k in self._entries if k[0] == tool_id]:
+                del self._entries[stale]
+            self._entries[key] = compiled
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def invalidate(self, tool_id: int):
+        """移除某个工具的缓存"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == tool_id]:
+                del self._entries[key]
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+tool_code_cache = ToolCodeCache()
+
+
+def run_tool(tool_id: int, code: str, inputs: Dict[str, Any], context: Dict[str, Any]) -> Any:
+    """编译（或从缓存获取）并执行工具代码
+
+    模块级函数，可直接提交到进程池；每个子进程维护自己的编译缓存。
+    """
+    return tool_code_cache.get(tool_id, code)(inputs, context)
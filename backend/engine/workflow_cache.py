@@ -0,0 +1,91 @@
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from database import Workflow
+from engine.plan import get_plan, invalidate_plan
+from config import settings
+
+
+class WorkflowDefinition:
+    """从数据库加载后的工作流定义快照，与会话无关，可在多次执行间共享（只读）"""
+
+    def __init__(self, workflow: Workflow):
+        self.id: int = workflow.id
+        self.name: str = workflow.name
+        self.description: Optional[str] = workflow.description
+        self.nodes: List[Dict[str, Any]] = workflow.nodes or []
+        self.edges: List[Dict[str, Any]] = workflow.edges or []
+        self.variables: Dict[str, Any] = workflow.variables or {}
+        self.updated_at: Optional[datetime] = workflow.updated_at
+
+
+class WorkflowCache:
+    """进程内的工作流定义缓存，按工作流ID索引，记录 updated_at 作为版本
+
+    本进程内的更新和删除通过 invalidate 失效；多进程部署时开启 verify，
+    每次命中前只查询 updated_at 一列确认版本未变，不读取和解析 nodes / edges。
+    """
+
+    def __init__(self, maxsize: int, verify: bool = False):
+        self.maxsize = maxsize
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, WorkflowDefinition]" = OrderedDict()
+        # 工作流ID -> 失效次数；读取期间被失效（并发更新或删除）的结果不写入缓存
+        self._generations: Dict[int, int] = {}
+
+    async def get(self, db: AsyncSession, workflow_id: int) -> Optional[WorkflowDefinition]:
+        """获取工作流定义，不存在时返回 None"""
+        definition = self._entries.get(workflow_id)
+        if definition is not None and self.verify:
+            result = await db.execute(select(Workflow.updated_at).where(Workflow.id == workflow_id))
+            version = result.first()
+            if version is None or version[0] != definition.updated_at:
+                self.invalidate(workflow_id)
+                definition = None
+        if definition is not None:
+            self._entries.move_to_end(workflow_id)
+            self.hits += 1
+            return definition
+
+        self.misses += 1
+        generation = self._generations.get(workflow_id, 0)
+        result = await db.execute(select(Workflow).where(Workflow.id == workflow_id))
+        workflow = result.scalar_one_or_none()
+        if workflow is None:
+            return None
+        definition = WorkflowDefinition(workflow)
+        if self._generations.get(workflow_id, 0) != generation:
+            # 读到的可能是更新前的版本，本次照常使用，但不缓存
+            return definition
+        self._entries[workflow_id] = definition
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        # 预先编译执行计划，后续命中时直接复用
+        get_plan(definition)
+        return definition
+
+    def invalidate(self, workflow_id: int):
+        """移除工作流定义及其执行计划"""
+        self._entries.pop(workflow_id, None)
+        self._generations[workflow_id] = self._generations.get(workflow_id, 0) + 1
+        invalidate_plan(workflow_id)
+
+    def clear(self):
+        """清空缓存"""
+        for workflow_id in list(self._entries):
+            self.invalidate(workflow_id)
+
+    def stats(self) -> Dict[str, int]:
+        """缓存命中统计"""
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+workflow_cache = WorkflowCache(settings.workflow_cache_size, settings.workflow_cache_verify)
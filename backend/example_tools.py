@@ -24,10 +24,10 @@ async def create_example_tools():
                     {"name": "result", "type": "object", "description": "响应数据"}
                 ]
             },
-            "code": """def execute(inputs, context):
-    import httpx
+            "code": """async def execute(inputs, context):
+    # http 为引擎注入的共享连接池客户端（httpx.AsyncClient）
     url = inputs.get('url')
-    response = httpx.get(url)
+    response = await http.get(url)
     return response.json()"""
         },
         {
@@ -40,11 +40,10 @@ async def create_example_tools():
                     {"name": "data", "type": "object", "required": True}
                 ]
             },
-            "code": """def execute(inputs, context):
-    import httpx
+            "code": """async def execute(inputs, context):
     url = inputs.get('url')
     data = inputs.get('data', {})
-    response = httpx.post(url, json=data)
+    response = await http.post(url, json=data)
     return response.json()"""
         },
         {
@@ -135,11 +134,12 @@ async def create_example_tools():
                     {"name": "seconds", "type": "number", "required": True}
                 ]
             },
-            "code": """def execute(inputs, context):
-    import time
+            "code": """async def execute(inputs, context):
+    import asyncio
     seconds = float(inputs.get('seconds', 1))
-    time.sleep(seconds)
-    return f"等待了{seconds}秒""""
+    await asyncio.sleep(seconds)
+    return f"等待了{seconds}秒"
+"""
         },
         {
             "name": "生成随机数",
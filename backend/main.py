@@ -1,7 +1,21 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from routers import tools, workflows, execution
 from database import init_db
+from engine.pools import shutdown_pools
+from engine.http import close_http_client
+from engine.jobs import job_queue
+from engine.log_writer import log_writer
+from engine.result_cache import tool_result_cache
+from engine.retention import retention_job
+from engine.tool_cache import tool_code_cache
+from engine.workflow_cache import workflow_cache
+from engine.metrics import registry, Gauge, CacheCollector
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="API编排引擎", version="1.0.0")
 
@@ -12,6 +26,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-After-Id", "X-Next-Before-Id"],
 )
 
 # 注册路由
@@ -19,14 +34,41 @@ app.include_router(tools.router, prefix="/api/tools", tags=["工具管理"])
 app.include_router(workflows.router, prefix="/api/workflows", tags=["工作流管理"])
 app.include_router(execution.router, prefix="/api/execution", tags=["执行引擎"])
 
+# 采集时读取的指标
+registry.register(Gauge("job_queue_depth", "异步执行队列中排队的任务数", lambda: job_queue.depth))
+registry.register(CacheCollector("tool_code_cache", "工具代码编译缓存", tool_code_cache.stats))
+registry.register(CacheCollector("tool_result_cache", "纯工具结果缓存", tool_result_cache.stats))
+registry.register(CacheCollector("workflow_cache", "工作流定义缓存", workflow_cache.stats))
+
 @app.on_event("startup")
 async def startup():
     await init_db()
+    await log_writer.start()
+    if settings.job_recover_on_startup:
+        recovered = await job_queue.recover()
+        if recovered["requeued"] or recovered["failed"]:
+            logger.info("恢复遗留的执行记录: 重新入队 %(requeued)d 条，标记失败 %(failed)d 条", recovered)
+    await job_queue.start()
+    await retention_job.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await retention_job.stop()
+    await job_queue.stop()
+    await log_writer.stop()
+    shutdown_pools()
+    await close_http_client()
+    tool_result_cache.close()
 
 @app.get("/")
 async def root():
     return {"message": "API编排引擎运行中"}
 
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus 文本格式的运行指标"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -34,6 +34,16 @@ class ToolResponse(BaseModel):
     config: Dict[str, Any]
     created_at: datetime
 
+class ToolSummary(BaseModel):
+    """工具列表项，config / code 只在 fields 参数中指定时返回"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    category: Optional[str] = None
+    created_at: datetime
+    config: Optional[Dict[str, Any]] = None
+    code: Optional[str] = None
+
 class NodeData(BaseModel):
     type: NodeType
     label: str
@@ -70,15 +80,53 @@ class WorkflowResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class WorkflowSummary(BaseModel):
+    """工作流列表项，nodes / edges / variables 只在 fields 参数中指定时返回"""
+    id: int
+    name: str
+    description: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    nodes: Optional[List[Dict[str, Any]]] = None
+    edges: Optional[List[Dict[str, Any]]] = None
+    variables: Optional[Dict[str, Any]] = None
+
 class ExecutionRequest(BaseModel):
     workflow_id: int
     input_data: Dict[str, Any] = Field(default_factory=dict)
+    # sync: 执行完成后返回结果；async: 入队后立即返回执行ID，通过 /logs/{id} 查询进度
+    mode: Literal["sync", "async"] = "sync"
+    # 剖析本次执行：cpu 使用 cProfile，memory 使用 tracemalloc，all 同时开启
+    profile: Optional[Literal["cpu", "memory", "all"]] = None
+    # 执行时限（秒），覆盖起始节点配置的 timeout 与默认的 execution_timeout
+    timeout: Optional[float] = Field(None, gt=0)
+
+class ResumeRequest(BaseModel):
+    mode: Literal["sync", "async"] = "sync"
+    # 恢复后的执行时限（秒），不指定时沿用原执行的设置
+    timeout: Optional[float] = Field(None, gt=0)
+
+class BatchExecutionRequest(BaseModel):
+    workflow_id: int
+    inputs: List[Dict[str, Any]]
+    # 同时执行的输入数，默认使用 batch_concurrency 配置
+    concurrency: Optional[int] = Field(None, ge=1)
+
+class ExecutionSummary(BaseModel):
+    """执行历史列表项，不含输入输出数据和日志"""
+    id: int
+    workflow_id: int
+    status: str
+    started_at: datetime
+    completed_at: Optional[datetime] = None
 
 class ExecutionResponse(BaseModel):
     id: int
     workflow_id: int
     status: str
-    output_data: Optional[Dict[str, Any]] = None
+    output_data: Optional[Any] = None
     logs: List[Dict[str, Any]]
+    node_timings: Optional[List[Dict[str, Any]]] = None
+    profile: Optional[Dict[str, Any]] = None
     started_at: datetime
     completed_at: Optional[datetime] = None
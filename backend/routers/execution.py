@@ -1,61 +1,362 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from database import get_db, Workflow, Tool, ExecutionLog
-from models import ExecutionRequest, ExecutionResponse
-from engine.executor import WorkflowExecutor
+from sqlalchemy import select, update, or_, and_
+from database import get_db, async_session_maker, ExecutionLog, NodeLog, ExecutionCheckpoint
+from models import ExecutionRequest, ExecutionResponse, ExecutionSummary, BatchExecutionRequest, ResumeRequest
+from engine.jobs import job_queue, run_workflow, JobQueueFull, active_executions, finished_event, publish_finished
+from engine.scheduler import ExecutionAborted
+from engine.events import event_bus
+from engine.log_writer import LOG_LEVELS, level_value
+from engine.workflow_cache import workflow_cache
+from engine.executor import load_tools
+from engine.plan import get_plan
+from engine.batch import BatchRun
+from config import settings
+from pydantic import ValidationError
+from routers.listing import set_next_cursor, NEXT_BEFORE_CURSOR_HEADER
+from typing import List, Optional
 from datetime import datetime
+import asyncio
+import json
 
 router = APIRouter()
 
+# 已结束的执行状态
+FINISHED_STATUSES = ("completed", "failed", "cancelled", "timeout")
+# 可以从检查点恢复的执行状态
+RESUMABLE_STATUSES = ("failed", "cancelled", "timeout")
+
+# 事件流空闲时发送心跳的间隔（秒）
+SSE_KEEPALIVE_SECONDS = 15
+
+
+def _sse(event: dict) -> str:
+    """格式化为 Server-Sent Events 消息"""
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    return f"event: {event['type']}\ndata: {data}\n\n"
+
+@router.get("/", response_model=List[ExecutionSummary])
+async def list_executions(
+    response: Response,
+    workflow_id: Optional[int] = None,
+    status: Optional[str] = None,
+    started_after: Optional[datetime] = Query(None, description="开始时间下限（含）"),
+    started_before: Optional[datetime] = Query(None, description="开始时间上限（不含）"),
+    before_id: Optional[int] = Query(None, description="上一页最后一条执行记录的ID"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db)
+):
+    """按开始时间倒序分页查询执行历史，下一页游标在 X-Next-Before-Id 响应头中
+
+    按工作流或状态过滤时分别使用 (workflow_id, started_at) 与 (status, started_at) 索引。
+    """
+    columns = [ExecutionLog.id, ExecutionLog.workflow_id, ExecutionLog.status,
+               ExecutionLog.started_at, ExecutionLog.completed_at]
+    query = select(*columns).order_by(ExecutionLog.started_at.desc(), ExecutionLog.id.desc()).limit(limit)
+    if workflow_id is not None:
+        query = query.where(ExecutionLog.workflow_id == workflow_id)
+    if status is not None:
+        query = query.where(ExecutionLog.status == status)
+    if started_after is not None:
+        query = query.where(ExecutionLog.started_at >= started_after)
+    if started_before is not None:
+        query = query.where(ExecutionLog.started_at < started_before)
+    if before_id is not None:
+        result = await db.execute(select(ExecutionLog.started_at).where(ExecutionLog.id == before_id))
+        cursor = result.scalar_one_or_none()
+        if cursor is None:
+            raise HTTPException(status_code=400, detail="无效的分页游标")
+        query = query.where(or_(
+            ExecutionLog.started_at < cursor,
+            and_(ExecutionLog.started_at == cursor, ExecutionLog.id < before_id)
+        ))
+    result = await db.execute(query)
+    rows = result.mappings().all()
+    set_next_cursor(response, rows, limit, NEXT_BEFORE_CURSOR_HEADER)
+    return [dict(row) for row in rows]
+
 @router.post("/run", response_model=ExecutionResponse)
 async def execute_workflow(request: ExecutionRequest, db: AsyncSession = Depends(get_db)):
     """执行工作流"""
     # 获取工作流
-    result = await db.execute(select(Workflow).where(Workflow.id == request.workflow_id))
-    workflow = result.scalar_one_or_none()
+    workflow = await workflow_cache.get(db, request.workflow_id)
     if not workflow:
         raise HTTPException(status_code=404, detail="工作流不存在")
     
+    if request.mode == "async" and job_queue.full():
+        raise HTTPException(status_code=429, detail="执行队列已满，请稍后重试")
+    
     # 创建执行日志
     execution_log = ExecutionLog(
         workflow_id=request.workflow_id,
-        status="running",
+        status="queued" if request.mode == "async" else "running",
         input_data=request.input_data,
-        logs=[]
+        logs=[],
+        profile={"mode": request.profile} if request.profile else None,
+        timeout=request.timeout
     )
     db.add(execution_log)
     await db.commit()
     await db.refresh(execution_log)
+    return await _dispatch(db, workflow, execution_log, request.mode)
+
+async def _dispatch(db: AsyncSession, workflow, execution_log: ExecutionLog, mode: str, resume: bool = False):
+    """同步执行并返回结果，或提交到执行队列后立即返回"""
+    if mode == "async":
+        # 入队后立即返回，由 worker 执行
+        try:
+            job_queue.submit(execution_log.id, resume)
+        except JobQueueFull:
+            execution_log.status = "failed"
+            execution_log.logs = [{"level": "error", "message": "执行队列已满"}]
+            execution_log.completed_at = datetime.utcnow()
+            await db.commit()
+            raise HTTPException(status_code=429, detail="执行队列已满，请稍后重试")
+        return execution_log
     
     try:
-        # 执行工作流
-        executor = WorkflowExecutor(workflow, db)
-        result = await executor.execute(request.input_data)
-        
-        # 更新执行日志
-        execution_log.status = "completed"
-        execution_log.output_data = result["output"]
-        execution_log.logs = result["logs"]
-        execution_log.completed_at = datetime.utcnow()
-        
+        logs = await run_workflow(db, workflow, execution_log, resume)
+    except ExecutionAborted as e:
+        status_code = 504 if e.status == "timeout" else 409
+        raise HTTPException(status_code=status_code, detail=f"工作流执行中止: {str(e)}")
     except Exception as e:
-        execution_log.status = "failed"
-        execution_log.logs = [{"level": "error", "message": str(e)}]
-        execution_log.completed_at = datetime.utcnow()
         raise HTTPException(status_code=500, detail=f"工作流执行失败: {str(e)}")
     
-    finally:
-        await db.commit()
-        await db.refresh(execution_log)
+    # 同步执行直接返回内存中保留的最近日志，完整日志可通过 /logs/{id} 分页查询
+    response = ExecutionResponse.model_validate(execution_log, from_attributes=True)
+    response.logs = logs
+    return response
+
+async def _read_ndjson(request: Request):
+    """逐行解析 NDJSON 请求体，每行一个 input_data 对象"""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if buffer.strip():
+        yield json.loads(buffer)
+
+
+@router.post("/batch")
+async def execute_batch(
+    request: Request,
+    workflow_id: Optional[int] = Query(None, description="NDJSON 请求体时通过查询参数指定"),
+    concurrency: Optional[int] = Query(None, ge=1, description="NDJSON 请求体时通过查询参数指定"),
+    db: AsyncSession = Depends(get_db)
+):
+    """用同一工作流批量执行多组输入，以 NDJSON 流按完成顺序返回每个输入的结果
+
+    请求体可以是 JSON（{"workflow_id": 1, "inputs": [...], "concurrency": 8}），
+    也可以是 NDJSON（Content-Type: application/x-ndjson，每行一个 input_data，
+    workflow_id / concurrency 通过查询参数传入）。
+    """
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    if ndjson:
+        if workflow_id is None:
+            raise HTTPException(status_code=400, detail="NDJSON 请求需要通过查询参数指定 workflow_id")
+        inputs = _read_ndjson(request)
+    else:
+        try:
+            body = BatchExecutionRequest.model_validate_json(await request.body())
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        workflow_id, concurrency = body.workflow_id, body.concurrency or concurrency
+        if len(body.inputs) > settings.batch_max_inputs:
+            raise HTTPException(status_code=413, detail=f"单次批量执行最多 {settings.batch_max_inputs} 组输入")
     
-    return execution_log
+    workflow = await workflow_cache.get(db, workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="工作流不存在")
+    tools = await load_tools(db, get_plan(workflow).tool_ids)
+    await db.commit()
+    
+    batch = BatchRun(workflow, tools, concurrency or settings.batch_concurrency, settings.batch_flush_size)
+    try:
+        if ndjson:
+            # 边读取边按块提交，上传期间已开始执行
+            chunk = []
+            async for input_data in inputs:
+                if not isinstance(input_data, dict):
+                    raise HTTPException(status_code=422, detail="NDJSON 每行必须是 JSON 对象")
+                if batch.submitted + len(chunk) >= settings.batch_max_inputs:
+                    raise HTTPException(status_code=413, detail=f"单次批量执行最多 {settings.batch_max_inputs} 组输入")
+                chunk.append(input_data)
+                if len(chunk) >= settings.batch_flush_size:
+                    await batch.submit(chunk)
+                    chunk = []
+            await batch.submit(chunk)
+        else:
+            for start in range(0, len(body.inputs), settings.batch_flush_size):
+                await batch.submit(body.inputs[start:start + settings.batch_flush_size])
+    except json.JSONDecodeError:
+        await batch.cancel()
+        raise HTTPException(status_code=422, detail="NDJSON 格式错误")
+    except BaseException:
+        await batch.cancel()
+        raise
+    
+    async def stream():
+        try:
+            async for item in batch.results():
+                yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+        finally:
+            await batch.cancel()
+    
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 @router.get("/logs/{execution_id}", response_model=ExecutionResponse)
-async def get_execution_log(execution_id: int, db: AsyncSession = Depends(get_db)):
-    """获取执行日志"""
+async def get_execution_log(
+    execution_id: int,
+    level: Optional[str] = Query(None, description="最低日志级别：debug/info/success/warning/error"),
+    node_id: Optional[str] = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取执行日志，支持按级别、节点过滤与分页"""
+    if level is not None and level not in LOG_LEVELS:
+        raise HTTPException(status_code=400, detail=f"不支持的日志级别: {level}")
+    
     result = await db.execute(select(ExecutionLog).where(ExecutionLog.id == execution_id))
     log = result.scalar_one_or_none()
     if not log:
         raise HTTPException(status_code=404, detail="执行日志不存在")
-    return log
+    
+    levels = [name for name in LOG_LEVELS if level is None or level_value(name) >= level_value(level)]
+    query = select(NodeLog).where(NodeLog.execution_id == execution_id)
+    if level is not None:
+        query = query.where(NodeLog.level.in_(levels))
+    if node_id is not None:
+        query = query.where(NodeLog.node_id == node_id)
+    result = await db.execute(query.order_by(NodeLog.id).offset(offset).limit(limit))
+    entries = [
+        {"level": row.level, "message": row.message, "node_id": row.node_id, "timestamp": row.timestamp}
+        for row in result.scalars()
+    ]
+    
+    if not entries and log.logs:
+        # 旧版本的执行记录把日志整体存放在 logs 字段中
+        entries = [
+            entry for entry in log.logs
+            if entry.get("level") in levels and (node_id is None or entry.get("node_id") == node_id)
+        ][offset:offset + limit]
+    
+    response = ExecutionResponse.model_validate(log, from_attributes=True)
+    response.logs = entries
+    return response
+
+@router.post("/{execution_id}/resume", response_model=ExecutionResponse)
+async def resume_execution(
+    execution_id: int,
+    request: Optional[ResumeRequest] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """从检查点恢复失败、超时或取消的执行：已完成的节点不再执行，从中断的节点继续"""
+    request = request or ResumeRequest()
+    result = await db.execute(select(ExecutionLog).where(ExecutionLog.id == execution_id))
+    execution_log = result.scalar_one_or_none()
+    if not execution_log:
+        raise HTTPException(status_code=404, detail="执行日志不存在")
+    if execution_log.status not in RESUMABLE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"执行无法恢复（当前状态: {execution_log.status}）")
+    workflow = await workflow_cache.get(db, execution_log.workflow_id)
+    if not workflow:
+        raise HTTPException(status_code=404, detail="工作流不存在")
+    result = await db.execute(
+        select(ExecutionCheckpoint.workflow_updated_at).where(ExecutionCheckpoint.execution_id == execution_id)
+    )
+    checkpoint = result.first()
+    if checkpoint is None:
+        raise HTTPException(status_code=409, detail="该执行没有可恢复的检查点")
+    if checkpoint.workflow_updated_at != workflow.updated_at:
+        raise HTTPException(status_code=409, detail="工作流在保存检查点后已被修改，无法恢复")
+    if request.mode == "async" and job_queue.full():
+        raise HTTPException(status_code=429, detail="执行队列已满，请稍后重试")
+    
+    execution_log.status = "queued" if request.mode == "async" else "running"
+    execution_log.completed_at = None
+    if request.timeout is not None:
+        execution_log.timeout = request.timeout
+    await db.commit()
+    await db.refresh(execution_log)
+    return await _dispatch(db, workflow, execution_log, request.mode, resume=True)
+
+@router.post("/{execution_id}/cancel")
+async def cancel_execution(execution_id: int, db: AsyncSession = Depends(get_db)):
+    """取消执行：运行中的执行中止正在运行的节点，排队中的执行直接标记为已取消
+
+    只能取消本进程中运行的执行。
+    """
+    executor = active_executions.get(execution_id)
+    if executor is not None:
+        executor.cancel()
+        return {"id": execution_id, "status": "cancelling"}
+    
+    completed_at = datetime.utcnow()
+    result = await db.execute(
+        update(ExecutionLog)
+        .where(ExecutionLog.id == execution_id, ExecutionLog.status == "queued")
+        .values(status="cancelled", completed_at=completed_at)
+    )
+    await db.commit()
+    if result.rowcount:
+        publish_finished(execution_id, "cancelled", completed_at)
+        return {"id": execution_id, "status": "cancelled"}
+    
+    result = await db.execute(select(ExecutionLog.status).where(ExecutionLog.id == execution_id))
+    status = result.scalar_one_or_none()
+    if status is None:
+        raise HTTPException(status_code=404, detail="执行日志不存在")
+    raise HTTPException(status_code=409, detail=f"执行无法取消（当前状态: {status}）")
+
+@router.get("/{execution_id}/profile")
+async def download_profile(execution_id: int, db: AsyncSession = Depends(get_db)):
+    """下载 pstats 格式的 CPU 剖析数据，可用 pstats / snakeviz 等工具打开"""
+    result = await db.execute(select(ExecutionLog.profile_stats).where(ExecutionLog.id == execution_id))
+    data = result.scalar_one_or_none()
+    if data is None:
+        raise HTTPException(status_code=404, detail="该执行没有 CPU 剖析数据")
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="execution-{execution_id}.pstats"'}
+    )
+
+@router.get("/{execution_id}/events")
+async def stream_execution_events(execution_id: int):
+    """以 Server-Sent Events 实时推送执行事件（节点开始/结束、日志、执行结束）"""
+    # 先订阅再查询状态，避免错过查询期间结束的执行
+    queue = event_bus.subscribe(execution_id)
+    async with async_session_maker() as db:
+        result = await db.execute(select(ExecutionLog).where(ExecutionLog.id == execution_id))
+        execution_log = result.scalar_one_or_none()
+    if not execution_log:
+        event_bus.unsubscribe(execution_id, queue)
+        raise HTTPException(status_code=404, detail="执行日志不存在")
+    
+    async def stream():
+        try:
+            if execution_log.status in FINISHED_STATUSES:
+                yield _sse(finished_event(execution_log.status, execution_log.completed_at))
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event)
+                if event["type"] == "execution_finished":
+                    return
+        finally:
+            event_bus.unsubscribe(execution_id, queue)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,27 @@
+from fastapi import HTTPException, Response
+from typing import List, Optional, Sequence
+
+# 下一页游标所在的响应头，列表响应体保持为数组
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+# 按时间倒序的列表使用 before_id 翻页
+NEXT_BEFORE_CURSOR_HEADER = "X-Next-Before-Id"
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> List[str]:
+    """解析 fields 参数（逗号分隔），返回需要额外返回的字段"""
+    if not fields:
+        return []
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的字段: {', '.join(unknown)}，可选: {', '.join(allowed)}"
+        )
+    return [field for field in allowed if field in requested]
+
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int, header: str = NEXT_CURSOR_HEADER):
+    """本页已满时在响应头中返回下一页的游标（本页最后一行的ID）"""
+    if len(rows) == limit:
+        response.headers[header] = str(rows[-1]["id"])
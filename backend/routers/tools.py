@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database import get_db, Tool
-from models import ToolCreate, ToolResponse
-from typing import List
+from models import ToolCreate, ToolResponse, ToolSummary
+from engine.tool_cache import tool_code_cache
+from engine.result_cache import tool_result_cache
+from routers.listing import parse_fields, set_next_cursor
+from typing import List, Optional
 
 router = APIRouter()
 
+# 列表默认不返回的大字段
+TOOL_DETAIL_FIELDS = ("config", "code")
+
 @router.post("/", response_model=ToolResponse)
 async def create_tool(tool: ToolCreate, db: AsyncSession = Depends(get_db)):
     """创建新工具"""
@@ -22,12 +28,31 @@ async def create_tool(tool: ToolCreate, db: AsyncSession = Depends(get_db)):
     await db.refresh(db_tool)
     return db_tool
 
-@router.get("/", response_model=List[ToolResponse])
-async def get_tools(db: AsyncSession = Depends(get_db)):
-    """获取所有工具"""
-    result = await db.execute(select(Tool))
-    tools = result.scalars().all()
-    return tools
+@router.get("/", response_model=List[ToolSummary], response_model_exclude_unset=True)
+async def get_tools(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, description="上一页最后一个工具的ID"),
+    category: Optional[str] = None,
+    name: Optional[str] = Query(None, description="名称前缀"),
+    fields: Optional[str] = Query(None, description="额外返回的字段，逗号分隔：config, code"),
+    db: AsyncSession = Depends(get_db)
+):
+    """分页获取工具列表（按ID升序），下一页游标在 X-Next-After-Id 响应头中"""
+    columns = [Tool.id, Tool.name, Tool.description, Tool.category, Tool.created_at]
+    columns += [getattr(Tool, field) for field in parse_fields(fields, TOOL_DETAIL_FIELDS)]
+    query = select(*columns).order_by(Tool.id).limit(limit)
+    if after_id is not None:
+        query = query.where(Tool.id > after_id)
+    if category is not None:
+        query = query.where(Tool.category == category)
+    if name:
+        # 前缀匹配写成范围条件，可以使用 name 索引
+        query = query.where(Tool.name >= name, Tool.name < name + "\uffff")
+    result = await db.execute(query)
+    rows = result.mappings().all()
+    set_next_cursor(response, rows, limit)
+    return [dict(row) for row in rows]
 
 @router.get("/{tool_id}", response_model=ToolResponse)
 async def get_tool(tool_id: int, db: AsyncSession = Depends(get_db)):
@@ -38,6 +63,26 @@ async def get_tool(tool_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="工具不存在")
     return tool
 
+@router.put("/{tool_id}", response_model=ToolResponse)
+async def update_tool(tool_id: int, tool: ToolCreate, db: AsyncSession = Depends(get_db)):
+    """更新工具"""
+    result = await db.execute(select(Tool).where(Tool.id == tool_id))
+    db_tool = result.scalar_one_or_none()
+    if not db_tool:
+        raise HTTPException(status_code=404, detail="工具不存在")
+    
+    db_tool.name = tool.name
+    db_tool.description = tool.description
+    db_tool.category = tool.category
+    db_tool.config = tool.config
+    db_tool.code = tool.code
+    
+    await db.commit()
+    await db.refresh(db_tool)
+    tool_code_cache.invalidate(tool_id)
+    await tool_result_cache.invalidate(tool_id)
+    return db_tool
+
 @router.delete("/{tool_id}")
 async def delete_tool(tool_id: int, db: AsyncSession = Depends(get_db)):
     """删除工具"""
@@ -47,4 +92,6 @@ async def delete_tool(tool_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="工具不存在")
     await db.delete(tool)
     await db.commit()
+    tool_code_cache.invalidate(tool_id)
+    await tool_result_cache.invalidate(tool_id)
     return {"message": "工具已删除"}
@@ -1,13 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from database import get_db, Workflow
-from models import WorkflowCreate, WorkflowResponse
-from typing import List
+from models import WorkflowCreate, WorkflowResponse, WorkflowSummary
+from engine.workflow_cache import workflow_cache
+from routers.listing import parse_fields, set_next_cursor
+from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter()
 
+# 列表默认不返回的大字段
+WORKFLOW_DETAIL_FIELDS = ("nodes", "edges", "variables")
+
 @router.post("/", response_model=WorkflowResponse)
 async def create_workflow(workflow: WorkflowCreate, db: AsyncSession = Depends(get_db)):
     """创建工作流"""
@@ -23,12 +28,28 @@ async def create_workflow(workflow: WorkflowCreate, db: AsyncSession = Depends(g
     await db.refresh(db_workflow)
     return db_workflow
 
-@router.get("/", response_model=List[WorkflowResponse])
-async def get_workflows(db: AsyncSession = Depends(get_db)):
-    """获取所有工作流"""
-    result = await db.execute(select(Workflow))
-    workflows = result.scalars().all()
-    return workflows
+@router.get("/", response_model=List[WorkflowSummary], response_model_exclude_unset=True)
+async def get_workflows(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    after_id: Optional[int] = Query(None, description="上一页最后一个工作流的ID"),
+    name: Optional[str] = Query(None, description="名称前缀"),
+    fields: Optional[str] = Query(None, description="额外返回的字段，逗号分隔：nodes, edges, variables"),
+    db: AsyncSession = Depends(get_db)
+):
+    """分页获取工作流列表（按ID升序），下一页游标在 X-Next-After-Id 响应头中"""
+    columns = [Workflow.id, Workflow.name, Workflow.description, Workflow.created_at, Workflow.updated_at]
+    columns += [getattr(Workflow, field) for field in parse_fields(fields, WORKFLOW_DETAIL_FIELDS)]
+    query = select(*columns).order_by(Workflow.id).limit(limit)
+    if after_id is not None:
+        query = query.where(Workflow.id > after_id)
+    if name:
+        # 前缀匹配写成范围条件，可以使用 name 索引
+        query = query.where(Workflow.name >= name, Workflow.name < name + "\uffff")
+    result = await db.execute(query)
+    rows = result.mappings().all()
+    set_next_cursor(response, rows, limit)
+    return [dict(row) for row in rows]
 
 @router.get("/{workflow_id}", response_model=WorkflowResponse)
 async def get_workflow(workflow_id: int, db: AsyncSession = Depends(get_db)):
@@ -55,6 +76,7 @@ async def update_workflow(workflow_id: int, workflow: WorkflowCreate, db: AsyncS
     db_workflow.updated_at = datetime.utcnow()
     
     await db.commit()
+    workflow_cache.invalidate(workflow_id)
     await db.refresh(db_workflow)
     return db_workflow
 
@@ -67,4 +89,5 @@ async def delete_workflow(workflow_id: int, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="工作流不存在")
     await db.delete(workflow)
     await db.commit()
+    workflow_cache.invalidate(workflow_id)
     return {"message": "工作流已删除"}
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+
+# 数据库引擎在导入 database 时按环境变量创建，需在导入应用之前指定测试数据库
+_workdir = tempfile.mkdtemp(prefix="arrange-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_workdir, 'test.db')}"
+
+import httpx
+import pytest
+
+from main import app
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def client():
+    """运行应用启动/关闭钩子，通过 ASGI 直接调用接口
+
+    执行队列、日志写入等单例绑定在启动时的事件循环上，所有测试共用同一个应用实例和事件循环。
+    """
+    for handler in app.router.on_startup:
+        await handler()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+    finally:
+        for handler in app.router.on_shutdown:
+            await handler()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_workdir, ignore_errors=True)
@@ -0,0 +1,66 @@
+import time
+
+import httpx
+import pytest
+
+import engine.http
+from tests.utils import node, edge, chain, create_tool, create_workflow, run
+
+ASYNC_SLEEP = """
+import asyncio
+
+async def execute(inputs, context):
+    await asyncio.sleep(inputs['seconds'])
+    return inputs['value']
+"""
+
+ASYNC_FETCH = """
+async def execute(inputs, context):
+    response = await http.get('http://service.test/items/' + str(inputs['id']))
+    return {'body': response.json(), 'client': id(http)}
+"""
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"path": request.url.path})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(engine.http, "_client", client)
+    return client
+
+
+@pytest.mark.anyio
+async def test_async_tools_run_concurrently(client):
+    tool = await create_tool(client, ASYNC_SLEEP, config={"executor": "inline"})
+    branches = [
+        node(f"b{i}", "tool", tool_id=tool["id"], config={"inputs": {"seconds": 0.3, "value": i}, "output_key": f"v{i}"})
+        for i in range(4)
+    ]
+    nodes = [node("start", "start"), *branches, node("end", "end", config={"output_key": "v3"})]
+    edges = [edge("start", b["id"]) for b in branches] + [edge(b["id"], "end") for b in branches]
+    workflow = await create_workflow(client, nodes, edges)
+
+    started = time.perf_counter()
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == 3
+    assert time.perf_counter() - started < 0.8
+
+
+@pytest.mark.anyio
+async def test_async_tools_share_http_client(client, mock_http):
+    tool = await create_tool(client, ASYNC_FETCH)
+    nodes = [
+        node("start", "start"),
+        node("first", "tool", tool_id=tool["id"], config={"inputs": {"id": 1}, "output_key": "first"}),
+        node("second", "tool", tool_id=tool["id"], config={"inputs": {"id": "{{first.body.path}}"}, "output_key": "second"}),
+        node("end", "end", config={"output_key": "second"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    second = response.json()["output_data"]
+    assert second["body"] == {"path": "/items//items/1"}
+    assert second["client"] == id(mock_http)
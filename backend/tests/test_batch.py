@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from config import settings
+from database import async_session_maker, ExecutionLog
+from engine.executor import WorkflowExecutor
+from tests.utils import node, code_node, chain, create_workflow
+
+NDJSON = {"content-type": "application/x-ndjson"}
+
+
+async def _workflow(client):
+    nodes = [node("start", "start"), code_node("double", "result = context['x'] * 2"),
+             node("end", "end", config={"output_key": "double"})]
+    return await create_workflow(client, nodes, chain(*nodes))
+
+
+def _items(response):
+    assert response.status_code == 200, response.text
+    items = [json.loads(line) for line in response.text.splitlines() if line]
+    return sorted(items, key=lambda item: item["index"])
+
+
+async def _rows(ids):
+    async with async_session_maker() as db:
+        result = await db.execute(select(ExecutionLog).where(ExecutionLog.id.in_(ids)).order_by(ExecutionLog.id))
+        return result.scalars().all()
+
+
+@pytest.mark.anyio
+async def test_json_batch(client):
+    workflow = await _workflow(client)
+    inputs = [{"x": 1}, {"x": 2}, {"x": "a"}, {}]
+    response = await client.post("/api/execution/batch", json={"workflow_id": workflow["id"], "inputs": inputs})
+    items = _items(response)
+
+    assert [item["status"] for item in items] == ["completed", "completed", "completed", "failed"]
+    assert [item.get("output_data") for item in items] == [2, 4, "aa", None]
+    assert "x" in items[3]["error"]
+
+    rows = await _rows([item["id"] for item in items])
+    assert [row.status for row in rows] == ["completed", "completed", "completed", "failed"]
+    assert rows[0].output_data == 2 and rows[0].completed_at is not None
+    assert rows[0].node_timings
+
+
+@pytest.mark.anyio
+async def test_ndjson_batch(client, monkeypatch):
+    # 按块提交与写回
+    monkeypatch.setattr(settings, "batch_flush_size", 2)
+    workflow = await _workflow(client)
+    body = "\n".join(json.dumps({"x": x}) for x in range(5))
+    response = await client.post("/api/execution/batch", params={"workflow_id": workflow["id"]},
+                                 content=body, headers=NDJSON)
+    items = _items(response)
+    assert [item["output_data"] for item in items] == [0, 2, 4, 6, 8]
+    assert [row.status for row in await _rows([item["id"] for item in items])] == ["completed"] * 5
+
+    response = await client.post("/api/execution/batch", content=body, headers=NDJSON)
+    assert response.status_code == 400
+
+    response = await client.post("/api/execution/batch", params={"workflow_id": workflow["id"]},
+                                 content="[1]\n", headers=NDJSON)
+    assert response.status_code == 422
+
+    response = await client.post("/api/execution/batch", params={"workflow_id": workflow["id"]},
+                                 content="{", headers=NDJSON)
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_batch_limits(client, monkeypatch):
+    workflow = await _workflow(client)
+    monkeypatch.setattr(settings, "batch_max_inputs", 2)
+    response = await client.post("/api/execution/batch", json={
+        "workflow_id": workflow["id"], "inputs": [{"x": 1}] * 3
+    })
+    assert response.status_code == 413
+
+    response = await client.post("/api/execution/batch", json={"workflow_id": 10 ** 9, "inputs": []})
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_batch_concurrency_bound(client, monkeypatch):
+    workflow = await _workflow(client)
+    running, peak = 0, 0
+
+    statuses = []
+
+    async def execute(self, input_data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        statuses.append((await _rows([self.execution_id]))[0].status)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"output": input_data["x"]}
+
+    monkeypatch.setattr(WorkflowExecutor, "execute", execute)
+    response = await client.post("/api/execution/batch", json={
+        "workflow_id": workflow["id"], "inputs": [{"x": x} for x in range(10)], "concurrency": 3
+    })
+    assert [item["output_data"] for item in _items(response)] == list(range(10))
+    assert peak == 3
+    # 取得并发名额、开始执行的记录为 running
+    assert statuses == ["running"] * 10
@@ -0,0 +1,63 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks import storage
+from benchmarks.executor import SCENARIOS, compare, run_scenario, _create_tools, _percentile
+from database import async_session_maker
+
+BASELINE = os.path.join(os.path.dirname(__file__), os.pardir, "benchmarks", "baseline.json")
+
+
+def _result(size, p50_ms):
+    return {"size": size, "p50_ms": p50_ms}
+
+
+def test_compare_reports_regressions_only():
+    baseline = {"scenarios": {"a": _result(10, 100.0), "b": _result(10, 100.0), "c": _result(10, 100.0)}}
+    results = {
+        "a": _result(10, 130.0),   # 超过阈值
+        "b": _result(10, 110.0),   # 阈值以内
+        "c": _result(20, 500.0),   # 规模不同，不比较
+        "d": _result(10, 500.0),   # 基线中没有
+    }
+    regressions = compare(results, baseline, threshold=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("a:")
+
+
+def test_percentile():
+    assert _percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert _percentile([1.0, 2.0, 3.0, 4.0], 0.95) == 4.0
+
+
+def test_committed_baseline_covers_all_scenarios():
+    with open(BASELINE, encoding="utf-8") as f:
+        baseline = json.load(f)
+    assert baseline["scale"] == 1.0
+    assert set(baseline["scenarios"]) == set(SCENARIOS)
+    for name, (_, size, _) in SCENARIOS.items():
+        assert baseline["scenarios"][name]["size"] == size
+        assert baseline["scenarios"][name]["p50_ms"] > 0
+
+
+@pytest.mark.anyio
+async def test_scenarios_run(client):
+    async with async_session_maker() as db:
+        tools = await _create_tools(db)
+        for name, (_, _, repeat) in SCENARIOS.items():
+            result = await run_scenario(db, tools, name, scale=0.01)
+            assert result["runs"] == repeat
+            assert result["nodes_per_run"] > 0 and result["p50_ms"] > 0
+
+
+def test_storage_benchmark_ignores_caller_database(tmp_path, monkeypatch):
+    caller_db = tmp_path / "caller.db"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite+aiosqlite:///{caller_db}")
+    args = SimpleNamespace(executions=2, concurrency=2)
+    for name in ("sqlite-journal", "sqlite-wal"):
+        result = storage.run_configuration(name, storage.CONFIGURATIONS[name], args)
+        assert result["failures"] == 0, result
+    assert not caller_db.exists()
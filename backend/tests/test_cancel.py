@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert
+
+from database import engine, ExecutionLog
+from engine.jobs import active_executions
+from tests.utils import node, chain, create_tool, create_workflow, run, latest_execution, wait_finished
+
+SLEEP_TOOL = """
+import asyncio
+
+async def execute(inputs, context):
+    await asyncio.sleep(inputs['seconds'])
+    return inputs['seconds']
+"""
+
+
+async def _workflow(client, seconds, start_config=None, **tool_config):
+    tool = await create_tool(client, SLEEP_TOOL)
+    nodes = [
+        node("start", "start", config=start_config or {}),
+        node("sleep", "tool", tool_id=tool["id"],
+             config={"inputs": {"seconds": seconds}, "output_key": "out", **tool_config}),
+        node("end", "end", config={"output_key": "out"}),
+    ]
+    return await create_workflow(client, nodes, chain(*nodes))
+
+
+@pytest.mark.anyio
+async def test_node_timeout(client):
+    workflow = await _workflow(client, 5, timeout=0.05)
+    response = await run(client, workflow["id"])
+    assert response.status_code == 504
+    assert "节点执行超时" in response.json()["detail"]
+    assert (await latest_execution(client, workflow["id"]))["status"] == "timeout"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("source", ["request", "start_node"])
+async def test_execution_timeout(client, source):
+    if source == "request":
+        workflow = await _workflow(client, 5)
+        response = await run(client, workflow["id"], timeout=0.05)
+    else:
+        workflow = await _workflow(client, 5, start_config={"timeout": 0.05})
+        response = await run(client, workflow["id"])
+    assert response.status_code == 504
+    assert "工作流执行超时" in response.json()["detail"]
+
+    execution = await latest_execution(client, workflow["id"])
+    assert execution["status"] == "timeout"
+    assert execution["completed_at"] is not None
+    assert any(timing["status"] == "cancelled" for timing in execution["node_timings"])
+
+
+@pytest.mark.anyio
+async def test_within_timeout_completes(client):
+    workflow = await _workflow(client, 0.01, timeout=5)
+    response = await run(client, workflow["id"], timeout=5)
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == 0.01
+
+
+@pytest.mark.anyio
+async def test_cancel_running_execution(client):
+    workflow = await _workflow(client, 5)
+    execution_id = (await run(client, workflow["id"], mode="async")).json()["id"]
+    for _ in range(250):
+        if execution_id in active_executions:
+            break
+        await asyncio.sleep(0.02)
+
+    response = await client.post(f"/api/execution/{execution_id}/cancel")
+    assert response.json() == {"id": execution_id, "status": "cancelling"}
+    body = await wait_finished(client, execution_id)
+    assert body["status"] == "cancelled"
+    assert any("取消" in entry["message"] for entry in body["logs"])
+
+
+@pytest.mark.anyio
+async def test_cancel_queued_execution(client):
+    async with engine.begin() as conn:
+        result = await conn.execute(insert(ExecutionLog).values(
+            workflow_id=0, status="queued", input_data={}, logs=[]
+        ))
+        execution_id = result.inserted_primary_key[0]
+
+    response = await client.post(f"/api/execution/{execution_id}/cancel")
+    assert response.json() == {"id": execution_id, "status": "cancelled"}
+    body = (await client.get(f"/api/execution/logs/{execution_id}")).json()
+    assert body["status"] == "cancelled" and body["completed_at"] is not None
+
+    response = await client.post(f"/api/execution/{execution_id}/cancel")
+    assert response.status_code == 409
+    assert (await client.post("/api/execution/999999999/cancel")).status_code == 404
@@ -0,0 +1,186 @@
+import os
+
+import pytest
+
+from config import settings
+from engine.checkpoint import get_checkpoint, load_checkpoint, checkpoint_files_dir
+from engine.context_store import ContextStore
+from tests.utils import node, edge, code_node, chain, create_workflow, run, latest_execution
+
+# 代码节点把自身名称（和循环元素）追加到记录文件，flag 文件不存在时在指定位置失败
+RECORD = """
+with open(context['record'], 'a') as f:
+    f.write({label!r} + ':' + str(context.get('item', '')) + '\\n')
+if {fail} and not os.path.exists(context['flag']):
+    raise Exception('transient')
+result = {label!r}
+"""
+
+
+def recorded_node(node_id: str, fail: str = "False", **config):
+    code = "import os\n" + RECORD.format(label=node_id, fail=fail)
+    return code_node(node_id, code, executor="inline", **config)
+
+
+def read_record(path) -> list:
+    with open(path) as f:
+        return f.read().split()
+
+
+@pytest.fixture
+def files(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "checkpoint_dir", str(tmp_path / "checkpoints"))
+    return {"record": str(tmp_path / "record"), "flag": str(tmp_path / "flag")}
+
+
+async def _fail_then_resume(client, workflow_id, files, input_data=None):
+    response = await run(client, workflow_id, {**files, **(input_data or {})})
+    assert response.status_code == 500, response.text
+    execution = await latest_execution(client, workflow_id)
+    assert execution["status"] == "failed"
+
+    open(files["flag"], "w").close()
+    response = await client.post(f"/api/execution/{execution['id']}/resume")
+    assert response.status_code == 200, response.text
+    return execution["id"], response.json()
+
+
+@pytest.mark.anyio
+async def test_resume_skips_completed_nodes(client, files):
+    nodes = [
+        node("start", "start", config={"checkpoint_interval": 1}),
+        recorded_node("a"), recorded_node("b", fail="True"), recorded_node("c"),
+        node("end", "end", config={"output_key": "c"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    execution_id, body = await _fail_then_resume(client, workflow["id"], files)
+
+    assert body["status"] == "completed"
+    assert body["output_data"] == "c"
+    assert read_record(files["record"]) == ["a:", "b:", "b:", "c:"]
+    # 成功完成后删除检查点
+    assert await get_checkpoint(execution_id) is None
+
+    response = await client.post(f"/api/execution/{execution_id}/resume")
+    assert response.status_code == 409
+
+
+@pytest.mark.anyio
+async def test_resume_rejects_modified_workflow(client, files):
+    nodes = [
+        node("start", "start", config={"checkpoint_interval": 1}),
+        recorded_node("a"), recorded_node("b", fail="True"),
+        node("end", "end"),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    await run(client, workflow["id"], files)
+    execution = await latest_execution(client, workflow["id"])
+
+    await client.put(f"/api/workflows/{workflow['id']}", json={
+        "name": workflow["name"], "description": "", "nodes": nodes, "edges": chain(*nodes), "variables": {}
+    })
+    response = await client.post(f"/api/execution/{execution['id']}/resume")
+    assert response.status_code == 409
+    assert "修改" in response.json()["detail"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("parallel", [False, True])
+async def test_resume_continues_loop_from_failed_iteration(client, files, parallel):
+    loop_config = {"loop_type": "for", "items_key": "items", "item_var": "item", "parallel": parallel}
+    if parallel:
+        loop_config["max_concurrency"] = 1
+    nodes = [
+        node("start", "start", config={"checkpoint_interval": 1}),
+        recorded_node("before"),
+        node("loop", "loop", config=loop_config),
+        recorded_node("body", fail="context['item'] == 3", output_key="out"),
+        node("end", "end", config={"output_key": "out"}),
+    ]
+    edges = [edge("start", "before"), edge("before", "loop"), edge("loop", "body"), edge("body", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    execution_id, body = await _fail_then_resume(client, workflow["id"], files, {"items": [1, 2, 3, 4]})
+
+    assert body["status"] == "completed"
+    assert body["output_data"] == ["body"] * 4
+    assert read_record(files["record"]) == [
+        "before:", "body:1", "body:2", "body:3", "body:3", "body:4"
+    ]
+
+
+@pytest.mark.anyio
+async def test_loop_progress_saved_between_iterations(client, files):
+    nodes = [
+        node("start", "start", config={"checkpoint_interval": 2}),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item"}),
+        recorded_node("body", fail="context['item'] == 5", output_key="out"),
+        node("end", "end", config={"output_key": "out"}),
+    ]
+    edges = [edge("start", "loop"), edge("loop", "body"), edge("body", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    await run(client, workflow["id"], {**files, "items": [1, 2, 3, 4, 5]})
+    execution = await latest_execution(client, workflow["id"])
+
+    checkpoint = await get_checkpoint(execution["id"])
+    state = load_checkpoint(checkpoint.data)
+    loop = state["frame"]["loops"]["loop"]
+    assert loop["completed"] == {0, 1, 2, 3}
+    assert loop["results"][:4] == ["body"] * 4
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("budget_on_resume", [1024 * 1024, 0])
+async def test_spilled_values_saved_by_reference(client, files, monkeypatch, budget_on_resume):
+    monkeypatch.setattr(settings, "context_memory_budget", 1024 * 1024)
+    monkeypatch.setattr(settings, "context_spill_threshold", 64 * 1024)
+    nodes = [
+        node("start", "start", config={"checkpoint_interval": 1}),
+        code_node("blob", "result = 'x' * (256 * 1024)"),
+        recorded_node("check", fail="True"),
+        code_node("length", "result = len(context['blob'])"),
+        node("end", "end", config={"output_key": "length"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+
+    def no_snapshot(self, trim=False):
+        raise AssertionError("检查点不应加载已写出的值")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(ContextStore, "snapshot", no_snapshot)
+        response = await run(client, workflow["id"], files)
+    assert response.status_code == 500, response.text
+    execution = await latest_execution(client, workflow["id"])
+
+    state = load_checkpoint((await get_checkpoint(execution["id"])).data)
+    assert "blob" not in state["context"]
+    path, size = state["spilled"]["blob"]
+    assert os.path.dirname(path) == checkpoint_files_dir(execution["id"])
+    assert os.path.getsize(path) < size + 1024
+
+    monkeypatch.setattr(settings, "context_memory_budget", budget_on_resume)
+    open(files["flag"], "w").close()
+    response = await client.post(f"/api/execution/{execution['id']}/resume")
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == 256 * 1024
+    assert not os.path.exists(checkpoint_files_dir(execution["id"]))
+
+
+@pytest.mark.anyio
+async def test_missing_spilled_file_fails_resume(client, files, monkeypatch):
+    monkeypatch.setattr(settings, "context_memory_budget", 1024 * 1024)
+    monkeypatch.setattr(settings, "context_spill_threshold", 64 * 1024)
+    nodes = [
+        node("start", "start", config={"checkpoint_interval": 1}),
+        code_node("blob", "result = 'x' * (256 * 1024)"),
+        recorded_node("check", fail="True"),
+        node("end", "end"),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    await run(client, workflow["id"], files)
+    execution = await latest_execution(client, workflow["id"])
+    for name in os.listdir(checkpoint_files_dir(execution["id"])):
+        os.remove(os.path.join(checkpoint_files_dir(execution["id"]), name))
+
+    response = await client.post(f"/api/execution/{execution['id']}/resume")
+    assert response.status_code == 500
+    assert "丢失" in response.json()["detail"]
@@ -0,0 +1,100 @@
+import os
+import pickle
+import time
+
+import pytest
+
+from config import settings
+from engine.context_store import ContextStore, estimate_size
+from tests.utils import node, code_node, chain, create_workflow, run
+
+BLOB = "x" * (256 * 1024)
+
+
+def test_estimate_size_is_close_for_small_values():
+    value = {"a": [1, 2, 3], "b": "text"}
+    exact = len(pickle.dumps(value))
+    assert exact <= estimate_size(value) < exact * 20
+
+
+def test_estimate_size_extrapolates_large_containers():
+    rows = [{"id": i, "name": f"row-{i}"} for i in range(200_000)]
+    started = time.perf_counter()
+    size = estimate_size(rows)
+    elapsed = time.perf_counter() - started
+    # 抽样估算与完整遍历同一数量级，且不随规模线性增长
+    assert 30 * 1024 * 1024 < size < 200 * 1024 * 1024
+    assert elapsed < 0.05
+
+
+def test_large_value_is_spilled_and_loaded_back():
+    store = ContextStore(memory_budget=1024 * 1024, spill_threshold=64 * 1024)
+    store["blob"] = BLOB
+    store["small"] = 1
+    assert store.is_spilled("blob")
+    assert not store.is_spilled("small")
+    path = store._values["blob"].path
+    assert os.path.exists(path)
+
+    assert store["blob"] == BLOB
+    assert not store.is_spilled("blob")
+    assert not os.path.exists(path)
+    store.close()
+
+
+def test_budget_spills_least_recently_used():
+    store = ContextStore(memory_budget=600 * 1024, spill_threshold=1024 * 1024)
+    store["a"] = "a" * (256 * 1024)
+    store["b"] = "b" * (256 * 1024)
+    store["a"]
+    store["c"] = "c" * (256 * 1024)
+    assert store.is_spilled("b")
+    assert not store.is_spilled("a")
+    assert store.resident_bytes <= 600 * 1024
+    store.close()
+
+
+def test_unpicklable_value_stays_resident():
+    store = ContextStore(memory_budget=1, spill_threshold=1)
+    generator = (i for i in range(3))
+    store["gen"] = generator
+    assert store["gen"] is generator
+    store.close()
+
+
+def test_snapshot_and_copy():
+    store = ContextStore({"blob": BLOB, "n": 1}, memory_budget=1024 * 1024, spill_threshold=64 * 1024)
+    assert store.snapshot(trim=True)["blob"]["spilled"] is True
+    assert store.copy() == {"blob": BLOB, "n": 1}
+    assert type(store.copy()) is dict
+    store.close()
+
+
+@pytest.mark.anyio
+async def test_context_is_plain_dict_by_default(client):
+    nodes = [
+        node("start", "start"),
+        code_node("copy", "result = json.dumps(context.copy())"),
+        node("end", "end", config={"output_key": "copy"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"], {"x": 1})
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == '{"x": 1}'
+
+
+@pytest.mark.anyio
+async def test_budget_enabled_spills_large_outputs(client, monkeypatch):
+    monkeypatch.setattr(settings, "context_memory_budget", 1024 * 1024)
+    monkeypatch.setattr(settings, "context_spill_threshold", 64 * 1024)
+    nodes = [
+        node("start", "start"),
+        code_node("blob", "result = 'x' * (256 * 1024)"),
+        code_node("length", "result = len(context['blob'])"),
+        node("end", "end", config={"output_key": "length"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["output_data"] == 256 * 1024
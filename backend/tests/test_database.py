@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import text
+
+from config import settings
+from database import engine, normalize_url, _engine_options
+
+
+def test_normalize_url():
+    assert normalize_url("sqlite:///./a.db") == "sqlite+aiosqlite:///./a.db"
+    assert normalize_url("postgres://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert normalize_url("postgresql://u:p@h/db") == "postgresql+asyncpg://u:p@h/db"
+    assert normalize_url("postgresql+psycopg://u:p@h/db") == "postgresql+psycopg://u:p@h/db"
+    assert normalize_url("sqlite+aiosqlite:///./a.db") == "sqlite+aiosqlite:///./a.db"
+
+
+def test_engine_options():
+    # 内存数据库不传连接池参数
+    assert _engine_options("sqlite+aiosqlite://") == {"echo": settings.database_echo}
+    assert _engine_options("sqlite+aiosqlite:///:memory:") == {"echo": settings.database_echo}
+
+    options = _engine_options("sqlite+aiosqlite:///./a.db")
+    assert options["pool_size"] == settings.database_pool_size
+    assert options["max_overflow"] == settings.database_max_overflow
+    assert "pool_pre_ping" not in options
+
+    assert _engine_options("postgresql+asyncpg://u:p@h/db")["pool_pre_ping"] is True
+
+
+@pytest.mark.anyio
+async def test_sqlite_pragmas(client):
+    async with engine.connect() as conn:
+        assert (await conn.execute(text("PRAGMA journal_mode"))).scalar().lower() == settings.sqlite_journal_mode.lower()
+        assert (await conn.execute(text("PRAGMA busy_timeout"))).scalar() == settings.sqlite_busy_timeout_ms
+        # NORMAL 对应 1
+        assert (await conn.execute(text("PRAGMA synchronous"))).scalar() == 1
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from engine.events import EventBus
+from tests.utils import node, code_node, chain, create_tool, create_workflow, run
+
+ASYNC_SLEEP = """
+import asyncio
+
+async def execute(inputs, context):
+    await asyncio.sleep(0.3)
+    return 1
+"""
+
+
+def _parse(text: str):
+    events = []
+    for block in text.split("\n\n"):
+        data = [line[len("data: "):] for line in block.splitlines() if line.startswith("data: ")]
+        if data:
+            events.append(json.loads("\n".join(data)))
+    return events
+
+
+@pytest.mark.anyio
+async def test_bus_drops_oldest_when_full():
+    bus = EventBus(queue_size=2)
+    queue = bus.subscribe(1)
+    for i in range(3):
+        bus.publish(1, {"i": i})
+    bus.publish(2, {"i": "other"})
+    assert [queue.get_nowait()["i"] for _ in range(2)] == [1, 2]
+    bus.unsubscribe(1, queue)
+    assert not bus.has_subscribers(1)
+
+
+@pytest.mark.anyio
+async def test_stream_until_finished(client):
+    tool = await create_tool(client, ASYNC_SLEEP)
+    nodes = [node("start", "start"), node("slow", "tool", tool_id=tool["id"], config={"output_key": "slow"}),
+             code_node("after", "result = 2"), node("end", "end", config={"output_key": "after"})]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"], mode="async")
+    execution_id = response.json()["id"]
+
+    response = await client.get(f"/api/execution/{execution_id}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _parse(response.text)
+    assert events[-1]["type"] == "execution_finished"
+    assert events[-1]["status"] == "completed"
+    finished = [event["node_id"] for event in events if event["type"] == "node_finished"]
+    assert finished[-3:] == ["slow", "after", "end"]
+
+    # 已结束的执行只返回结束事件
+    response = await client.get(f"/api/execution/{execution_id}/events")
+    assert [event["type"] for event in _parse(response.text)] == ["execution_finished"]
+
+
+@pytest.mark.anyio
+async def test_stream_unknown_execution(client):
+    response = await client.get("/api/execution/999999/events")
+    assert response.status_code == 404
@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+import random
+
+import pytest
+from sqlalchemy import insert
+
+from database import engine, ExecutionLog
+
+BASE = datetime(2024, 1, 10)
+
+
+async def _insert(workflow_id: int, rows):
+    """插入 (开始时间偏移天数, 状态) 对应的执行记录，返回ID列表"""
+    ids = []
+    async with engine.begin() as conn:
+        for days, status in rows:
+            result = await conn.execute(insert(ExecutionLog).values(
+                workflow_id=workflow_id, status=status, input_data={}, logs=[],
+                started_at=BASE + timedelta(days=days)
+            ))
+            ids.append(result.inserted_primary_key[0])
+    return ids
+
+
+async def _list(client, **params):
+    response = await client.get("/api/execution/", params=params)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.anyio
+async def test_newest_first_with_cursor(client):
+    workflow_id = random.randint(10 ** 6, 10 ** 9)
+    # 两条记录开始时间相同，按ID倒序排列
+    ids = await _insert(workflow_id, [(0, "completed"), (1, "failed"), (1, "completed"), (2, "completed")])
+    expected = [ids[3], ids[2], ids[1], ids[0]]
+
+    seen, params = [], {"workflow_id": workflow_id, "limit": 2}
+    while True:
+        response = await _list(client, **params)
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Before-Id")
+        if cursor is None:
+            break
+        params["before_id"] = cursor
+    assert seen == expected
+
+    row = (await _list(client, workflow_id=workflow_id, limit=1)).json()[0]
+    assert set(row) == {"id", "workflow_id", "status", "started_at", "completed_at"}
+
+
+@pytest.mark.anyio
+async def test_filters(client):
+    workflow_id = random.randint(10 ** 6, 10 ** 9)
+    ids = await _insert(workflow_id, [(0, "completed"), (1, "failed"), (2, "completed"), (3, "failed")])
+
+    response = await _list(client, workflow_id=workflow_id, status="failed")
+    assert [row["id"] for row in response.json()] == [ids[3], ids[1]]
+
+    response = await _list(client, workflow_id=workflow_id,
+                           started_after=(BASE + timedelta(days=1)).isoformat(),
+                           started_before=(BASE + timedelta(days=3)).isoformat())
+    assert [row["id"] for row in response.json()] == [ids[2], ids[1]]
+
+
+@pytest.mark.anyio
+async def test_invalid_cursor(client):
+    response = await client.get("/api/execution/", params={"before_id": 10 ** 9})
+    assert response.status_code == 400
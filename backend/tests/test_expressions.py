@@ -0,0 +1,51 @@
+import pytest
+
+from engine.expressions import compile_expression
+from tests.utils import node, edge, code_node, create_workflow, run
+
+
+@pytest.mark.parametrize("source, context, expected", [
+    ("{{x}} > 1", {"x": 2}, True),
+    ("x > 1", {"x": 0}, False),
+    ("{{resp.items[0].id}} == 7", {"resp": {"items": [{"id": 7}]}}, True),
+    ("'{{name}}' == 'ann'", {"name": "ann"}, True),
+    ("'{{count}}' == '3'", {"count": 3}, True),
+    ("{{a}} and not {{b}}", {"a": True, "b": False}, True),
+])
+def test_evaluate(source, context, expected):
+    assert compile_expression(source).evaluate(context) == expected
+
+
+def test_builtins_are_not_available():
+    with pytest.raises(NameError):
+        compile_expression("__import__('os')").evaluate({})
+
+
+def test_syntax_error_raised_on_evaluate():
+    expression = compile_expression("{{x}} >")
+    with pytest.raises(SyntaxError):
+        expression.evaluate({"x": 1})
+
+
+def test_missing_path_raises_key_error():
+    with pytest.raises(KeyError):
+        compile_expression("{{resp.missing}} == 1").evaluate({"resp": {}})
+
+
+@pytest.mark.anyio
+async def test_invalid_condition_in_unused_branch_does_not_fail(client):
+    nodes = [
+        node("start", "start"),
+        node("cond", "condition", config={"condition": "{{x}} > 0"}),
+        code_node("yes", "result = 'yes'"),
+        node("broken", "condition", config={"condition": "{{x}} >"}),
+        node("end", "end", config={"output_key": "yes"}),
+    ]
+    edges = [edge("start", "cond"), edge("cond", "yes", "true"), edge("cond", "broken", "false"), edge("yes", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"], {"x": 1})
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == "yes"
+
+    response = await run(client, workflow["id"], {"x": -1})
+    assert response.status_code == 500
@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import insert
+
+from database import engine, ExecutionLog, ExecutionCheckpoint
+from engine.jobs import JobQueue, job_queue
+from tests.utils import node, code_node, chain, create_workflow, run, wait_finished
+
+
+async def _workflow(client):
+    nodes = [node("start", "start"), code_node("double", "result = context['x'] * 2"),
+             node("end", "end", config={"output_key": "double"})]
+    return await create_workflow(client, nodes, chain(*nodes))
+
+
+async def _insert(workflow_id: int, status: str, x: int = 1) -> int:
+    async with engine.begin() as conn:
+        result = await conn.execute(insert(ExecutionLog).values(
+            workflow_id=workflow_id, status=status, input_data={"x": x}, logs=[]
+        ))
+        return result.inserted_primary_key[0]
+
+
+@pytest.mark.anyio
+async def test_async_run_is_queued_and_executed(client):
+    workflow = await _workflow(client)
+    response = await run(client, workflow["id"], {"x": 21}, mode="async")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] in ("queued", "running")
+
+    body = await wait_finished(client, response.json()["id"])
+    assert body["status"] == "completed"
+    assert body["output_data"] == 42
+
+
+@pytest.mark.anyio
+async def test_recover_requeues_queued_and_fails_running(client):
+    workflow = await _workflow(client)
+    queued = await _insert(workflow["id"], "queued", x=5)
+    running = await _insert(workflow["id"], "running")
+
+    result = await job_queue.recover()
+    assert result["requeued"] >= 1 and result["failed"] >= 1
+
+    body = await wait_finished(client, queued)
+    assert body["status"] == "completed"
+    assert body["output_data"] == 10
+
+    body = await wait_finished(client, running)
+    assert body["status"] == "failed"
+    assert body["completed_at"] is not None
+    assert any("服务重启" in entry["message"] for entry in body["logs"])
+
+
+@pytest.mark.anyio
+async def test_recover_respects_queue_capacity_and_checkpoints(client):
+    workflow = await _workflow(client)
+    resumable = await _insert(workflow["id"], "queued")
+    async with engine.begin() as conn:
+        await conn.execute(insert(ExecutionCheckpoint).values(execution_id=resumable, data=b""))
+    overflow = await _insert(workflow["id"], "queued")
+
+    # 不启动 worker 的队列，只检查入队内容
+    queue = JobQueue(workers=1, max_size=1)
+    await job_queue.stop()
+    try:
+        await queue.recover()
+    finally:
+        await job_queue.start()
+    assert queue.queue.get_nowait() == (resumable, True)
+
+    body = await wait_finished(client, overflow)
+    assert body["status"] == "failed"
+    assert any("队列已满" in entry["message"] for entry in body["logs"])
@@ -0,0 +1,68 @@
+import uuid
+
+import pytest
+
+from tests.utils import node, create_tool, create_workflow
+
+
+async def _pages(client, url, **params):
+    """沿 X-Next-After-Id 游标读取全部分页"""
+    pages = []
+    while True:
+        response = await client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-After-Id")
+        if cursor is None:
+            return pages
+        params["after_id"] = cursor
+
+
+@pytest.mark.anyio
+async def test_tool_pages_and_filters(client):
+    category = f"cat_{uuid.uuid4().hex}"
+    prefix = f"p{uuid.uuid4().hex[:8]}"
+    created = [await create_tool(client, "result = 1", category=category, name=f"{prefix}_{i}") for i in range(5)]
+    await create_tool(client, "result = 1", category=category, name=f"other_{prefix}")
+
+    pages = await _pages(client, "/api/tools/", limit=2, name=prefix)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [tool["id"] for page in pages for tool in page] == [tool["id"] for tool in created]
+
+    response = await client.get("/api/tools/", params={"category": category})
+    assert len(response.json()) == 6
+    assert "X-Next-After-Id" not in response.headers
+
+
+@pytest.mark.anyio
+async def test_tool_fields_projection(client):
+    category = f"cat_{uuid.uuid4().hex}"
+    await create_tool(client, "result = 1", config={"pure": True}, category=category)
+
+    summary = (await client.get("/api/tools/", params={"category": category})).json()[0]
+    assert "code" not in summary and "config" not in summary
+    assert {"id", "name", "description", "category", "created_at"} <= set(summary)
+
+    full = (await client.get("/api/tools/", params={"category": category, "fields": "code,config"})).json()[0]
+    assert full["code"] == "result = 1" and full["config"] == {"pure": True}
+
+    response = await client.get("/api/tools/", params={"fields": "code,secret"})
+    assert response.status_code == 400
+    assert "secret" in response.json()["detail"]
+
+
+@pytest.mark.anyio
+async def test_workflow_pages_and_projection(client):
+    prefix = f"w{uuid.uuid4().hex[:8]}"
+    nodes = [node("start", "start"), node("end", "end")]
+    created = [await create_workflow(client, nodes, [], variables={"i": i}, name=f"{prefix}_{i}") for i in range(3)]
+
+    pages = await _pages(client, "/api/workflows/", limit=2, name=prefix)
+    assert [[workflow["id"] for workflow in page] for page in pages] == [
+        [created[0]["id"], created[1]["id"]], [created[2]["id"]]
+    ]
+    assert "nodes" not in pages[0][0] and "variables" not in pages[0][0]
+
+    response = await client.get("/api/workflows/", params={"name": prefix, "fields": "variables"})
+    assert [workflow["variables"] for workflow in response.json()] == [{"i": 0}, {"i": 1}, {"i": 2}]
+    assert "nodes" not in response.json()[0]
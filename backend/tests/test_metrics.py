@@ -0,0 +1,88 @@
+import pytest
+
+from config import settings
+from engine.metrics import Histogram, Gauge, CacheCollector, MetricsRegistry
+from tests.utils import node, code_node, chain, create_tool, create_workflow, run
+
+
+def test_histogram_render():
+    histogram = Histogram("duration_seconds", "耗时", ("kind",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "a")
+    histogram.observe(0.2, 'q"x')
+
+    lines = list(histogram.render())
+    assert lines[:2] == ["# HELP duration_seconds 耗时", "# TYPE duration_seconds histogram"]
+    assert 'duration_seconds_bucket{kind="a",le="0.1"} 2' in lines
+    assert 'duration_seconds_bucket{kind="a",le="1"} 3' in lines
+    assert 'duration_seconds_bucket{kind="a",le="+Inf"} 4' in lines
+    assert 'duration_seconds_sum{kind="a"} 3.65' in lines
+    assert 'duration_seconds_count{kind="a"} 4' in lines
+    assert 'duration_seconds_count{kind="q\\"x"} 1' in lines
+
+
+def test_gauge_and_cache_collector():
+    gauge = Gauge("in_flight", "数量")
+    gauge.inc()
+    gauge.inc(2)
+    gauge.dec()
+    assert list(gauge.render())[-1] == "in_flight 2"
+    assert list(Gauge("depth", "深度", lambda: 7).render())[-1] == "depth 7"
+
+    lines = list(CacheCollector("cache", "缓存", lambda: {"hits": 3, "misses": 1, "size": 2}).render())
+    assert "cache_hits_total 3" in lines
+    assert "cache_hit_ratio 0.75" in lines
+    assert "cache_size 2" in lines
+    assert "cache_hit_ratio 0" in list(CacheCollector("cache", "缓存", lambda: {}).render())
+
+
+def test_registry_render():
+    registry = MetricsRegistry()
+    registry.register(Gauge("a", "A"))
+    registry.register(Gauge("b", "B", lambda: 1.5))
+    assert registry.render().endswith("a 0\n# HELP b B\n# TYPE b gauge\nb 1.5\n")
+
+
+@pytest.mark.anyio
+async def test_node_timings_and_metrics_endpoint(client):
+    tool = await create_tool(client, "result = inputs['x'] + 1")
+    nodes = [
+        node("start", "start"),
+        node("tool", "tool", tool_id=tool["id"], config={"inputs": {"x": "{{x}}"}, "output_key": "y"}),
+        code_node("code", "result = context['y'] * 2"),
+        node("end", "end", config={"output_key": "code"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"], {"x": 1})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["output_data"] == 4
+
+    timings = body["node_timings"]
+    assert [timing["node_id"] for timing in timings] == ["start", "tool", "code", "end"]
+    assert all(timing["status"] == "completed" for timing in timings)
+    assert timings[1]["tool_id"] == tool["id"]
+    assert all(timing["end_ms"] >= timing["start_ms"] for timing in timings)
+
+    stored = (await client.get(f"/api/execution/logs/{body['id']}")).json()
+    assert stored["node_timings"] == timings
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'workflow_execution_duration_seconds_count{status="completed"}' in text
+    assert f'node_execution_duration_seconds_count{{node_type="tool",tool_id="{tool["id"]}",status="completed"}}' in text
+    assert "# TYPE workflow_executions_in_flight gauge" in text
+    assert "job_queue_depth" in text
+    assert "tool_code_cache_hits_total" in text
+
+
+@pytest.mark.anyio
+async def test_node_timing_limit(client, monkeypatch):
+    monkeypatch.setattr(settings, "node_timing_limit", 2)
+    nodes = [node("start", "start"), code_node("a", "result = 1"), code_node("b", "result = 2"), node("end", "end")]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    assert [timing["node_id"] for timing in response.json()["node_timings"]] == ["start", "a"]
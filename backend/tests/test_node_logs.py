@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, func
+
+from database import engine, NodeLog
+from engine.log_writer import LogWriter
+from tests.utils import node, code_node, chain, create_workflow, run
+
+
+async def _count(execution_id: int) -> int:
+    async with engine.connect() as conn:
+        result = await conn.execute(select(func.count()).select_from(NodeLog).where(NodeLog.execution_id == execution_id))
+        return result.scalar()
+
+
+@pytest.mark.anyio
+async def test_writer_flushes_full_batches_in_background(client):
+    writer = LogWriter(batch_size=3, flush_interval=3600)
+    execution_id = 900001
+    for i in range(4):
+        writer.add({"execution_id": execution_id, "node_id": "n", "level": "info",
+                    "message": str(i), "timestamp": datetime.now()})
+        if i == 2:
+            await writer._flush_task
+    assert await _count(execution_id) == 3
+    await writer.stop()
+    assert await _count(execution_id) == 4
+
+
+@pytest.mark.anyio
+async def test_filter_and_paginate(client):
+    steps = [code_node(f"n{i}", "result = 1") for i in range(3)]
+    nodes = [node("start", "start"), *steps, node("end", "end", config={"output_key": "n2"})]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    execution_id = (await run(client, workflow["id"])).json()["id"]
+    url = f"/api/execution/logs/{execution_id}"
+
+    entries = (await client.get(url)).json()["logs"]
+    assert {"info", "success"} <= {entry["level"] for entry in entries}
+
+    success = (await client.get(url, params={"level": "success"})).json()["logs"]
+    assert [entry["node_id"] for entry in success] == ["n0", "n1", "n2"]
+    assert all(entry["level"] == "success" for entry in success)
+
+    by_node = (await client.get(url, params={"node_id": "n1"})).json()["logs"]
+    assert by_node and all(entry["node_id"] == "n1" for entry in by_node)
+
+    page = (await client.get(url, params={"offset": 1, "limit": 2})).json()["logs"]
+    assert page == entries[1:3]
+
+    assert (await client.get(url, params={"level": "verbose"})).status_code == 400
+    assert (await client.get("/api/execution/logs/999999")).status_code == 404
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from tests.utils import node, edge, code_node, create_tool, create_workflow, run
+
+SLEEP_TOOL = """
+import time
+
+def execute(inputs, context):
+    time.sleep(inputs['seconds'])
+    return inputs['value']
+"""
+
+
+@pytest.mark.anyio
+async def test_branches_run_concurrently_and_join(client):
+    tool = await create_tool(client, SLEEP_TOOL)
+    branches = [
+        node(f"b{i}", "tool", tool_id=tool["id"], config={"inputs": {"seconds": 0.3, "value": i}, "output_key": f"v{i}"})
+        for i in range(3)
+    ]
+    nodes = [node("start", "start"), *branches,
+             code_node("join", "result = [context['v0'], context['v1'], context['v2']]"),
+             node("end", "end", config={"output_key": "join"})]
+    edges = ([edge("start", b["id"]) for b in branches] + [edge(b["id"], "join") for b in branches]
+             + [edge("join", "end")])
+    workflow = await create_workflow(client, nodes, edges)
+
+    started = time.perf_counter()
+    response = await run(client, workflow["id"])
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == [0, 1, 2]
+    assert elapsed < 0.8
+
+
+@pytest.mark.anyio
+async def test_join_runs_after_skipped_branch(client):
+    nodes = [
+        node("start", "start"),
+        node("cond", "condition", config={"condition": "{{x}} > 0"}),
+        code_node("pos", "result = 'positive'", output_key="sign"),
+        code_node("neg", "result = 'negative'", output_key="sign"),
+        code_node("join", "result = context['sign']"),
+        node("end", "end", config={"output_key": "join"}),
+    ]
+    edges = [edge("start", "cond"), edge("cond", "pos", "true"), edge("cond", "neg", "false"),
+             edge("pos", "join"), edge("neg", "join"), edge("join", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    for x, expected in ((1, "positive"), (-1, "negative")):
+        response = await run(client, workflow["id"], {"x": x})
+        assert response.json()["output_data"] == expected
+
+
+@pytest.mark.anyio
+async def test_failing_branch_fails_execution(client):
+    nodes = [
+        node("start", "start"),
+        code_node("ok", "result = 1"),
+        code_node("bad", "raise ValueError('boom')"),
+        code_node("join", "result = 2"),
+        node("end", "end", config={"output_key": "join"}),
+    ]
+    edges = [edge("start", "ok"), edge("start", "bad"), edge("ok", "join"), edge("bad", "join"), edge("join", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"])
+    assert response.status_code == 500
+    assert "boom" in response.json()["detail"]
@@ -0,0 +1,68 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from engine.executor import WorkflowExecutor
+
+from tests.utils import node, edge, code_node, create_tool, create_workflow, run
+
+ASYNC_SLEEP = """
+import asyncio
+
+async def execute(inputs, context):
+    await asyncio.sleep(inputs['seconds'])
+    return inputs['value'] * 10
+"""
+
+
+async def _loop_workflow(client, **loop_config):
+    tool = await create_tool(client, ASYNC_SLEEP)
+    nodes = [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item",
+                                     "parallel": True, **loop_config}),
+        node("work", "tool", tool_id=tool["id"], config={"inputs": {"seconds": 0.2, "value": "{{item}}"}, "output_key": "out"}),
+        code_node("mark", "context['last'] = context['item']\nresult = (context['out'], context['loop_index'])",
+                  executor="inline"),
+        node("end", "end", config={"output_key": "mark"}),
+    ]
+    edges = [edge("start", "loop"), edge("loop", "work"), edge("work", "mark"), edge("mark", "end")]
+    return await create_workflow(client, nodes, edges)
+
+
+@pytest.mark.anyio
+async def test_results_in_input_order(client):
+    workflow = await _loop_workflow(client, max_concurrency=6)
+    started = time.perf_counter()
+    response = await run(client, workflow["id"], {"items": [1, 2, 3, 4, 5, 6]})
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == [[i * 10, i - 1] for i in range(1, 7)]
+    assert elapsed < 0.6
+
+
+@pytest.mark.anyio
+async def test_concurrency_is_bounded(client):
+    workflow = await _loop_workflow(client, max_concurrency=2)
+    started = time.perf_counter()
+    response = await run(client, workflow["id"], {"items": [1, 2, 3, 4, 5, 6]})
+    elapsed = time.perf_counter() - started
+    assert response.status_code == 200, response.text
+    # 6 次迭代、每次 0.2 秒、最多 2 个并发：至少 3 轮
+    assert elapsed >= 0.55
+
+
+@pytest.mark.anyio
+async def test_iteration_writes_do_not_leak():
+    nodes = [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item", "parallel": True}),
+        code_node("mark", "context['last'] = context['item']\nresult = context['last']", executor="inline"),
+    ]
+    workflow = SimpleNamespace(id=None, name="loop", updated_at=None, variables={}, nodes=nodes,
+                               edges=[edge("start", "loop"), edge("loop", "mark")])
+    result = await WorkflowExecutor(workflow, None, tools={}).execute({"items": [1, 2, 3]})
+    assert result["output"] == [1, 2, 3]
+    assert "last" not in result["context"]
+    assert "item" not in result["context"]
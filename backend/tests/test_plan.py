@@ -0,0 +1,73 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from engine.plan import ExecutionPlan, get_plan, invalidate_plan, tool_key
+from tests.utils import node, edge
+
+
+def _workflow(workflow_id=1, updated_at=None, nodes=None, edges=None):
+    nodes = nodes if nodes is not None else [
+        node("start", "start"),
+        node("cond", "condition", config={"condition": "{{x}} > 1"}),
+        node("yes", "tool", tool_id="7", config={"inputs": {"v": "{{x}}"}}),
+        node("no", "tool", tool_id=8),
+        node("end", "end"),
+    ]
+    edges = edges if edges is not None else [
+        edge("start", "cond"), edge("cond", "yes", "true"), edge("cond", "no", "false"),
+        edge("yes", "end"), edge("no", "end"),
+    ]
+    return SimpleNamespace(id=workflow_id, updated_at=updated_at or datetime(2024, 1, 1), nodes=nodes, edges=edges)
+
+
+def test_indexes():
+    plan = ExecutionPlan(_workflow())
+    assert plan.start_node_id == "start"
+    assert plan.get_node("yes")["data"]["tool_id"] == "7"
+    assert plan.get_node("missing") is None
+    assert plan.get_next_nodes("cond") == ["yes", "no"]
+    assert [e["target"] for e in plan.get_edges_from("yes")] == ["end"]
+    assert plan.get_next_nodes("end") == []
+    assert plan.condition_targets["cond"] == {"true": "yes", "false": "no"}
+    assert plan.tool_ids == {7, 8}
+    assert plan.get_tool_inputs("yes")({"x": 3}) == {"v": 3}
+
+
+def test_scope_counts_join_inputs_and_back_edges():
+    nodes = [node(i, "code") for i in ("a", "b", "c", "d")]
+    edges = [edge("a", "b"), edge("a", "c"), edge("b", "d"), edge("c", "d"), edge("d", "a")]
+    scope = ExecutionPlan(_workflow(nodes=nodes, edges=edges)).get_scope("a")
+    assert scope.reachable == {"b", "c", "d"}
+    assert scope.in_degree == {"b": 1, "c": 1, "d": 2}
+    assert scope.back_edges == {("d", "a")}
+
+
+def test_scope_handles_long_chains():
+    count = 5000
+    nodes = [node(f"n{i}", "code") for i in range(count)]
+    edges = [edge(f"n{i}", f"n{i + 1}") for i in range(count - 1)]
+    scope = ExecutionPlan(_workflow(nodes=nodes, edges=edges)).get_scope("n0")
+    assert len(scope.reachable) == count - 1
+
+
+def test_plan_cached_per_version():
+    workflow = _workflow(workflow_id=101)
+    plan = get_plan(workflow)
+    assert get_plan(workflow) is plan
+    updated = _workflow(workflow_id=101, updated_at=datetime(2024, 1, 2))
+    assert get_plan(updated) is not plan
+
+    invalidate_plan(101)
+    assert get_plan(workflow) is not plan
+
+
+def test_unsaved_workflow_not_cached():
+    workflow = _workflow(workflow_id=None)
+    assert get_plan(workflow) is not get_plan(workflow)
+
+
+def test_tool_key():
+    assert tool_key("12") == 12
+    assert tool_key(3) == 3
+    assert tool_key(None) is None
+    assert tool_key("abc") is None
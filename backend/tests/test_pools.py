@@ -0,0 +1,54 @@
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from engine.pools import resolve_kind, run_blocking
+from tests.utils import node, code_node, chain, create_tool, create_workflow, run
+
+
+def test_resolve_kind():
+    assert resolve_kind({"executor": "process"}) == "process"
+    assert resolve_kind({}) == "thread"
+    with pytest.raises(ValueError):
+        resolve_kind({"executor": "gpu"})
+
+
+@pytest.mark.anyio
+async def test_thread_executor_keeps_event_loop_responsive(client):
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        name = await run_blocking("thread", lambda: (time.sleep(0.2), threading.current_thread().name)[1])
+    finally:
+        task.cancel()
+    assert name.startswith("node-executor")
+    assert ticks >= 5
+
+
+@pytest.mark.anyio
+async def test_process_executor_for_tool_and_code_nodes(client):
+    tool = await create_tool(client, "import os\ndef execute(inputs, context):\n    return {'pid': os.getpid(), 'v': inputs['v'] * 2}",
+                             config={"executor": "process"})
+    nodes = [
+        node("start", "start"),
+        node("tool", "tool", tool_id=tool["id"], config={"inputs": {"v": "{{x}}"}, "output_key": "doubled"}),
+        code_node("code", "import os\nresult = [context['doubled']['v'] + 1, context['doubled']['pid'], os.getpid()]",
+                  executor="process"),
+        node("end", "end", config={"output_key": "code"}),
+    ]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"], {"x": 4})
+    assert response.status_code == 200, response.text
+    value, tool_pid, code_pid = response.json()["output_data"]
+    assert value == 9
+    assert tool_pid != os.getpid() and code_pid != os.getpid()
@@ -0,0 +1,79 @@
+import pstats
+
+import pytest
+
+from engine.profiling import ExecutionProfiler
+from tests.utils import node, code_node, chain, create_workflow, run, wait_finished
+
+BUSY = """
+def busy_loop(n):
+    return sum(i * i for i in range(n))
+
+blob = [str(i) * 10 for i in range(20000)]
+result = busy_loop(20000)
+"""
+
+
+async def _workflow(client):
+    nodes = [node("start", "start"), code_node("busy", BUSY), node("end", "end", config={"output_key": "busy"})]
+    return await create_workflow(client, nodes, chain(*nodes))
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ExecutionProfiler("gpu", 10)
+
+
+@pytest.mark.anyio
+async def test_cpu_profile(client, tmp_path):
+    workflow = await _workflow(client)
+    response = await run(client, workflow["id"], profile="cpu")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    profile = body["profile"]
+    assert profile["mode"] == "cpu" and "allocations" not in profile
+    # 线程池节点改为在事件循环线程中运行，代码节点内的函数也被统计
+    assert any("busy_loop" in row["function"] for row in profile["functions"])
+
+    response = await client.get(f"/api/execution/{body['id']}/profile")
+    assert response.status_code == 200
+    assert f"execution-{body['id']}.pstats" in response.headers["content-disposition"]
+    path = tmp_path / "execution.pstats"
+    path.write_bytes(response.content)
+    assert any(name == "busy_loop" for _, _, name in pstats.Stats(str(path)).stats)
+
+
+@pytest.mark.anyio
+async def test_memory_profile(client):
+    workflow = await _workflow(client)
+    response = await run(client, workflow["id"], profile="memory")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    profile = body["profile"]
+    assert profile["mode"] == "memory" and "functions" not in profile
+    assert profile["peak_memory"] > 0 and profile["allocations"]
+
+    response = await client.get(f"/api/execution/{body['id']}/profile")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_async_run_with_profile(client):
+    workflow = await _workflow(client)
+    response = await run(client, workflow["id"], mode="async", profile="all")
+    assert response.status_code == 200, response.text
+    body = await wait_finished(client, response.json()["id"])
+    assert body["status"] == "completed"
+    assert {"functions", "allocations", "peak_memory"} <= set(body["profile"])
+    assert (await client.get(f"/api/execution/{body['id']}/profile")).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_profile_disabled_by_default(client):
+    workflow = await _workflow(client)
+    body = (await run(client, workflow["id"])).json()
+    assert body["profile"] is None
+    assert (await client.get(f"/api/execution/{body['id']}/profile")).status_code == 404
+
+    response = await run(client, workflow["id"], profile="gpu")
+    assert response.status_code == 422
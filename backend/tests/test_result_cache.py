@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import pytest
+
+from engine import result_cache
+from engine.result_cache import ToolResultCache, cache_policy, MISS
+from tests.utils import node, chain, create_tool, create_workflow, run
+
+# 每次真正执行都向记录文件追加一行，用于统计调用次数
+COUNTED_TOOL = """
+with open(context['record'], 'a') as f:
+    f.write('call\\n')
+result = inputs['x'] * 2
+"""
+
+
+def _tool(tool_id=1, code="result = 1"):
+    return SimpleNamespace(id=tool_id, code=code)
+
+
+def _calls(path) -> int:
+    try:
+        with open(path) as f:
+            return len(f.read().split())
+    except FileNotFoundError:
+        return 0
+
+
+def test_cache_policy():
+    assert cache_policy(None) == (False, None)
+    assert cache_policy({"cache_ttl": 10}) == (False, None)
+    assert cache_policy({"pure": True}) == (True, None)
+    assert cache_policy({"pure": True, "cache_ttl": "5"}) == (True, 5.0)
+
+
+def test_key_depends_on_code_and_inputs():
+    cache = ToolResultCache(maxsize=10, max_bytes=1024)
+    key = cache.key(_tool(), {"a": 1, "b": 2})
+    assert key == cache.key(_tool(), {"b": 2, "a": 1})
+    assert key != cache.key(_tool(), {"a": 1, "b": 3})
+    assert key != cache.key(_tool(code="result = 2"), {"a": 1, "b": 2})
+    assert cache.key(_tool(), {"a": object()}) is None
+
+
+@pytest.mark.anyio
+async def test_hit_returns_copy():
+    cache = ToolResultCache(maxsize=10, max_bytes=1024)
+    assert await cache.get("k") is MISS
+    await cache.set("k", 1, {"items": [1]})
+
+    value = await cache.get("k")
+    value["items"].append(2)
+    assert await cache.get("k") == {"items": [1]}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+@pytest.mark.anyio
+async def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    cache = ToolResultCache(maxsize=10, max_bytes=1024)
+    await cache.set("k", 1, "value", ttl=5)
+    assert await cache.get("k") == "value"
+
+    now[0] += 6
+    assert await cache.get("k") is MISS
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.anyio
+async def test_eviction_and_invalidate():
+    cache = ToolResultCache(maxsize=2, max_bytes=1024)
+    await cache.set("a", 1, 1)
+    await cache.set("b", 1, 2)
+    await cache.get("a")
+    await cache.set("c", 2, 3)
+    assert await cache.get("b") is MISS
+    assert await cache.get("a") == 1
+
+    # 超过字节上限的结果不缓存
+    await cache.set("big", 2, "x" * 2048)
+    assert await cache.get("big") is MISS
+
+    await cache.invalidate(1)
+    assert await cache.get("a") is MISS
+    assert await cache.get("c") == 3
+
+
+@pytest.mark.anyio
+async def test_sqlite_layer_shared_between_instances(tmp_path):
+    path = str(tmp_path / "results.db")
+    first = ToolResultCache(maxsize=10, max_bytes=1024, db_path=path, db_max_rows=100)
+    second = ToolResultCache(maxsize=10, max_bytes=1024, db_path=path, db_max_rows=100)
+    try:
+        await first.set("k", 1, [1, 2])
+        assert await second.get("k") == [1, 2]
+        await first.invalidate(1)
+        assert await ToolResultCache(maxsize=10, max_bytes=1024, db_path=path).get("k") is MISS
+    finally:
+        first.close()
+        second.close()
+
+
+@pytest.mark.anyio
+async def test_pure_tool_result_reused(client, tmp_path):
+    record = str(tmp_path / "record")
+    pure = await create_tool(client, COUNTED_TOOL, config={"pure": True})
+    plain = await create_tool(client, COUNTED_TOOL)
+
+    async def call(tool, x):
+        nodes = [
+            node("start", "start"),
+            node("tool", "tool", tool_id=tool["id"], config={"inputs": {"x": "{{x}}"}, "output_key": "out"}),
+            node("end", "end", config={"output_key": "out"}),
+        ]
+        workflow = await create_workflow(client, nodes, chain(*nodes))
+        response = await run(client, workflow["id"], {"x": x, "record": record})
+        assert response.status_code == 200, response.text
+        return response.json()["output_data"]
+
+    assert [await call(pure, 2), await call(pure, 2), await call(pure, 3)] == [4, 4, 6]
+    assert _calls(record) == 2
+
+    assert [await call(plain, 2), await call(plain, 2)] == [4, 4]
+    assert _calls(record) == 4
+
+    # 修改工具代码后不再命中旧结果
+    response = await client.put(f"/api/tools/{pure['id']}", json={
+        "name": pure["name"], "description": "", "category": "test", "code": COUNTED_TOOL + "result += 1\n",
+        "config": {"pure": True}
+    })
+    assert response.status_code == 200, response.text
+    assert await call(pure, 2) == 5
+    assert _calls(record) == 5
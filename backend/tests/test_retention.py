@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select, insert, func, event
+
+from config import settings
+from database import engine, ExecutionLog, NodeLog, ExecutionCheckpoint
+from engine.retention import RetentionJob, retention_job
+
+
+async def _insert_execution(age_days: int, status: str = "completed") -> int:
+    started_at = datetime.utcnow() - timedelta(days=age_days)
+    async with engine.begin() as conn:
+        result = await conn.execute(insert(ExecutionLog).values(
+            workflow_id=0, status=status, input_data={"x": 1}, output_data={"y": 2},
+            logs=[], started_at=started_at
+        ))
+        execution_id = result.inserted_primary_key[0]
+        await conn.execute(insert(NodeLog), [
+            {"execution_id": execution_id, "node_id": "n", "level": level, "message": level}
+            for level in ("debug", "info", "warning", "error")
+        ])
+        await conn.execute(insert(ExecutionCheckpoint).values(execution_id=execution_id, data=b""))
+    return execution_id
+
+
+async def _state(execution_id: int):
+    async with engine.connect() as conn:
+        row = (await conn.execute(
+            select(ExecutionLog.input_data, ExecutionLog.compacted_at).where(ExecutionLog.id == execution_id)
+        )).first()
+        levels = sorted(level for (level,) in await conn.execute(
+            select(NodeLog.level).where(NodeLog.execution_id == execution_id)
+        ))
+        checkpoints = (await conn.execute(
+            select(func.count()).select_from(ExecutionCheckpoint).where(ExecutionCheckpoint.execution_id == execution_id)
+        )).scalar()
+    return row, levels, checkpoints
+
+
+def test_retention_is_disabled_by_default():
+    assert settings.execution_compact_after_days == 0
+    assert settings.execution_retention_days == 0
+    assert retention_job.retention_days == 0 and retention_job.compact_after_days == 0
+
+
+@pytest.mark.anyio
+async def test_disabled_job_does_not_start(client):
+    job = RetentionJob(0, 0, batch_size=10, interval=3600)
+    await job.start()
+    assert job._task is None
+    assert await job.run_once() == {"compacted": 0, "deleted": 0}
+
+
+@pytest.mark.anyio
+async def test_compact_and_delete(client):
+    recent = await _insert_execution(1)
+    old = await _insert_execution(10)
+    expired = await _insert_execution(100)
+    running = await _insert_execution(100, status="running")
+
+    job = RetentionJob(retention_days=90, compact_after_days=7, batch_size=1, interval=3600)
+    result = await job.run_once()
+    assert result["deleted"] >= 1 and result["compacted"] >= 1
+
+    row, levels, checkpoints = await _state(recent)
+    assert row.input_data == {"x": 1} and row.compacted_at is None
+    assert levels == ["debug", "error", "info", "warning"] and checkpoints == 1
+
+    row, levels, checkpoints = await _state(old)
+    assert row.input_data is None and row.compacted_at is not None
+    assert levels == ["error", "warning"] and checkpoints == 0
+
+    row, levels, checkpoints = await _state(expired)
+    assert row is None and levels == [] and checkpoints == 0
+
+    row, levels, checkpoints = await _state(running)
+    assert row.input_data == {"x": 1} and len(levels) == 4 and checkpoints == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("uncompacted", [True, False])
+async def test_batch_selection_uses_started_at_index(client, uncompacted):
+    job = RetentionJob(retention_days=90, compact_after_days=7, batch_size=10, interval=3600)
+    captured = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    async with engine.connect() as conn:
+        event.listen(engine.sync_engine, "before_cursor_execute", before_execute)
+        try:
+            await job._select_batch(conn, datetime.utcnow(), uncompacted)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", before_execute)
+        statement, parameters = captured[0]
+        plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+    details = [row[-1] for row in plan]
+    assert any("ix_execution_logs_started_at" in detail for detail in details), details
+    assert not any(detail.startswith("SCAN execution_logs") and "INDEX" not in detail for detail in details), details
@@ -0,0 +1,133 @@
+import sys
+
+import pytest
+
+from tests.utils import node, edge, code_node, chain, create_tool, create_workflow, run
+
+
+@pytest.mark.anyio
+async def test_long_chain_beyond_recursion_limit(client):
+    count = sys.getrecursionlimit() + 500
+    steps = [code_node(f"n{i}", "context['count'] = context.get('count', 0) + 1\nresult = context['count']",
+                       executor="inline") for i in range(count)]
+    nodes = [node("start", "start"), *steps, node("end", "end", config={"output_key": "count"})]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == count
+
+
+@pytest.mark.anyio
+async def test_for_loop_collects_iteration_results(client):
+    nodes = [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item"}),
+        code_node("square", "result = context['item'] ** 2 + context['loop_index']"),
+        node("end", "end", config={"output_key": "square"}),
+    ]
+    edges = [edge("start", "loop"), edge("loop", "square"), edge("square", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"], {"items": [1, 2, 3]})
+    assert response.json()["output_data"] == [1, 5, 11]
+
+
+@pytest.mark.anyio
+async def test_while_loop_with_max_iterations(client):
+    nodes = [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "while", "condition": "{{n}} < 5", "max_iterations": 3}),
+        code_node("inc", "context['n'] = context['n'] + 1\nresult = context['n']"),
+        node("end", "end", config={"output_key": "inc"}),
+    ]
+    edges = [edge("start", "loop"), edge("loop", "inc"), edge("inc", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"], {"n": 0})
+    assert response.json()["output_data"] == [1, 2, 3]
+
+    response = await run(client, workflow["id"], {"n": 3})
+    assert response.json()["output_data"] == [4, 5]
+
+
+@pytest.mark.anyio
+async def test_nested_loops(client):
+    nodes = [
+        node("start", "start"),
+        node("outer", "loop", config={"loop_type": "for", "items_key": "rows", "item_var": "row"}),
+        node("inner", "loop", config={"loop_type": "for", "items_key": "row", "item_var": "cell"}),
+        code_node("double", "result = context['cell'] * 2"),
+        node("end", "end", config={"output_key": "double"}),
+    ]
+    edges = [edge("start", "outer"), edge("outer", "inner"), edge("inner", "double"), edge("double", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"], {"rows": [[1, 2], [3]]})
+    assert response.status_code == 200, response.text
+    # 外层每次迭代的结果是内层循环的结果列表
+    assert response.json()["output_data"] == [[2, 4], [6]]
+
+
+@pytest.mark.anyio
+async def test_nodes_after_loop_run_once(client):
+    nodes = [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item"}),
+        code_node("body", "context['calls'] = context.get('calls', 0) + 1\nresult = context['calls']"),
+    ]
+    edges = [edge("start", "loop"), edge("loop", "body")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"], {"items": [1, 2, 3, 4]})
+    assert response.json()["output_data"] == [1, 2, 3, 4]
+
+
+@pytest.mark.anyio
+async def test_missing_start_node(client):
+    workflow = await create_workflow(client, [code_node("a", "result = 1")], [])
+    response = await run(client, workflow["id"])
+    assert response.status_code == 500
+    assert "起始节点" in response.json()["detail"]
+
+
+@pytest.mark.anyio
+async def test_back_edge_reenters_node_still_running(client):
+    slow = await create_tool(client, "import asyncio\n\nasync def execute(inputs, context):\n"
+                                     "    await asyncio.sleep(0.1)\n    return 'slow'")
+    nodes = [
+        node("start", "start"),
+        code_node("a", "context['n'] = context.get('n', 0) + 1\nresult = context['n']"),
+        node("b", "tool", tool_id=slow["id"], config={"output_key": "b"}),
+        node("c", "condition", config={"condition": "{{n}} < 2"}),
+        node("end", "end", config={"output_key": "n"}),
+    ]
+    edges = [edge("start", "a"), edge("a", "b"), edge("a", "c"),
+             edge("c", "a", "true"), edge("c", "end", "false")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    timings = response.json()["node_timings"]
+    assert [timing["node_id"] for timing in timings].count("a") == 2
+    assert any(timing["node_id"] == "end" for timing in timings)
+    # 两次进入的 b 分别计时
+    b_timings = [timing for timing in timings if timing["node_id"] == "b"]
+    assert len(b_timings) == 2 and all(timing["status"] == "completed" for timing in b_timings)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("parallel", [False, True])
+@pytest.mark.parametrize("source, expected", [
+    ("context['items'] = {'a': 1, 'b': 2, 'c': 3}", ["a!", "b!", "c!"]),
+    ("context['items'] = (key for key in 'abc')", ["a!", "b!", "c!"]),
+    ("context['items'] = {'a'}", ["a!"]),
+])
+async def test_for_loop_over_any_iterable(client, parallel, source, expected):
+    nodes = [
+        node("start", "start"),
+        code_node("make", source + "\nresult = None", executor="inline"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item",
+                                     "parallel": parallel}),
+        code_node("mark", "result = context['item'] + '!'", output_key="out"),
+        node("end", "end", config={"output_key": "out"}),
+    ]
+    edges = [edge("start", "make"), edge("make", "loop"), edge("loop", "mark"), edge("mark", "end")]
+    workflow = await create_workflow(client, nodes, edges)
+    response = await run(client, workflow["id"])
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == expected
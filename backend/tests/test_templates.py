@@ -0,0 +1,37 @@
+import pytest
+
+from engine.templates import compile_template, compile_inputs, parse_path, resolve_path
+
+
+def test_parse_path():
+    assert parse_path("resp.items[0].id") == ("resp", "items", 0, "id")
+    assert parse_path("data['a b'][-1]") == ("data", "a b", -1)
+    assert parse_path("rows.2") == ("rows", 2)
+
+
+def test_resolve_path():
+    context = {"resp": {"items": [{"id": 1}, {"id": 2}]}, "a.b": "literal"}
+    assert resolve_path(context, "resp.items[-1].id", parse_path("resp.items[-1].id")) == 2
+    assert resolve_path(context, "a.b", parse_path("a.b")) == "literal"
+    assert resolve_path(context, "resp.none", parse_path("resp.none"), None) is None
+    with pytest.raises(KeyError):
+        resolve_path(context, "resp.none", parse_path("resp.none"))
+
+
+def test_whole_reference_keeps_type():
+    context = {"user": {"id": 5, "tags": ["a"]}, "n": 3}
+    assert compile_template("{{n}}")(context) == 3
+    assert compile_template("{{ user.tags }}")(context) == ["a"]
+    # 变量不存在时返回模板字符串本身
+    assert compile_template("{{missing}}")(context) == "{{missing}}"
+    assert compile_template("{{user.missing}}")(context) == "{{user.missing}}"
+
+
+def test_interpolation():
+    template = compile_template("https://api.example.com/users/{{user.id}}/orders?page={{page}}&q={{q}}")
+    assert template({"user": {"id": 5}, "page": 2}) == "https://api.example.com/users/5/orders?page=2&q={{q}}"
+
+
+def test_nested_inputs():
+    inputs = compile_inputs({"body": {"ids": ["{{a}}", "{{b.c}}"], "fixed": 1}, "label": "n={{a}}", "raw": None})
+    assert inputs({"a": 1, "b": {"c": [2]}}) == {"body": {"ids": [1, [2]], "fixed": 1}, "label": "n=1", "raw": None}
@@ -0,0 +1,76 @@
+import gc
+import weakref
+
+import pytest
+
+from engine.tool_cache import CompiledTool, ToolCodeCache
+from tests.utils import node, edge, create_tool, create_workflow, run
+
+HELPER_TOOL = """
+def helper():
+    return inputs['x']
+
+def execute(inputs, context):
+    return helper()
+"""
+
+
+class Context(dict):
+    """可以被弱引用的上下文"""
+
+
+def test_helper_sees_current_call_inputs():
+    tool = CompiledTool(1, HELPER_TOOL)
+    assert [tool({"x": x}, {}) for x in (1, 2, 3)] == [1, 2, 3]
+
+
+def test_module_level_code_runs_per_call():
+    tool = CompiledTool(1, "calls = context.setdefault('calls', 0) + 1\nresult = calls")
+    assert tool({}, {}) == 1
+    assert tool({}, {}) == 1
+
+
+def test_compiled_tool_does_not_retain_context():
+    tool = CompiledTool(1, HELPER_TOOL)
+    context = Context()
+    tool({"x": 1}, context)
+    ref = weakref.ref(context)
+    del context
+    gc.collect()
+    assert ref() is None
+
+
+def test_cache_reuses_compiled_code_and_drops_stale_versions():
+    cache = ToolCodeCache(maxsize=2)
+    first = cache.get(1, "result = 1")
+    assert cache.get(1, "result = 1") is first
+    updated = cache.get(1, "result = 2")
+    assert updated is not first
+    assert updated({}, {}) == 2
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+    cache.get(2, "result = 2")
+    cache.get(3, "result = 3")
+    assert cache.stats()["size"] == 2
+
+
+def test_async_execute_detected():
+    assert CompiledTool(1, "async def execute(inputs, context):\n    return 1").is_async
+    assert not CompiledTool(1, HELPER_TOOL).is_async
+
+
+@pytest.mark.anyio
+async def test_loop_over_helper_tool(client):
+    tool = await create_tool(client, HELPER_TOOL)
+    workflow = await create_workflow(client, [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item"}),
+        node("tool", "tool", tool_id=tool["id"], config={"inputs": {"x": "{{item}}"}, "output_key": "out"}),
+        node("end", "end", config={"output_key": "out"}),
+    ], [edge("start", "loop"), edge("loop", "tool"), edge("tool", "end")])
+
+    response = await run(client, workflow["id"], {"items": [10, 20, 30]})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["status"] == "completed"
+    assert body["output_data"] == [10, 20, 30]
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from database import engine, async_session_maker
+from engine.executor import load_tools
+from tests.utils import node, edge, create_tool, create_workflow, run
+
+
+@contextmanager
+def tool_queries():
+    """记录期间对 tools 表的查询语句"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM tools" in statement:
+            statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", before_execute)
+
+
+@pytest.mark.anyio
+async def test_load_tools(client):
+    first = await create_tool(client, "result = 1")
+    second = await create_tool(client, "result = 2")
+    async with async_session_maker() as db:
+        assert await load_tools(db, set()) == {}
+        with tool_queries() as statements:
+            tools = await load_tools(db, {first["id"], second["id"], 999999})
+    assert set(tools) == {first["id"], second["id"]}
+    assert len(statements) == 1
+
+
+@pytest.mark.anyio
+async def test_tools_loaded_once_per_execution(client):
+    double = await create_tool(client, "result = inputs['x'] * 2")
+    increment = await create_tool(client, "result = inputs['x'] + 1")
+    workflow = await create_workflow(client, [
+        node("start", "start"),
+        node("loop", "loop", config={"loop_type": "for", "items_key": "items", "item_var": "item"}),
+        node("double", "tool", tool_id=str(double["id"]), config={"inputs": {"x": "{{item}}"}, "output_key": "d"}),
+        node("increment", "tool", tool_id=increment["id"], config={"inputs": {"x": "{{d}}"}, "output_key": "out"}),
+        node("end", "end", config={"output_key": "out"}),
+    ], [edge("start", "loop"), edge("loop", "double"), edge("double", "increment"), edge("increment", "end")])
+
+    with tool_queries() as statements:
+        response = await run(client, workflow["id"], {"items": [1, 2, 3, 4]})
+    assert response.status_code == 200, response.text
+    assert response.json()["output_data"] == [3, 5, 7, 9]
+    assert len(statements) == 1
+
+
+@pytest.mark.anyio
+async def test_missing_tool_fails_node(client):
+    nodes = [node("start", "start"), node("tool", "tool", tool_id=999999), node("end", "end")]
+    workflow = await create_workflow(client, nodes, [edge("start", "tool"), edge("tool", "end")])
+    response = await run(client, workflow["id"])
+    assert response.status_code == 500
+    assert "工具不存在" in response.json()["detail"]
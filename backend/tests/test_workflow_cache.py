@@ -0,0 +1,94 @@
+import pytest
+
+from database import async_session_maker
+from engine.workflow_cache import WorkflowCache, workflow_cache
+from tests.utils import node, code_node, chain, create_workflow, run
+
+
+def _counter_workflow():
+    nodes = [
+        node("start", "start"),
+        code_node("append", "context['seen'].append(len(context['seen']))\nresult = list(context['seen'])"),
+        node("end", "end", config={"output_key": "append"}),
+    ]
+    return nodes, chain(*nodes)
+
+
+@pytest.mark.anyio
+async def test_variables_are_isolated_between_runs(client):
+    nodes, edges = _counter_workflow()
+    workflow = await create_workflow(client, nodes, edges, variables={"seen": []})
+
+    outputs = []
+    for _ in range(3):
+        response = await run(client, workflow["id"])
+        assert response.status_code == 200, response.text
+        outputs.append(response.json()["output_data"])
+    assert outputs == [[0], [0], [0]]
+
+    response = await client.get(f"/api/workflows/{workflow['id']}")
+    assert response.json()["variables"] == {"seen": []}
+
+
+@pytest.mark.anyio
+async def test_input_overrides_variables(client):
+    nodes, edges = _counter_workflow()
+    workflow = await create_workflow(client, nodes, edges, variables={"seen": []})
+    response = await run(client, workflow["id"], {"seen": [5]})
+    assert response.json()["output_data"] == [5, 1]
+
+
+@pytest.mark.anyio
+async def test_update_invalidates_cached_definition(client):
+    nodes = [node("start", "start"), code_node("value", "result = 1"), node("end", "end", config={"output_key": "value"})]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    assert (await run(client, workflow["id"])).json()["output_data"] == 1
+
+    hits = workflow_cache.hits
+    assert (await run(client, workflow["id"])).json()["output_data"] == 1
+    assert workflow_cache.hits == hits + 1
+
+    nodes[1] = code_node("value", "result = 2")
+    response = await client.put(f"/api/workflows/{workflow['id']}", json={
+        "name": workflow["name"], "description": "", "nodes": nodes, "edges": chain(*nodes), "variables": {}
+    })
+    assert response.status_code == 200, response.text
+    assert (await run(client, workflow["id"])).json()["output_data"] == 2
+
+
+@pytest.mark.anyio
+async def test_delete_invalidates_cached_definition(client):
+    nodes = [node("start", "start"), node("end", "end")]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    assert (await run(client, workflow["id"])).status_code == 200
+
+    assert (await client.delete(f"/api/workflows/{workflow['id']}")).status_code == 200
+    assert (await run(client, workflow["id"])).status_code == 404
+
+
+class InvalidatingSession:
+    """读取工作流的查询完成后、结果写入缓存之前模拟一次并发更新"""
+
+    def __init__(self, db, cache, workflow_id):
+        self.db, self.cache, self.workflow_id = db, cache, workflow_id
+
+    async def execute(self, query):
+        result = await self.db.execute(query)
+        self.cache.invalidate(self.workflow_id)
+        return result
+
+
+@pytest.mark.anyio
+async def test_definition_invalidated_during_read_is_not_cached(client):
+    nodes = [node("start", "start"), node("end", "end")]
+    workflow = await create_workflow(client, nodes, chain(*nodes))
+    cache = WorkflowCache(maxsize=10)
+    async with async_session_maker() as db:
+        definition = await cache.get(InvalidatingSession(db, cache, workflow["id"]), workflow["id"])
+        assert definition.id == workflow["id"]
+        assert cache.stats()["size"] == 0
+
+        # 之后没有并发更新的读取照常缓存
+        await cache.get(db, workflow["id"])
+        assert await cache.get(db, workflow["id"]) is not None
+        assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
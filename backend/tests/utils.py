@@ -0,0 +1,79 @@
+"""测试中构造工具与工作流的辅助函数"""
+
+from typing import Any, Dict, List, Optional
+import itertools
+
+_names = itertools.count()
+
+
+def node(node_id: str, node_type: str, **data) -> Dict[str, Any]:
+    return {"id": node_id, "type": "custom", "position": {"x": 0, "y": 0},
+            "data": {"type": node_type, "label": node_id, "config": data.pop("config", {}), **data}}
+
+
+def edge(source: str, target: str, handle: Optional[str] = None) -> Dict[str, Any]:
+    result = {"id": f"{source}-{target}", "source": source, "target": target}
+    if handle:
+        result["sourceHandle"] = handle
+    return result
+
+
+def code_node(node_id: str, code: str, output_key: Optional[str] = None, **config) -> Dict[str, Any]:
+    return node(node_id, "code", config={"code": code, "output_key": output_key or node_id, **config})
+
+
+async def create_tool(client, code: str, config: Optional[Dict[str, Any]] = None, **fields) -> Dict[str, Any]:
+    response = await client.post("/api/tools/", json={
+        "name": fields.pop("name", f"tool_{next(_names)}"),
+        "description": "",
+        "category": fields.pop("category", "test"),
+        "config": config or {},
+        "code": code,
+        **fields,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def create_workflow(client, nodes: List[Dict], edges: List[Dict],
+                          variables: Optional[Dict[str, Any]] = None, name: Optional[str] = None) -> Dict[str, Any]:
+    response = await client.post("/api/workflows/", json={
+        "name": name or f"workflow_{next(_names)}",
+        "description": "",
+        "nodes": nodes,
+        "edges": edges,
+        "variables": variables or {},
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def chain(*nodes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """按顺序把节点串成一条链"""
+    return [edge(a["id"], b["id"]) for a, b in zip(nodes, nodes[1:])]
+
+
+async def run(client, workflow_id: int, input_data: Optional[Dict[str, Any]] = None, **options):
+    return await client.post("/api/execution/run", json={
+        "workflow_id": workflow_id, "input_data": input_data or {}, **options
+    })
+
+
+async def latest_execution(client, workflow_id: int) -> Dict[str, Any]:
+    """工作流最近一次执行的详情"""
+    response = await client.get("/api/execution/", params={"workflow_id": workflow_id, "limit": 1})
+    execution_id = response.json()[0]["id"]
+    response = await client.get(f"/api/execution/logs/{execution_id}")
+    return response.json()
+
+
+async def wait_finished(client, execution_id: int, timeout: float = 5.0) -> Dict[str, Any]:
+    """轮询直到执行结束，返回执行详情"""
+    import asyncio
+    for _ in range(int(timeout / 0.02)):
+        response = await client.get(f"/api/execution/logs/{execution_id}")
+        body = response.json()
+        if body["status"] not in ("queued", "running"):
+            return body
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"执行 {execution_id} 未在 {timeout} 秒内结束")
@@ -5,17 +5,31 @@ const api = axios.create({
   timeout: 30000
 })
 
+// 按游标（X-Next-After-Id 响应头）依次拉取列表的所有分页
+const fetchAll = async (url, params = {}) => {
+  const data = []
+  let afterId
+  do {
+    const response = await api.get(url, { params: { ...params, limit: 1000, after_id: afterId } })
+    data.push(...response.data)
+    afterId = response.headers['x-next-after-id']
+  } while (afterId)
+  return { data }
+}
+
 // 工具相关API
 export const toolApi = {
-  getTools: () => api.get('/tools/'),
+  // 列表默认不含 config / code，需要时通过 fields 指定，如 { fields: 'config,code' }
+  getTools: (params) => fetchAll('/tools/', params),
   getTool: (id) => api.get(`/tools/${id}`),
   createTool: (data) => api.post('/tools/', data),
+  updateTool: (id, data) => api.put(`/tools/${id}`, data),
   deleteTool: (id) => api.delete(`/tools/${id}`)
 }
 
 // 工作流相关API
 export const workflowApi = {
-  getWorkflows: () => api.get('/workflows/'),
+  getWorkflows: (params) => fetchAll('/workflows/', params),
   getWorkflow: (id) => api.get(`/workflows/${id}`),
   createWorkflow: (data) => api.post('/workflows/', data),
   updateWorkflow: (id, data) => api.put(`/workflows/${id}`, data),
@@ -25,7 +39,9 @@ export const workflowApi = {
 // 执行相关API
 export const executionApi = {
   executeWorkflow: (data) => api.post('/execution/run', data),
-  getExecutionLog: (id) => api.get(`/execution/logs/${id}`)
+  getExecutionLog: (id) => api.get(`/execution/logs/${id}`),
+  // 实时执行事件流，配合 EventSource 使用
+  subscribeEvents: (id) => new EventSource(`/api/execution/${id}/events`)
 }
 
 export default api